@@ -0,0 +1,262 @@
+"""
+生成模块名→发行包名映射数据库 (package_mapping.tsv)
+
+从发行包元数据（top_level.txt，其次RECORD）中读取每个发行包提供的顶层模块，
+只保留模块名与发行包名不同的条目，按模块名排序后写入TSV文件，供
+package_installer_yulibupt.PackageMappingDatabase 二分查找。
+
+随工具发布的数据库只由固定版本的语料 mapping_corpus.txt 生成，与本地环境无关:
+    python build_mapping_db.py --corpus mapping_corpus.txt --wheels wheelhouse --no-merge
+
+使用方法:
+    python build_mapping_db.py                              # 从当前环境的已安装发行包生成，并合并现有数据库
+    python build_mapping_db.py --site-packages DIR [DIR ...]  # 读取指定目录（如其他虚拟环境的site-packages）
+    python build_mapping_db.py --wheels DIR [DIR ...]       # 读取目录中的所有 .whl 文件
+    python build_mapping_db.py --corpus FILE --wheels DIR   # 先将语料中的wheel下载到DIR，再读取
+    python build_mapping_db.py --no-merge -o out.tsv        # 不合并现有数据库，写入指定文件
+"""
+import os
+import sys
+import argparse
+import zipfile
+import tempfile
+import subprocess
+import importlib.metadata
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from package_installer_yulibupt import (  # noqa: E402
+    PACKAGE_MAPPING_DB,
+    STDLIB,
+    InstalledIndex,
+    normalize_distribution_name,
+    print_colored,
+    safe_print,
+)
+
+# 随工具发布的数据库使用的语料（固定版本的发行包列表）
+MAPPING_CORPUS = str(project_root / 'mapping_corpus.txt')
+
+# 下载语料wheel的目标解释器和平台（按顺序优先），只提供Windows或macOS wheel的发行包（如pywin32、pyobjc）也能下载
+CORPUS_PYTHON_VERSION = '3.12'
+CORPUS_PLATFORMS = ('manylinux_2_28_x86_64', 'win_amd64', 'macosx_14_0_arm64')
+
+# 发行包中常见的非包顶层目录（测试、文档、示例等），不作为可导入的模块收录
+GENERIC_MODULES = {'test', 'tests', 'testing', 'doc', 'docs', 'example', 'examples',
+                   'benchmark', 'benchmarks', 'script', 'scripts', 'setup'}
+
+HEADER = (
+    "# 模块名 -> 发行包名 映射数据库（由 build_mapping_db.py 生成）\n"
+    "# 格式: 模块名<TAB>发行包名，按模块名的UTF-8字节排序，只收录两者不同的条目\n"
+)
+
+
+def iter_installed_distributions(paths: Optional[List[str]] = None) -> Iterator:
+    """遍历已安装的发行包（paths为None时使用当前环境的sys.path）"""
+    if paths is None:
+        yield from importlib.metadata.distributions()
+    else:
+        yield from importlib.metadata.distributions(path=list(paths))
+
+
+def iter_wheel_distributions(directories: Iterable[str]) -> Iterator:
+    """遍历目录中 .whl 文件的元数据（不解压）"""
+    for directory in directories:
+        for wheel in sorted(Path(directory).glob('*.whl')):
+            try:
+                archive = zipfile.ZipFile(wheel)
+            except (OSError, zipfile.BadZipFile) as e:
+                print_colored(f"   ⚠️  无法读取 {wheel.name}: {e}", "yellow")
+                continue
+            dist_infos = {name.split('/')[0] for name in archive.namelist()
+                          if name.count('/') == 1 and name.endswith('.dist-info/METADATA')}
+            for dist_info in sorted(dist_infos):
+                yield importlib.metadata.PathDistribution(zipfile.Path(archive, dist_info + '/'))
+
+
+def read_corpus(path: str) -> List[str]:
+    """
+    读取语料文件（每行一个 名称==版本，#开头为注释）
+
+    Raises:
+        ValueError: 某一行没有固定版本
+    """
+    requirements = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            name, _, version = line.partition('==')
+            if not name.strip() or not version.strip():
+                raise ValueError(f"{path}:{number}: 语料中的发行包必须固定版本（名称==版本）: {line}")
+            requirements.append(f"{name.strip()}=={version.strip()}")
+    return requirements
+
+
+def download_corpus(requirements: Iterable[str], directory: str) -> List[str]:
+    """
+    将语料中每个发行包的wheel（不含依赖）下载到directory
+
+    每个发行包单独调用一次pip，一个包下载失败不影响其他包。
+    返回: 下载失败的条目列表
+    """
+    platform_args = []
+    for platform in CORPUS_PLATFORMS:
+        platform_args += ["--platform", platform]
+    failed = []
+    for requirement in requirements:
+        result = subprocess.run(
+            [sys.executable, "-m", "pip", "download", "--no-deps", "--only-binary=:all:",
+             "--python-version", CORPUS_PYTHON_VERSION, "--implementation", "cp"] + platform_args +
+            ["--dest", directory, requirement],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode != 0:
+            failed.append(requirement)
+    return failed
+
+
+def pinned_distributions(distributions: Iterable, requirements: Iterable[str]) -> Iterator:
+    """只保留名称和版本与语料一致的发行包，返回 (语料中的发行包名, 发行包)"""
+    pinned = {}
+    for requirement in requirements:
+        name, _, version = requirement.partition('==')
+        pinned[(normalize_distribution_name(name), version)] = name
+    for dist in distributions:
+        try:
+            key = (normalize_distribution_name(dist.metadata['Name'] or ''), dist.version)
+        except Exception:
+            continue
+        if key in pinned:
+            yield pinned[key], dist
+
+
+def collect_module_owners(distributions: Iterable) -> Dict[str, Set[str]]:
+    """
+    读取每个发行包提供的顶层模块，返回 模块名 -> 发行包名集合
+
+    distributions中的元素也可以是 (发行包名, 发行包)，此时使用给定的名称
+    （新版构建工具写入元数据的名称是规范化后的形式，如 pillow、python_binance）。
+    """
+    owners: Dict[str, Set[str]] = {}
+    for dist in distributions:
+        try:
+            if isinstance(dist, tuple):
+                name, dist = dist
+            else:
+                name = dist.metadata['Name']
+        except Exception:
+            continue
+        if not name:
+            continue
+        for module in InstalledIndex._top_level_modules(dist):
+            owners.setdefault(module, set()).add(name)
+    return owners
+
+
+def build_rows(owners: Dict[str, Set[str]],
+               existing: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, str], List[str]]:
+    """
+    合并元数据中的映射与现有数据库
+
+    跳过标准库模块名（如backport包提供的enum）、模块名与发行包名相同的条目（原名称回退即可）
+    下划线开头的私有模块（如 _pytest、_distutils_hack，项目代码不会直接导入）和
+    tests、docs等非包目录（GENERIC_MODULES）；
+    同一模块由多个不同发行包提供（命名空间包等）时无法确定，保留现有数据库中的条目。
+    返回: (模块名 -> 发行包名, 有歧义的模块名列表)
+    """
+    rows = dict(existing or {})
+    ambiguous = []
+    for module, names in owners.items():
+        if (module in STDLIB or module in GENERIC_MODULES or not module.isidentifier()
+                or module.startswith('_')):
+            continue
+        distinct = {normalize_distribution_name(name): name for name in names}
+        if len(distinct) > 1:
+            ambiguous.append(module)
+            continue
+        name = next(iter(distinct.values()))
+        if normalize_distribution_name(module) != normalize_distribution_name(name):
+            rows[module] = name
+    return rows, sorted(ambiguous)
+
+
+def read_mapping_database(path: str) -> Dict[str, str]:
+    """读取现有数据库（文件不存在时返回空字典）"""
+    rows = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\r\n')
+                if not line or line.startswith('#'):
+                    continue
+                module, _, name = line.partition('\t')
+                if module and name:
+                    rows[module] = name
+    except FileNotFoundError:
+        pass
+    return rows
+
+
+def write_mapping_database(rows: Dict[str, str], path: str):
+    """按模块名的UTF-8字节排序写入数据库（先写临时文件再替换，避免读到写了一半的文件）"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(HEADER)
+        for module in sorted(rows, key=lambda name: name.encode('utf-8')):
+            f.write(f"{module}\t{rows[module]}\n")
+    os.replace(tmp_file, path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="生成模块名→发行包名映射数据库")
+    parser.add_argument("-o", "--output", default=PACKAGE_MAPPING_DB, help="输出文件（默认为随工具发布的数据库）")
+    parser.add_argument("--site-packages", nargs="+", metavar="DIR", help="读取这些目录中已安装的发行包")
+    parser.add_argument("--wheels", nargs="+", metavar="DIR", help="读取这些目录中的wheel文件")
+    parser.add_argument("--corpus", metavar="FILE",
+                        help="先下载语料文件中固定版本的wheel（到--wheels指定的第一个目录，未指定时使用临时目录）")
+    parser.add_argument("--no-merge", dest="merge", action="store_false", help="不保留现有数据库中的条目")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.corpus:
+            try:
+                requirements = read_corpus(args.corpus)
+            except (OSError, ValueError) as e:
+                print_colored(f"❌ 无法读取语料: {e}", "red")
+                return 1
+            args.wheels = args.wheels or [tmp_dir]
+            os.makedirs(args.wheels[0], exist_ok=True)
+            safe_print(f"下载 {len(requirements)} 个发行包的wheel到: {args.wheels[0]}")
+            failed = download_corpus(requirements, args.wheels[0])
+            if failed:
+                # 缺少任何一个wheel时生成的数据库都不完整，不写入
+                print_colored(f"❌ 以下发行包的wheel下载失败: {', '.join(failed)}", "red")
+                return 1
+        if args.wheels:
+            distributions = iter_wheel_distributions(args.wheels)
+        else:
+            distributions = iter_installed_distributions(args.site_packages)
+        if args.corpus:
+            # 目录中其他版本或语料之外的wheel不参与生成
+            distributions = pinned_distributions(distributions, requirements)
+        owners = collect_module_owners(distributions)
+    existing = read_mapping_database(args.output) if args.merge else {}
+    rows, ambiguous = build_rows(owners, existing)
+    write_mapping_database(rows, args.output)
+
+    safe_print(f"读取 {len(owners)} 个顶层模块，写入 {len(rows)} 条映射（原有 {len(existing)} 条）: {args.output}")
+    if ambiguous:
+        safe_print(f"由多个发行包提供、未收录: {', '.join(ambiguous)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -29,14 +29,32 @@
 
 import subprocess
 import sys
+import io
 import importlib.util
+import importlib.metadata
 import re
+import tokenize
+import codecs
 import os
+import ast
 import shutil
 import json
-import urllib.request
-import urllib.error
-from typing import Set, Dict, Tuple, List, Optional
+import csv
+import hashlib
+import itertools
+import bisect
+import mmap
+import time
+import threading
+import socket
+import cProfile
+import http.client
+import urllib.parse
+import collections.abc
+from collections import deque, OrderedDict
+from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Set, Dict, Tuple, List, Optional, Iterable, Iterator, Callable, Sequence, Hashable
 from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
@@ -75,63 +93,338 @@ EXCLUDE_FILE_PATTERNS = [
 # 是否生成 requirements.txt
 GENERATE_REQUIREMENTS = True
 
+# 导入提取的并行进程数 (None=使用CPU核心数, 1=串行提取)
+EXTRACT_WORKERS = None
+
+# 每个进程任务处理的文件数 (文件分批提交，减少进程间通信开销)
+EXTRACT_CHUNK_SIZE = 64
+
+# 文件数少于该值时直接串行提取 (避免小项目承担进程池启动开销)
+PARALLEL_MIN_FILES = 200
+
+# 流式模式: 边发现文件边解析，不预先收集和排序完整的文件列表 (适合超大目录树)
+STREAM_MODE = False
+
+# 监视模式: 扫描后持续监视项目，文件变化时只重新解析变化的文件 (命令行参数 --watch)
+WATCH_MODE = False
+
+# 监视模式的轮询间隔(秒)
+WATCH_INTERVAL = 1.0
+
+# import提取后端: 'regex'=逐行正则匹配, 'ast'=语法树解析(语法错误时自动回退到regex)
+EXTRACTOR_BACKEND = 'regex'
+
+# 不小于该字节数的文件使用mmap字节级提取（只解码导入语句所在的行，仅regex后端）; 0=禁用
+MMAP_EXTRACT_MIN_BYTES = 4 * 1024 * 1024
+
+# 批量安装: 将所有缺失的包合并为一次pip调用 (失败时二分定位出错的包)
+BATCH_INSTALL = True
+
+# 每次pip调用最多安装的包数 (0=不限制，全部合并为一次调用)
+INSTALL_BATCH_SIZE = 0
+
+# PyPI JSON API地址 (可替换为镜像或本地测试索引)
+PYPI_JSON_URL = "https://pypi.org/pypi"
+
+# PyPI查询超时时间(秒) 和 并发查询线程数
+PYPI_TIMEOUT = 5
+PYPI_MAX_WORKERS = 8
+
+# PyPI查询结果缓存文件 (跨运行和跨项目复用; None=只在进程内缓存)
+PYPI_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'package_installer_yulibupt', 'pypi_cache.json')
+
+# PyPI缓存有效期(秒): 找到的包 / 确认不存在的包
+PYPI_CACHE_TTL = 7 * 24 * 3600
+PYPI_CACHE_NEGATIVE_TTL = 24 * 3600
+
+# PyPI缓存最多保存的条目数 (超出时淘汰最久未使用的条目)
+PYPI_CACHE_MAX_ENTRIES = 10000
+
+# 安装后导入验证使用的子进程数 (模块在独立的Python进程中导入，不影响本进程)
+VERIFY_PROCESSES = 1
+
+# 每个验证子进程的超时时间(秒)，超时的模块记为失败，其余模块在新进程中继续验证
+VERIFY_TIMEOUT = 120
+
+# 扫描缓存文件名 (保存在扫描根目录下，未变化的文件不再重新解析; None=禁用缓存)
+SCAN_CACHE_FILE = '.package_installer_cache.jsonl'
+
+# 各阶段耗时报告 (JSON格式，记录每个阶段的墙钟时间、CPU时间和处理条目数; None=不生成)
+PROFILE_REPORT_FILE = None
+
+# cProfile性能分析输出文件 (可用 python -m pstats 查看; None=不启用)
+PROFILE_DUMP_FILE = None
+
+# pip安装超时时间(秒，批量安装时按包数累加) / pip show超时时间(秒) / 安装后处理脚本超时时间(秒)
+PIP_INSTALL_TIMEOUT = 300
+# 一次批量pip调用的超时上限(秒): 超时后不再二分，改为逐个安装（每个包PIP_INSTALL_TIMEOUT秒）
+PIP_BATCH_TIMEOUT = 900
+PIP_SHOW_TIMEOUT = 30
+POST_INSTALL_TIMEOUT = 60
+
+# 试运行: 只分析并列出需要安装的包，不调用pip、不生成requirements.txt (命令行参数 --dry-run)
+DRY_RUN = False
+
+# 仅分析: 生成追踪结果和requirements.txt，不启动任何子进程、不导入被检测的模块 (命令行参数 --analyze-only)
+# 已安装状态只来自发行包元数据和 importlib.util.find_spec，适合批量审计大量仓库
+# 导入提取在当前进程中串行进行，不读写被审计仓库中的扫描缓存
+ANALYZE_ONLY = False
+
+# 批量分析多个项目时处理项目的线程数 (命令行参数 --roots / --manifest)
+# 线程只重叠目录遍历、文件读取等I/O；导入提取受GIL限制，各项目之间仍是串行的
+BATCH_ROOT_WORKERS = 4
+
+# 批量分析的报告输出目录: 每个项目一个JSON报告 + 跨项目依赖矩阵
+BATCH_OUTPUT_DIR = 'package_audit'
+
+# 结果输出格式: 'text'=彩色文本, 'json'=运行结束时向stdout输出JSON摘要(过程信息改为输出到stderr)
+OUTPUT_FORMAT = 'text'
+
+# 配置文件中的配置节: pyproject.toml 的 [tool.package_installer]
+CONFIG_SECTION = 'package_installer'
+
 # 手动模式下的import语句
 YOUR_IMPORTS = """
 """
 
 # ==================== 新增数据结构 ====================
 
-@dataclass
+class InternTable:
+    """
+    去重表：相等的对象（文件路径、导入语句文本）只保存一份，记录中直接引用这一份
+
+    表只用于构造记录时去重，清空后已有记录不受影响。每次扫描（批量分析时为每个项目）
+    和监视模式的每次更新结束后清空，长时间运行时不会无限增长。
+    """
+
+    def __init__(self):
+        self._items: Dict[Hashable, Hashable] = {}
+
+    def intern(self, item):
+        """返回与item相等的共享对象（首次出现时加入表中）"""
+        # dict.setdefault是原子操作，多线程（批量分析）同时登记时无需加锁
+        return self._items.setdefault(item, item)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# 文件路径和导入语句文本（相同的语句如 "import os" 在所有文件中只保存一份）的去重表
+_path_table = InternTable()
+_statement_table = InternTable()
+
+
+def clear_intern_tables():
+    """清空去重表（扫描结束时调用，已构造的记录不受影响）"""
+    _path_table.clear()
+    _statement_table.clear()
+
+
 class ImportInfo:
-    """单个导入语句的详细信息"""
-    package_name: str          # 包名 (如: requests)
-    import_type: str          # 导入类型: 'import' 或 'from_import'
-    import_statement: str     # 完整导入语句
-    line_number: int          # 行号
-    file_path: Path          # 文件路径
-    pip_package: str         # pip包名 (如: requests)
+    """
+    单个导入语句的详细信息
+
+    大型项目中会有数十万条记录，因此使用__slots__紧凑存储：
+    包名和pip包名使用sys.intern驻留，同一次扫描中相同的文件路径和导入语句文本只保存一份。
+    字段与构造参数保持不变。
+    """
+
+    __slots__ = ('package_name', 'import_type', 'import_statement', 'line_number', 'file_path', 'pip_package')
+
+    def __init__(self, package_name: str, import_type: str, import_statement: str,
+                 line_number: int, file_path: Path, pip_package: str):
+        self.package_name = sys.intern(package_name)          # 包名 (如: requests)
+        self.import_type = sys.intern(import_type)            # 导入类型: 'import' 或 'from_import'
+        self.import_statement = _statement_table.intern(import_statement)  # 完整导入语句
+        self.line_number = line_number                        # 行号
+        self.file_path = _path_table.intern(file_path)        # 文件路径
+        self.pip_package = sys.intern(pip_package)            # pip包名 (如: requests)
+
+    def _fields(self) -> tuple:
+        return (self.package_name, self.import_type, self.import_statement,
+                self.line_number, self.file_path, self.pip_package)
+
+    def __reduce__(self):
+        # 跨进程传递时按字段重建，在接收方的去重表中重新登记
+        return (ImportInfo, self._fields())
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None  # 与可变dataclass一致：可比较但不可哈希
+
+    def __repr__(self) -> str:
+        return ("ImportInfo(package_name={!r}, import_type={!r}, import_statement={!r}, "
+                "line_number={!r}, file_path={!r}, pip_package={!r})").format(*self._fields())
+
+
+class PackageImports(collections.abc.Sequence):
+    """
+    一个包的全部导入记录，按文件分组保存
+
+    作为只读序列使用时与原来的列表相同（按文件首次出现的顺序，文件内按添加顺序），
+    撤回一个文件时只处理该文件的记录，不再过滤整个列表。
+    """
+
+    __slots__ = ('_by_file', '_count')
+
+    def __init__(self):
+        self._by_file: Dict[Path, List[ImportInfo]] = {}
+        self._count = 0
+
+    def append(self, import_info: ImportInfo):
+        """添加一条记录"""
+        self._by_file.setdefault(import_info.file_path, []).append(import_info)
+        self._count += 1
+
+    def remove_file(self, file_path: Path) -> int:
+        """撤回一个文件的记录，返回撤回的条数"""
+        removed = self._by_file.pop(file_path, ())
+        self._count -= len(removed)
+        return len(removed)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[ImportInfo]:
+        for imports in self._by_file.values():
+            yield from imports
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index == 0 and self._count:
+            # 最常见的用法（取pip包名）无需展开全部记录
+            return next(iter(self._by_file.values()))[0]
+        return list(self)[index]
+
+    def __repr__(self) -> str:
+        return f"PackageImports({list(self)!r})"
+
 
 class PackageTracker:
-    """包依赖追踪器 - 核心改进类"""
+    """
+    包依赖追踪器 - 核心改进类
+
+    第三方包集合、每个包的文件/导入计数在add_import时增量维护，
+    统计查询不再遍历全部导入记录，生成大型项目的报告时保持线性耗时。
+    """
     def __init__(self):
-        self.package_imports: Dict[str, List[ImportInfo]] = {}  # 包名 -> 导入信息列表
+        self.package_imports: Dict[str, PackageImports] = {}  # 包名 -> 导入信息（按文件分组）
         self.file_imports: Dict[Path, List[ImportInfo]] = {}    # 文件 -> 导入信息列表
         self.all_packages: Set[str] = set()                    # 所有发现的包名
+        self.third_party_packages: Set[str] = set()            # 第三方包名（排除标准库）
+        self.package_file_counts: Dict[str, Dict[Path, int]] = {}  # 第三方包名 -> {文件: 导入数}
+        self.file_third_party_counts: Dict[Path, int] = {}     # 文件 -> 第三方导入数（只包含大于0的文件）
+        self.third_party_import_count = 0                      # 第三方导入语句总数
     
     def add_import(self, import_info: ImportInfo):
         """添加导入信息到追踪器"""
+        package_name = import_info.package_name
+        file_path = import_info.file_path
+        
         # 添加到包映射
-        if import_info.package_name not in self.package_imports:
-            self.package_imports[import_info.package_name] = []
-        self.package_imports[import_info.package_name].append(import_info)
+        if package_name not in self.package_imports:
+            self.package_imports[package_name] = PackageImports()
+        self.package_imports[package_name].append(import_info)
         
         # 添加到文件映射
-        if import_info.file_path not in self.file_imports:
-            self.file_imports[import_info.file_path] = []
-        self.file_imports[import_info.file_path].append(import_info)
+        if file_path not in self.file_imports:
+            self.file_imports[file_path] = []
+        self.file_imports[file_path].append(import_info)
         
         # 添加到包集合
-        self.all_packages.add(import_info.package_name)
+        if package_name not in self.all_packages:
+            self.all_packages.add(package_name)
+            if package_name not in STDLIB:
+                self.third_party_packages.add(package_name)
+        
+        # 更新第三方包的统计
+        if package_name in self.third_party_packages:
+            file_counts = self.package_file_counts.setdefault(package_name, {})
+            file_counts[file_path] = file_counts.get(file_path, 0) + 1
+            self.file_third_party_counts[file_path] = self.file_third_party_counts.get(file_path, 0) + 1
+            self.third_party_import_count += 1
+    
+    def remove_file(self, file_path: Path) -> List[ImportInfo]:
+        """
+        撤回一个文件的全部导入记录并更新各项统计（文件变化或删除时使用）
+
+        Returns:
+            被移除的导入记录（文件不在追踪器中时返回空列表）
+        """
+        imports = self.file_imports.pop(file_path, None)
+        if not imports:
+            return []
+        
+        for package_name in {imp.package_name for imp in imports}:
+            package_imports = self.package_imports[package_name]
+            removed_count = package_imports.remove_file(file_path)
+            
+            if package_name in self.third_party_packages:
+                self.third_party_import_count -= removed_count
+                self.package_file_counts[package_name].pop(file_path, None)
+            
+            if not package_imports:
+                # 包不再被任何文件使用
+                del self.package_imports[package_name]
+                self.all_packages.discard(package_name)
+                self.third_party_packages.discard(package_name)
+                self.package_file_counts.pop(package_name, None)
+        
+        self.file_third_party_counts.pop(file_path, None)
+        return imports
+    
+    def replace_file(self, file_path: Path, imports: Iterable[ImportInfo]) -> List[ImportInfo]:
+        """
+        用新的提取结果替换一个文件的导入记录（等价于remove_file后逐条add_import）
+
+        Returns:
+            被替换掉的旧记录
+        """
+        removed = self.remove_file(file_path)
+        for import_info in imports:
+            self.add_import(import_info)
+        return removed
     
     def get_third_party_packages(self) -> Set[str]:
         """获取第三方包（排除标准库）"""
-        return self.all_packages - STDLIB
+        return set(self.third_party_packages)
+    
+    def is_third_party(self, package_name: str) -> bool:
+        """包是否为第三方包"""
+        return package_name in self.third_party_packages
+    
+    def get_package_stat(self, package: str) -> Optional[Dict[str, int]]:
+        """获取单个第三方包的使用统计（不存在时返回None）"""
+        file_counts = self.package_file_counts.get(package)
+        if not file_counts:
+            return None
+        imports = self.package_imports[package]
+        return {
+            'files_count': len(file_counts),
+            'imports_count': len(imports),
+            'pip_package': imports[0].pip_package
+        }
     
     def get_package_stats(self) -> Dict[str, Dict[str, int]]:
         """获取包使用统计"""
         stats = {}
-        for package in self.get_third_party_packages():
-            if package in self.package_imports:
-                imports = self.package_imports[package]
-                if not imports:  # 安全检查：防止空列表
-                    continue
-                files_count = len(set(imp.file_path for imp in imports))
-                stats[package] = {
-                    'files_count': files_count,
-                    'imports_count': len(imports),
-                    'pip_package': imports[0].pip_package
-                }
+        for package in self.third_party_packages:
+            stat = self.get_package_stat(package)
+            if stat is not None:
+                stats[package] = stat
         return stats
+    
+    @property
+    def third_party_file_count(self) -> int:
+        """包含第三方导入的文件数"""
+        return len(self.file_third_party_counts)
 
 # ==================== 核心代码 ====================
 
@@ -176,6 +469,12 @@ PACKAGE_PATTERNS = [
     # (r'^another_pattern', 'another-package'),
 ]
 
+# 随工具发布的 模块名 -> 发行包名 映射数据库 (None=不使用)
+# 按模块名排序的TSV文件，只收录两者不同的条目；首次查找时才读取，二分查找定位。
+# 查找顺序: PACKAGE_MAPPING → PACKAGE_PATTERNS → 映射数据库 → 原名称
+# 由 build_mapping_db.py 从固定版本的语料 mapping_corpus.txt 生成（也可以从本地已安装的发行包或wheel文件生成）
+PACKAGE_MAPPING_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'package_mapping.tsv')
+
 # 包的特殊处理配置
 # 定义需要特殊处理的包（后处理步骤、验证方式等）
 # 
@@ -217,28 +516,212 @@ PACKAGE_SPECIAL_HANDLING = {
     # },
 }
 
+# ==================== 预编译的正则表达式 ====================
+# 所有固定的正则在模块导入时编译一次，逐行提取时不再经过re模块的模式缓存查找
+
+# import提取（extract_imports_with_details）
+_IMPORT_START_PATTERN = re.compile(r'^\s*(from|import)')
+_FROM_IMPORT_PATTERN = re.compile(r'^\s*from\s+([a-zA-Z_.][a-zA-Z0-9_.]*)\s+import')
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+(.+)$')
+_PARENS_PATTERN = re.compile(r'[()]')
+
+# import提取（extract_imports_from_code，只匹配合法的模块名）
+_SIMPLE_FROM_PATTERN = re.compile(r'^\s*from\s+([a-zA-Z_][a-zA-Z0-9_.]*)\s+import\s+')
+_SIMPLE_IMPORT_PATTERN = re.compile(r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_.]+(?:\s*,\s*[a-zA-Z_][a-zA-Z0-9_.]+)*)')
+
+# 包名处理
+_LEADING_DIGITS_PATTERN = re.compile(r'^\d+')
+_PYPI_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9._-]+$')
+_DISTRIBUTION_SEPARATORS_PATTERN = re.compile(r'[-_.]+')
+
+# 单独的\r换行（旧Mac格式）：字节级行号无法与文本模式一致，这类文件改为完整读取
+_BARE_CR_PATTERN = re.compile(rb'\r(?!\n)')
+
+
+def _strip_comment(line: str) -> str:
+    """移除行末注释（等价于 re.sub(r'#.*$', '', line)，行内不含换行符）"""
+    return line.partition('#')[0]
+
+
+class PackagePatternMatcher:
+    """
+    PACKAGE_PATTERNS 的编译结果：所有模式合并为一个按顺序尝试的交替正则，
+    一次匹配即可得到第一个匹配的模式（与逐个 re.match 的结果相同）
+
+    含捕获组的模式（合并后反向引用编号会变化）或无法合并的模式改为逐个编译匹配。
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self.source = list(patterns)
+        self.pip_names = [pip_name for _, pip_name in self.source]
+        self.combined = None
+        self.compiled = [re.compile(pattern) for pattern, _ in self.source]
+        if self.compiled and not any(compiled.groups for compiled in self.compiled):
+            try:
+                self.combined = re.compile('|'.join(f'(?P<p{index}>{pattern})'
+                                                    for index, (pattern, _) in enumerate(self.source)))
+            except re.error:
+                self.combined = None
+
+    def match(self, name: str) -> Optional[str]:
+        """返回第一个匹配的模式对应的pip包名"""
+        if self.combined is not None:
+            found = self.combined.match(name)
+            return self.pip_names[int(found.lastgroup[1:])] if found else None
+        for compiled, pip_name in zip(self.compiled, self.pip_names):
+            if compiled.match(name):
+                return pip_name
+        return None
+
+
+_package_pattern_matcher: Optional[PackagePatternMatcher] = None
+
+
+def get_package_pattern_matcher() -> PackagePatternMatcher:
+    """获取PACKAGE_PATTERNS的编译结果（PACKAGE_PATTERNS被替换或修改后自动重新编译）"""
+    global _package_pattern_matcher
+    if _package_pattern_matcher is None or _package_pattern_matcher.source != PACKAGE_PATTERNS:
+        _package_pattern_matcher = PackagePatternMatcher(PACKAGE_PATTERNS)
+    return _package_pattern_matcher
+
+
+class PackageMappingDatabase:
+    """
+    模块名 -> 发行包名 映射数据库
+
+    文件格式: 每行 "模块名\t发行包名"，按模块名的UTF-8字节排序；'#'开头的注释行排在最前面。
+    首次查找时一次性读入字节，之后在字节串上按行二分查找（O(log n)），不解析整个文件。
+    文件不存在或无法读取时视为空数据库。
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._data: Optional[bytes] = None
+
+    def _load(self) -> bytes:
+        """首次使用时读取文件"""
+        if self._data is None:
+            try:
+                self._data = Path(self.path).read_bytes() if self.path else b''
+            except OSError:
+                self._data = b''
+        return self._data
+
+    def lookup(self, module_name: str) -> Optional[str]:
+        """查找模块对应的发行包名，未收录时返回None"""
+        data = self._load()
+        key = module_name.encode('utf-8')
+        low, high = 0, len(data)
+        # 不变量: low 总是某一行的起始位置，目标行（如果存在）位于 [low, high) 内
+        while low < high:
+            mid = (low + high) // 2
+            start = data.rfind(b'\n', low, mid) + 1 or low
+            end = data.find(b'\n', start)
+            if end < 0:
+                end = len(data)
+            name, _, pip_name = data[start:end].rstrip(b'\r').partition(b'\t')
+            if name < key:
+                low = end + 1
+            elif name > key:
+                high = start
+            else:
+                return pip_name.decode('utf-8') or None
+        return None
+
+
+_mapping_database: Optional[PackageMappingDatabase] = None
+
+
+def get_mapping_database() -> PackageMappingDatabase:
+    """获取映射数据库（PACKAGE_MAPPING_DB变化后重新打开，文件在首次查找时读取）"""
+    global _mapping_database
+    if _mapping_database is None or _mapping_database.path != PACKAGE_MAPPING_DB:
+        _mapping_database = PackageMappingDatabase(PACKAGE_MAPPING_DB)
+    return _mapping_database
+
+
+class PackageNameResolver:
+    """
+    模块名 → pip包名的解析缓存
+
+    直接映射、模式匹配、映射数据库和默认原名称的结果都按模块名缓存；refresh() 发现
+    PACKAGE_MAPPING / PACKAGE_PATTERNS / PACKAGE_MAPPING_DB 与上次快照不同（被替换或原地修改）时清空缓存。
+    resolve() 不检查映射变化，调用方在一批查找之前（如每个文件）调用一次 refresh()。
+    多线程共享时计数可能略有偏差，不影响解析结果。
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, str] = {}
+        self._mapping: Optional[Dict[str, str]] = None
+        self._patterns: Optional[List[Tuple[str, str]]] = None
+        self._matcher: Optional[PackagePatternMatcher] = None
+        self._database: Optional[PackageMappingDatabase] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def refresh(self) -> 'PackageNameResolver':
+        """映射配置变化时清空缓存"""
+        if (self._mapping != PACKAGE_MAPPING or self._patterns != PACKAGE_PATTERNS
+                or self._database is None or self._database.path != PACKAGE_MAPPING_DB):
+            if self._mapping is not None:
+                self.invalidations += 1
+            self._mapping = dict(PACKAGE_MAPPING)
+            self._patterns = list(PACKAGE_PATTERNS)
+            self._matcher = get_package_pattern_matcher()
+            self._database = get_mapping_database()
+            self._cache.clear()
+        return self
+
+    def resolve(self, import_name: str) -> str:
+        """解析一个非空模块名"""
+        pip_name = self._cache.get(import_name)
+        if pip_name is not None:
+            self.hits += 1
+            return pip_name
+        self.misses += 1
+        # 首先检查直接映射，其次模式匹配（所有模式合并为一次匹配）和映射数据库，默认返回原名称
+        pip_name = self._mapping.get(import_name)
+        if pip_name is None:
+            pip_name = self._matcher.match(import_name)
+        if pip_name is None:
+            pip_name = self._database.lookup(import_name)
+        if pip_name is None:
+            pip_name = import_name
+        self._cache[import_name] = pip_name
+        return pip_name
+
+    def counts(self) -> Tuple[int, int]:
+        """返回累计的 (命中数, 未命中数)"""
+        return self.hits, self.misses
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache),
+                'invalidations': self.invalidations}
+
+
+_package_name_resolver = PackageNameResolver()
+
+
+def get_package_name_resolver() -> PackageNameResolver:
+    """获取包名解析缓存（已按当前映射配置刷新）"""
+    return _package_name_resolver.refresh()
+
+
 def get_pip_package_name(import_name: str) -> str:
     """
-    获取pip包名，支持多种查找方式：
+    获取pip包名，支持多种查找方式（结果按模块名缓存）：
     1. 直接映射（PACKAGE_MAPPING）
     2. 模式匹配（PACKAGE_PATTERNS）
-    3. 默认返回原名称
+    3. 映射数据库（PACKAGE_MAPPING_DB）
+    4. 默认返回原名称
     """
     # 安全检查：空字符串或None
     if not import_name or not import_name.strip():
         return import_name or ""
     
-    # 首先检查直接映射
-    if import_name in PACKAGE_MAPPING:
-        return PACKAGE_MAPPING[import_name]
-    
-    # 检查模式匹配
-    for pattern, pip_name in PACKAGE_PATTERNS:
-        if re.match(pattern, import_name):
-            return pip_name
-    
-    # 默认返回原名称
-    return import_name
+    return get_package_name_resolver().resolve(import_name)
 
 
 def generate_package_name_variants(package_name: str) -> List[str]:
@@ -266,8 +749,8 @@ def generate_package_name_variants(package_name: str) -> List[str]:
         variants.append(package_name.replace('-', '_'))
     
     # 移除数字前缀（如 2to3 -> to3）
-    if re.match(r'^\d+', package_name):
-        variants.append(re.sub(r'^\d+', '', package_name))
+    if _LEADING_DIGITS_PATTERN.match(package_name):
+        variants.append(_LEADING_DIGITS_PATTERN.sub('', package_name))
     
     # 添加常见后缀
     for suffix in ['-python', '-py', '']:
@@ -286,53 +769,330 @@ def generate_package_name_variants(package_name: str) -> List[str]:
     return result
 
 
-def search_pypi_package(module_name: str) -> Optional[str]:
+# 网络错误或索引异常（区别于明确的404"不存在"，不能作为否定结果缓存）
+_UNREACHABLE = object()
+
+
+class PyPIConnectionPool:
     """
-    在PyPI上搜索包名，尝试找到正确的pip包名
-    使用PyPI JSON API: https://pypi.org/pypi/{package_name}/json
+    PyPI JSON API的长连接池
+
+    每个线程持有自己的keep-alive连接（http.client连接不是线程安全的），
+    同一线程内的多次查询复用同一个TCP/TLS连接，避免每次查询重新握手。
     """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        parsed = urllib.parse.urlsplit(base_url or PYPI_JSON_URL)
+        self.scheme = parsed.scheme or 'https'
+        self.netloc = parsed.netloc
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = PYPI_TIMEOUT if timeout is None else timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def _connection(self) -> http.client.HTTPConnection:
+        """获取当前线程的连接（不存在时新建）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = conn_class(self.netloc, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self):
+        """关闭当前线程的连接（出错后下次查询重新建立）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_json(self, path: str):
+        """
+        GET请求并解析JSON；404返回None，网络错误或其他异常响应返回_UNREACHABLE
+
+        服务端关闭了空闲长连接时自动重连一次；同主机的重定向（如名称规范化）会被跟随。
+        超时不重试（每次查询最多等待一个timeout）；跨主机的重定向无法确认包是否存在，
+        也按不可达处理，不会被当作"不存在"写入否定缓存。
+        """
+        url_path = self.base_path + path
+        for _ in range(3):
+            try:
+                conn = self._connection()
+                conn.request('GET', url_path, headers={'Accept': 'application/json'})
+                response = conn.getresponse()
+                body = response.read()
+            except (socket.timeout, TimeoutError):
+                self._drop_connection()
+                return _UNREACHABLE
+            except (http.client.HTTPException, OSError):
+                self._drop_connection()
+                continue
+            
+            if response.status in (301, 302, 307, 308):
+                location = urllib.parse.urlsplit(response.getheader('Location') or '')
+                if location.netloc and location.netloc != self.netloc:
+                    return _UNREACHABLE
+                url_path = location.path
+                continue
+            if response.status == 404:
+                return None
+            if response.status != 200:
+                return _UNREACHABLE
+            try:
+                return json.loads(body)
+            except ValueError:
+                return _UNREACHABLE
+        return _UNREACHABLE
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class PyPICache:
+    """
+    模块名 -> 发行包名 查询结果的持久化缓存
+
+    同时记录找到的结果和"不存在"的否定结果，分别有各自的有效期；
+    条目数超过上限时淘汰最久未使用的条目（LRU）。
+    cache_file为None时只在进程内缓存。
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Optional[str] = None, ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.ttl = PYPI_CACHE_TTL if ttl is None else ttl
+        self.negative_ttl = PYPI_CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self.max_entries = PYPI_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.entries: 'OrderedDict[str, Tuple[Optional[str], float]]' = OrderedDict()  # 键 -> (包名, 写入时间)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def make_key(kind: str, module_name: str, base_url: str = '') -> str:
+        """构造缓存键（kind: 'pypi'=索引查询, 'install'=变体安装结果）"""
+        return f"{kind}|{base_url}|{module_name}"
+
+    def _load(self):
+        """从磁盘加载缓存（文件不存在或损坏时从空缓存开始）"""
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return
+            for key, name, stored_at in data.get('entries', []):
+                self.entries[key] = (name, float(stored_at))
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.entries.clear()
+
+    def get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """
+        查询缓存
+
+        Returns:
+            (是否命中, 包名)；命中否定结果时返回 (True, None)
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                name, stored_at = entry
+                ttl = self.ttl if name is not None else self.negative_ttl
+                if time.time() - stored_at <= ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, name
+                del self.entries[key]
+                self._dirty = True
+            self.misses += 1
+            return False, None
+
+    def set(self, key: str, name: Optional[str]):
+        """写入结果（name为None表示确认不存在），超出上限时淘汰最久未使用的条目"""
+        with self._lock:
+            self.entries[key] = (name, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > max(0, self.max_entries):
+                self.entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self):
+        """写回磁盘（按LRU顺序保存，先写临时文件再替换）"""
+        if self.cache_file is None or not self._dirty:
+            return
+        with self._lock:
+            data = {'version': self.VERSION,
+                    'entries': [[key, name, stored_at] for key, (name, stored_at) in self.entries.items()]}
+            self._dirty = False
+        tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except (PermissionError, OSError) as e:
+            print_colored(f"   ⚠️  无法写入PyPI缓存: {e}", "yellow")
+
+
+_pypi_cache: Optional[PyPICache] = None
+
+
+def get_pypi_cache() -> PyPICache:
+    """获取进程共享的PyPI查询缓存（首次调用时按PYPI_CACHE_FILE加载）"""
+    global _pypi_cache
+    if _pypi_cache is None:
+        _pypi_cache = PyPICache(PYPI_CACHE_FILE)
+    return _pypi_cache
+
+
+def _is_valid_pypi_query(module_name: str) -> bool:
+    """检查模块名是否可以安全地用于PyPI查询"""
     # 安全检查：空字符串或None
     if not module_name or not module_name.strip():
-        return None
-    
+        return False
     # 验证包名只包含安全字符（字母、数字、连字符、下划线、点）
     # 这是 PEP 508 规定的包名规范
-    if not re.match(r'^[a-zA-Z0-9._-]+$', module_name):
-        return None
+    return bool(_PYPI_NAME_PATTERN.match(module_name))
+
+
+def resolve_pypi_names(module_names: Iterable[str], base_url: Optional[str] = None,
+                       max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """
+    并发查询PyPI，为多个模块找到对应的pip包名
+
+    所有模块的所有名称变体（每个模块最多5个）同时查询，通过长连接池复用连接；
+    每个模块按变体优先级返回第一个存在的项目名。
+
+    Args:
+        module_names: 要查询的模块名
+        base_url: PyPI JSON API地址（None=使用PYPI_JSON_URL，可指向本地测试索引）
+        max_workers: 并发线程数（None=使用PYPI_MAX_WORKERS）
+
+    Returns:
+        模块名 -> pip包名（未找到或名称无效时为None）
+    """
+    base_url = base_url or PYPI_JSON_URL
+    cache = get_pypi_cache()
+    results: Dict[str, Optional[str]] = {}
+    probes: Dict[str, List[str]] = {}
+    for module_name in module_names:
+        if module_name in results or module_name in probes:
+            continue
+        if not _is_valid_pypi_query(module_name):
+            results[module_name] = None
+            continue
+        cached, name = cache.get(PyPICache.make_key('pypi', module_name, base_url))
+        if cached:
+            results[module_name] = name
+        else:
+            probes[module_name] = generate_package_name_variants(module_name)[:5]  # 限制尝试次数
     
-    # 尝试直接搜索模块名
-    variants = generate_package_name_variants(module_name)
+    if not probes:
+        return results
     
-    if not variants:
+    variants = sorted({variant for names in probes.values() for variant in names})
+    pool = PyPIConnectionPool(base_url)
+    
+    def lookup(variant: str):
+        # PyPI包名只包含安全字符，不需要URL编码
+        data = pool.get_json(f"/{variant}/json")
+        if data is _UNREACHABLE:
+            return _UNREACHABLE
+        if data and 'info' in data and 'name' in data['info']:
+            return data['info']['name']
         return None
     
-    for variant in variants[:5]:  # 限制尝试次数
-        try:
-            # PyPI包名只包含安全字符，不需要URL编码
-            url = f"https://pypi.org/pypi/{variant}/json"
-            with urllib.request.urlopen(url, timeout=5) as response:
-                data = json.loads(response.read())
-                # 如果找到了包，返回包名
-                if 'info' in data and 'name' in data['info']:
-                    return data['info']['name']
-        except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError, json.JSONDecodeError):
-            continue
+    try:
+        workers = max(1, min(max_workers or PYPI_MAX_WORKERS, len(variants)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            found = dict(zip(variants, executor.map(lookup, variants)))
+    finally:
+        pool.close()
     
-    return None
+    for module_name, names in probes.items():
+        match = None
+        definitive = True  # 优先级更高的变体都得到了明确答复
+        for variant in names:
+            value = found[variant]
+            if value is _UNREACHABLE:
+                definitive = False
+                continue
+            if value:
+                match = value
+                break
+        results[module_name] = match
+        if definitive:
+            # 网络故障导致的"未找到"不写入缓存，避免污染否定结果
+            cache.set(PyPICache.make_key('pypi', module_name, base_url), match)
+    cache.save()
+    return results
+
+
+def search_pypi_package(module_name: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    在PyPI上搜索包名，尝试找到正确的pip包名
+    使用PyPI JSON API: https://pypi.org/pypi/{package_name}/json
+    （各名称变体并发查询，见resolve_pypi_names）
+    """
+    if not _is_valid_pypi_query(module_name):
+        return None
+    return resolve_pypi_names([module_name], base_url).get(module_name)
 
 
 def try_install_with_variants(package_name: str, original_pip_name: str) -> Tuple[bool, str, Optional[str]]:
     """
     尝试使用变体名称安装包
     返回: (是否成功, 消息, 实际使用的pip包名)
+
+    探测结果会写入PyPI缓存：成功的包名下次直接使用，确认找不到的模块在有效期内不再重复探测。
     """
+    cache = get_pypi_cache()
+    install_key = PyPICache.make_key('install', package_name)
+    
+    def remember(pip_name: Optional[str]):
+        cache.set(install_key, pip_name)
+        cache.save()
+    
+    # 先使用之前运行中探测到的结果
+    cached, cached_name = cache.get(install_key)
+    if cached:
+        if cached_name is None:
+            return False, f"安装失败: 未找到匹配的包（缓存结果，已尝试: {original_pip_name}）", None
+        if cached_name == original_pip_name:
+            # 之前探测到的就是刚刚安装失败的包名，其他变体不会更好，不再重复探测
+            return False, f"安装失败: 未找到匹配的包（缓存结果即已尝试的 {original_pip_name}）", None
+        is_success, msg, actual_name = install_package(package_name, cached_name, auto_retry=False)
+        if is_success:
+            return True, f"安装成功（缓存结果: {cached_name}）", actual_name or cached_name
+    
     # 如果原始名称就是映射后的名称，先尝试模式匹配
     suggested_name = get_pip_package_name(package_name)
     if suggested_name != original_pip_name:
         is_success, msg, actual_name = install_package(package_name, suggested_name, auto_retry=False)
         if is_success:
+            remember(actual_name or suggested_name)
             return True, f"安装成功（使用映射: {suggested_name}）", actual_name or suggested_name
     
+    # PACKAGE_MAPPING/PACKAGE_PATTERNS覆盖了映射数据库的结果时，再尝试数据库中的发行包名
+    database_name = get_mapping_database().lookup(package_name)
+    if database_name and database_name not in (original_pip_name, suggested_name):
+        is_success, msg, actual_name = install_package(package_name, database_name, auto_retry=False)
+        if is_success:
+            remember(actual_name or database_name)
+            return True, f"安装成功（映射数据库: {database_name}）", actual_name or database_name
+    
     # 生成变体并尝试
     variants = generate_package_name_variants(package_name)
     
@@ -342,6 +1102,7 @@ def try_install_with_variants(package_name: str, original_pip_name: str) -> Tupl
         
         is_success, msg, actual_name = install_package(package_name, variant, auto_retry=False)
         if is_success:
+            remember(actual_name or variant)
             return True, f"安装成功（尝试变体: {variant}）", actual_name or variant
     
     # 尝试PyPI搜索
@@ -349,8 +1110,13 @@ def try_install_with_variants(package_name: str, original_pip_name: str) -> Tupl
     if pypi_name and pypi_name != original_pip_name:
         is_success, msg, actual_name = install_package(package_name, pypi_name, auto_retry=False)
         if is_success:
+            remember(actual_name or pypi_name)
             return True, f"安装成功（PyPI找到: {pypi_name}）", actual_name or pypi_name
     
+    # 只有PyPI明确答复"不存在"时才记录否定结果（网络故障不记录）
+    if pypi_name is None and cache.get(PyPICache.make_key('pypi', package_name, PYPI_JSON_URL)) == (True, None):
+        remember(None)
+    
     return False, f"安装失败: 未找到匹配的包（已尝试: {original_pip_name}）", None
 
 
@@ -402,55 +1168,263 @@ def _get_stdlib():
 STDLIB = _get_stdlib()
 
 
-def scan_python_files(root_path: str, scan_subdirs: bool = True) -> List[Path]:
-    """扫描指定路径下的所有Python文件"""
+class StageProfiler:
+    """
+    按阶段累计墙钟时间、CPU时间和处理条目数
+
+    阶段: discover(发现文件) → read(读取) → extract(提取import) → stdlib_filter(过滤标准库)
+    → installed_check(已安装检查) → local_check(本地模块检查) → install(pip安装)
+    → verify(导入验证) → write(生成requirements)。
+    并行提取时，read/extract为各工作进程时间之和。
+    """
+
+    STAGES = ('discover', 'read', 'extract', 'stdlib_filter', 'installed_check',
+              'local_check', 'install', 'verify', 'write')
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.started_at = datetime.now()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._lock = threading.Lock()  # 多项目批量扫描时各线程共享同一个计时器
+        self.encodings: Dict[str, int] = {}       # 解码使用的编码 → 文件数
+        self.file_encodings: Dict[str, str] = {}  # 未按普通UTF-8解码的文件 → 实际使用的编码
+        self.name_cache = {'hits': 0, 'misses': 0}  # 其他进程合并来的包名解析缓存计数
+        self._name_cache_baseline = _package_name_resolver.counts()
+
+    def add(self, name: str, wall: float, cpu: float, items: int = 0, calls: int = 1):
+        """累加一个阶段的耗时和条目数"""
+        with self._lock:
+            record = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0, 'calls': 0})
+            record['wall_seconds'] += wall
+            record['cpu_seconds'] += cpu
+            record['items'] += items
+            record['calls'] += calls
+
+    def count(self, name: str, items: int):
+        """只累加条目数（耗时另行计入）"""
+        self.add(name, 0.0, 0.0, items, calls=0)
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        """测量with块的耗时并计入指定阶段"""
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_wall, time.process_time() - start_cpu, items)
+
+    def record_encoding(self, file_path: Path, encoding: Optional[str]):
+        """记录一个文件解码时使用的编码（None表示无法解码；带BOM的UTF-8计为utf-8）"""
+        encoding = encoding or 'unknown'
+        if encoding in ('utf-8-sig', 'utf8'):
+            encoding = 'utf-8'
+        with self._lock:
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+            if encoding != 'utf-8':
+                self.file_encodings[str(file_path)] = encoding
+
+    def name_cache_counts(self) -> Dict[str, int]:
+        """本次运行的包名解析缓存命中/未命中数（当前进程计数 + 合并来的计数）"""
+        hits, misses = _package_name_resolver.counts()
+        return {'hits': hits - self._name_cache_baseline[0] + self.name_cache['hits'],
+                'misses': misses - self._name_cache_baseline[1] + self.name_cache['misses']}
+
+    def merge(self, stages: Dict[str, Dict[str, float]], encodings: Optional[Dict[str, int]] = None,
+              file_encodings: Optional[Dict[str, str]] = None, name_cache: Optional[Dict[str, int]] = None):
+        """合并其他进程记录的阶段数据、编码统计和包名解析缓存计数"""
+        for name, record in stages.items():
+            self.add(name, record['wall_seconds'], record['cpu_seconds'], record['items'], record['calls'])
+        with self._lock:
+            for encoding, count in (encodings or {}).items():
+                self.encodings[encoding] = self.encodings.get(encoding, 0) + count
+            self.file_encodings.update(file_encodings or {})
+            for key, count in (name_cache or {}).items():
+                self.name_cache[key] += count
+
+    def report(self) -> Dict:
+        """生成可序列化的报告（阶段按流水线顺序排列）"""
+        order = {name: index for index, name in enumerate(self.STAGES)}
+        return {
+            'version': 1,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total': {'wall_seconds': time.perf_counter() - self._start_wall,
+                      'cpu_seconds': time.process_time() - self._start_cpu},
+            'stages': {name: dict(self.stages[name])
+                       for name in sorted(self.stages, key=lambda n: order.get(n, len(order)))},
+            'encodings': dict(self.encodings),
+            'non_utf8_files': dict(self.file_encodings),
+            'package_name_cache': self.name_cache_counts(),
+        }
+
+    def write_report(self, report_file: str):
+        """将报告写入JSON文件"""
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+
+
+_profiler = StageProfiler()
+
+
+def get_profiler() -> StageProfiler:
+    """获取当前运行的阶段计时器"""
+    return _profiler
+
+
+def reset_profiler() -> StageProfiler:
+    """开始新的一次运行计时"""
+    global _profiler
+    _profiler = StageProfiler()
+    return _profiler
+
+
+@dataclass
+class ScanStats:
+    """文件扫描统计"""
+    dirs_scanned: int = 0       # 遍历过的目录数
+    dirs_pruned: int = 0        # 命中EXCLUDE_DIRS而未进入的目录数
+    files_excluded: int = 0     # 命中EXCLUDE_FILES/EXCLUDE_FILE_PATTERNS的.py文件数
+    other_entries: int = 0      # 非.py文件、符号链接目录等其他跳过的条目数
+    errors: int = 0             # 无权限等访问错误数
+    
+    @property
+    def skipped(self) -> int:
+        """跳过的条目总数"""
+        return self.dirs_pruned + self.files_excluded + self.other_entries + self.errors
+
+
+def _is_excluded_file(name: str) -> bool:
+    """检查文件名是否命中EXCLUDE_FILES(精确匹配)或EXCLUDE_FILE_PATTERNS(模糊匹配)"""
+    if name in EXCLUDE_FILES:
+        return True
+    lower_name = name.lower()
+    return any(pattern in lower_name for pattern in EXCLUDE_FILE_PATTERNS)
+
+
+def iter_python_files(root_path: str, scan_subdirs: bool = True,
+                      stats: Optional[ScanStats] = None) -> Iterator[Path]:
+    """
+    惰性遍历指定路径下的所有Python文件
+
+    基于os.scandir实现：命中EXCLUDE_DIRS的目录在进入之前就被剪枝，
+    不会再遍历或stat其中的任何条目（如.venv、node_modules、.git）。
+    每个目录内的条目按名称排序，产出顺序与scan_python_files的排序结果一致。
+    符号链接目录不会被跟随，避免循环。
+
+    Args:
+        root_path: 扫描根目录
+        scan_subdirs: 是否递归扫描子目录
+        stats: 可选的统计对象，遍历过程中累计跳过的条目数
+    """
+    if stats is None:
+        stats = ScanStats()
+    
+    root = Path(root_path)
     try:
-        root = Path(root_path)
         if not root.exists():
             print_colored(f"   ⚠️  路径不存在: {root_path}", "yellow")
-            return []
+            return
         
         if not root.is_dir():
             print_colored(f"   ⚠️  路径不是目录: {root_path}", "yellow")
-            return []
+            return
+    except (PermissionError, OSError) as e:
+        print_colored(f"   ⚠️  扫描路径时出错: {e}", "yellow")
+        return
+    
+    # 栈中同时保存待产出的文件(True)和待展开的目录(False)，按名称逆序入栈即可按序出栈
+    stack = [(root, False)]
+    while stack:
+        path, is_file = stack.pop()
+        if is_file:
+            yield path
+            continue
         
-        py_files = []
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except (PermissionError, OSError):
+            # 跳过无权限访问的目录
+            stats.errors += 1
+            continue
+        stats.dirs_scanned += 1
         
-        if scan_subdirs:
-            for path in root.rglob("*.py"):
-                try:
-                    # 检查是否在排除的目录中（精确匹配路径部分）
-                    if any(excluded in path.parts for excluded in EXCLUDE_DIRS):
-                        continue
-                    # 检查是否是排除的文件(精确匹配)
-                    if path.name in EXCLUDE_FILES:
-                        continue
-                    # 检查是否匹配排除模式(模糊匹配)
-                    if any(pattern in path.name.lower() for pattern in EXCLUDE_FILE_PATTERNS):
-                        continue
-                    py_files.append(path)
-                except (PermissionError, OSError):
-                    # 跳过无权限访问的文件
+        children = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not scan_subdirs:
+                        stats.other_entries += 1
+                    elif entry.name in EXCLUDE_DIRS:
+                        # 剪枝：不进入排除的目录
+                        stats.dirs_pruned += 1
+                    else:
+                        children.append((path / entry.name, False))
                     continue
-        else:
-            for path in root.glob("*.py"):
-                try:
-                    if path.name in EXCLUDE_FILES:
-                        continue
-                    if any(pattern in path.name.lower() for pattern in EXCLUDE_FILE_PATTERNS):
-                        continue
-                    py_files.append(path)
-                except (PermissionError, OSError):
+                
+                if not os.path.normcase(entry.name).endswith('.py') or not entry.is_file():
+                    stats.other_entries += 1
                     continue
+                
+                if _is_excluded_file(entry.name):
+                    stats.files_excluded += 1
+                    continue
+            except (PermissionError, OSError):
+                stats.errors += 1
+                continue
+            children.append((path / entry.name, True))
         
-        return sorted(py_files)
-    except Exception as e:
-        print_colored(f"   ⚠️  扫描路径时出错: {e}", "yellow")
-        return []
+        stack.extend(reversed(children))
+
+
+def scan_python_files(root_path: str, scan_subdirs: bool = True,
+                      stats: Optional[ScanStats] = None) -> List[Path]:
+    """扫描指定路径下的所有Python文件（返回排序后的列表）"""
+    return sorted(iter_python_files(root_path, scan_subdirs, stats))
 
 
-def read_file_safely(file_path: Path) -> str:
-    """安全读取文件内容"""
+# 按顺序尝试的候选编码（BOM和PEP 263编码声明优先于这些编码）
+SOURCE_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'latin-1']
+
+
+def decode_source(data: bytes) -> Tuple[str, Optional[str]]:
+    """
+    在内存中解码源文件字节
+
+    先使用BOM和PEP 263编码声明确定的编码（与 tokenize.detect_encoding 规则相同），
+    失败时依次尝试 SOURCE_ENCODINGS；换行符按文本模式读取的方式统一为\\n
+
+    Returns:
+        (文本, 使用的编码)，所有编码都失败时返回 ("", None)
+    """
+    candidates = []
+    try:
+        declared, _ = tokenize.detect_encoding(io.BytesIO(data).readline)
+        candidates.append(declared)
+    except (SyntaxError, LookupError):
+        pass  # 编码声明无效或与BOM冲突，按候选编码尝试
+    
+    for encoding in dict.fromkeys(candidates + SOURCE_ENCODINGS):
+        try:
+            text = data.decode(encoding)
+        except (UnicodeError, LookupError):
+            continue
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text, encoding
+    return "", None
+
+
+def read_file_safely(file_path: Path, skip_without_imports: bool = False,
+                     on_bytes: Optional[Callable[[bytes], None]] = None) -> str:
+    """
+    安全读取文件内容（只读取一次字节，在内存中解码，使用的编码计入运行统计）
+
+    skip_without_imports=True 时先在已读取的字节中查找import关键字，没有时不解码、直接返回空字符串
+    （候选编码都兼容ASCII，字节中没有该关键字的文件不可能包含import语句）。
+    on_bytes 在读取成功后以原始字节调用（如扫描缓存计算内容哈希，无需再次读取文件）。
+    """
     try:
         if not file_path.exists():
             print_colored(f"   ⚠️  文件不存在: {file_path}", "yellow")
@@ -463,41 +1437,78 @@ def read_file_safely(file_path: Path) -> str:
         print_colored(f"   ⚠️  无法访问文件: {file_path} ({e})", "yellow")
         return ""
     
-    encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
+    try:
+        data = file_path.read_bytes()
+    except (PermissionError, OSError) as e:
+        print_colored(f"   ⚠️  无法读取文件: {file_path} ({e})", "yellow")
+        return ""
     
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                return f.read()
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-        except (PermissionError, OSError) as e:
-            print_colored(f"   ⚠️  无法读取文件: {file_path} ({e})", "yellow")
-            return ""
+    if on_bytes is not None:
+        on_bytes(data)
+    if skip_without_imports and b'import' not in data:
+        return ""
     
-    # 如果所有编码都失败,返回空字符串
-    print_colored(f"   ⚠️  无法读取文件（编码问题）: {file_path}", "yellow")
-    return ""
+    text, encoding = decode_source(data)
+    get_profiler().record_encoding(file_path, encoding)
+    if encoding is None:
+        # 如果所有编码都失败,返回空字符串
+        print_colored(f"   ⚠️  无法读取文件（编码问题）: {file_path}", "yellow")
+    return text
+
+
+def file_may_contain_imports(file_path: Path) -> bool:
+    """
+    不读入文件，直接在mmap上查找import关键字（找到第一处即返回）
+
+    用于不小于MMAP_EXTRACT_MIN_BYTES的大文件（小文件在read_file_safely已读取的字节中查找，
+    避免重复打开）。候选编码（utf-8/gbk/gb2312/latin-1）都兼容ASCII，字节中没有该关键字的文件
+    不可能包含import语句；无法打开的文件返回True，交给read_file_safely报告错误
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped.find(b'import') != -1
+    except (OSError, ValueError):
+        return True
+
+
+def _import_candidate_lines(code_text: str) -> List[int]:
+    """
+    用字符串查找定位包含import关键字的行（从0开始的行号，升序）
+
+    import语句的首行一定包含该关键字，逐行扫描只需从这些行开始
+    """
+    candidates = []
+    line_index = 0
+    line_start = 0
+    pos = code_text.find('import')
+    while pos != -1:
+        line_index += code_text.count('\n', line_start, pos)
+        candidates.append(line_index)
+        line_start = code_text.find('\n', pos)
+        if line_start == -1:
+            break
+        pos = code_text.find('import', line_start)
+    return candidates
 
 
 def extract_imports_from_code(code_text: str) -> Set[str]:
     """智能提取代码中的所有import包名（保持向后兼容）"""
     packages = set()
     
-    # 移除注释
+    # 移除注释（不含import关键字的行不可能是import语句，直接跳过）
     lines = []
     for line in code_text.split('\n'):
+        if 'import' not in line:
+            continue
         # 只移除行末注释，不处理字符串
-        line = re.sub(r'#.*$', '', line)
-        lines.append(line.strip())
+        lines.append(_strip_comment(line).strip())
     
     # 使用更精确的正则表达式来匹配import语句，确保它们不在字符串中
     # 参考: https://stackoverflow.com/questions/6883049/regex-to-match-python-import-statements
-    
-    # from xxx import yyy
-    from_pattern = r'^\s*from\s+([a-zA-Z_][a-zA-Z0-9_.]*)\s+import\s+'
-    # import xxx
-    import_pattern = r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_.]+(?:\s*,\s*[a-zA-Z_][a-zA-Z0-9_.]+)*)'
+    # （_SIMPLE_FROM_PATTERN: from xxx import yyy, _SIMPLE_IMPORT_PATTERN: import xxx）
     
     for line in lines:
         if not line:
@@ -510,14 +1521,14 @@ def extract_imports_from_code(code_text: str) -> Set[str]:
             continue
             
         # 匹配 from xxx import yyy
-        from_match = re.match(from_pattern, line)
+        from_match = _SIMPLE_FROM_PATTERN.match(line)
         if from_match:
             pkg = from_match.group(1).split('.')[0]
             packages.add(pkg)
             continue
         
         # 匹配 import xxx
-        import_match = re.match(import_pattern, line)
+        import_match = _SIMPLE_IMPORT_PATTERN.match(line)
         if import_match:
             imports_str = import_match.group(1)
             for item in imports_str.split(','):
@@ -536,17 +1547,35 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
     支持多行import语句（使用括号）
     返回: ImportInfo对象列表
     """
+    candidates = _import_candidate_lines(code_text)
+    if not candidates:
+        return []
+    return _extract_imports_from_lines(code_text.split('\n'), candidates, file_path)
+
+
+def _extract_imports_from_lines(lines: Sequence[str], candidates: List[int], file_path: Path) -> List[ImportInfo]:
+    """
+    逐行提取逻辑：只从候选行（包含import关键字的行号，升序）开始匹配
+
+    lines只需支持下标、切片和len()，既可以是完整的行列表，也可以是按需解码的惰性行序列
+    """
     imports = []
-    lines = code_text.split('\n')
+    resolve_pip_name = get_package_name_resolver().resolve
     i = 0
+    candidate_index = 0
     
-    while i < len(lines):
+    while True:
+        # 直接跳到下一个包含import关键字的行（已被多行import消耗的行不会再被扫描）
+        candidate_index = bisect.bisect_left(candidates, i, candidate_index)
+        if candidate_index >= len(candidates):
+            break
+        i = candidates[candidate_index]
         line = lines[i]
         original_line = line
         line_num = i + 1
         
         # 移除行末注释但保留字符串中的内容
-        line_without_comment = re.sub(r'#.*$', '', line).strip()
+        line_without_comment = _strip_comment(line).strip()
         
         if not line_without_comment:
             i += 1
@@ -563,12 +1592,12 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
         multi_line_import = False
         if '(' in line_without_comment and ('import' in line_without_comment or 'from' in line_without_comment):
             # 检查是否是import语句且包含括号
-            if re.match(r'^\s*(from|import)', line_without_comment):
+            if _IMPORT_START_PATTERN.match(line_without_comment):
                 multi_line_import = True
         
         # 匹配 from xxx import yyy 格式（单行或多行）
         # 先检查是否是from import语句（包括相对导入）
-        from_pattern_match = re.match(r'^\s*from\s+([a-zA-Z_.][a-zA-Z0-9_.]*)\s+import', line_without_comment)
+        from_pattern_match = _FROM_IMPORT_PATTERN.match(line_without_comment)
         if from_pattern_match:
             package_name_raw = from_pattern_match.group(1)
             
@@ -585,7 +1614,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
                 paren_count = line_without_comment.count('(') - line_without_comment.count(')')
                 max_lines = len(lines)  # 防止无限循环
                 while j < max_lines and paren_count > 0:
-                    next_line = re.sub(r'#.*$', '', lines[j]).strip()
+                    next_line = _strip_comment(lines[j]).strip()
                     import_parts.append(next_line)
                     paren_count += next_line.count('(') - next_line.count(')')
                     j += 1
@@ -606,7 +1635,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
             if not package_name or package_name.strip() == '':
                 continue
             
-            pip_package = get_pip_package_name(package_name)
+            pip_package = resolve_pip_name(package_name)
             
             imports.append(ImportInfo(
                 package_name=package_name,
@@ -619,7 +1648,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
             continue
         
         # 匹配 import xxx 格式（单行或多行）
-        import_match = re.match(r'^\s*import\s+(.+)$', line_without_comment)
+        import_match = _IMPORT_PATTERN.match(line_without_comment)
         if import_match:
             # 处理多行import
             if multi_line_import and '(' in line_without_comment:
@@ -629,7 +1658,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
                 paren_count = line_without_comment.count('(') - line_without_comment.count(')')
                 max_lines = len(lines)  # 防止无限循环
                 while j < max_lines and paren_count > 0:
-                    next_line = re.sub(r'#.*$', '', lines[j]).strip()
+                    next_line = _strip_comment(lines[j]).strip()
                     import_parts.append(next_line)
                     paren_count += next_line.count('(') - next_line.count(')')
                     j += 1
@@ -638,7 +1667,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
                         break
                 full_import = ' '.join(import_parts)
                 original_line = '\n'.join(lines[i:j])
-                imports_str = re.match(r'^\s*import\s+(.+)$', full_import)
+                imports_str = _IMPORT_PATTERN.match(full_import)
                 if imports_str:
                     imports_str = imports_str.group(1)
                 else:
@@ -649,7 +1678,7 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
                 i += 1
             
             # 清理imports_str（移除括号和换行）
-            imports_str = re.sub(r'[()]', '', imports_str)
+            imports_str = _PARENS_PATTERN.sub('', imports_str)
             for item in imports_str.split(','):
                 item = item.strip()
                 if not item:
@@ -659,22 +1688,666 @@ def extract_imports_with_details(code_text: str, file_path: Path) -> List[Import
                 # 检查包名是否为空
                 if not package_name or package_name.strip() == '':
                     continue
-                
-                pip_package = get_pip_package_name(package_name)
-                
-                imports.append(ImportInfo(
-                    package_name=package_name,
-                    import_type='import',
-                    import_statement=original_line.strip(),
-                    line_number=line_num,
-                    file_path=file_path,
-                    pip_package=pip_package
-                ))
-            continue
-        
-        i += 1
-    
-    return imports
+                
+                pip_package = resolve_pip_name(package_name)
+                
+                imports.append(ImportInfo(
+                    package_name=package_name,
+                    import_type='import',
+                    import_statement=original_line.strip(),
+                    line_number=line_num,
+                    file_path=file_path,
+                    pip_package=pip_package
+                ))
+            continue
+        
+        i += 1
+    
+    return imports
+
+
+# 统计换行符时每次复制的最大字节数（保证内存占用不随文件大小增长）
+_NEWLINE_COUNT_CHUNK = 1024 * 1024
+
+def _count_newlines(mapped: mmap.mmap, start: int, end: int) -> int:
+    """分块统计 [start, end) 范围内的换行符数"""
+    if end - start <= _NEWLINE_COUNT_CHUNK:
+        return mapped[start:end].count(b'\n')
+    count = 0
+    for chunk_start in range(start, end, _NEWLINE_COUNT_CHUNK):
+        count += mapped[chunk_start:min(end, chunk_start + _NEWLINE_COUNT_CHUNK)].count(b'\n')
+    return count
+
+
+class _MappedLines:
+    """
+    mmap文件的惰性行序列：只在访问时解码对应的行
+
+    只记录候选行和访问过的行的起始偏移；多行import的续行总是紧跟在已知行之后被顺序访问
+    """
+
+    def __init__(self, mapped: mmap.mmap, anchors: Dict[int, int], line_count: int, encoding: str):
+        self._mapped = mapped
+        self._offsets = dict(anchors)  # 行号 → 行首字节偏移
+        self._offsets[0] = 0
+        self._line_count = line_count
+        self._encoding = encoding  # 整个文件使用的编码
+
+    def __len__(self) -> int:
+        return self._line_count
+
+    def _offset(self, index: int) -> int:
+        known = index
+        while known not in self._offsets:
+            known -= 1
+        offset = self._offsets[known]
+        while known < index:
+            offset = self._mapped.find(b'\n', offset) + 1
+            known += 1
+            self._offsets[known] = offset
+        return offset
+
+    def _decode(self, raw: bytes) -> str:
+        return raw.decode(self._encoding)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(self._line_count))]
+        if index < 0:
+            index += self._line_count
+        if not 0 <= index < self._line_count:
+            raise IndexError(index)
+        start = self._offset(index)
+        end = self._mapped.find(b'\n', start)
+        if end == -1:
+            end = len(self._mapped)
+        raw = self._mapped[start:end]
+        if raw.endswith(b'\r'):
+            raw = raw[:-1]
+        return self._decode(raw)
+
+
+def _mapped_source_encoding(mapped: mmap.mmap) -> Optional[str]:
+    """
+    按decode_source的规则确定整个mmap文件使用的编码
+
+    BOM和PEP 263编码声明优先，再依次尝试 SOURCE_ENCODINGS，返回第一个能解码整个文件的编码；
+    用增量解码器分块校验，不在内存中保留解码结果
+    """
+    candidates = []
+    try:
+        declared, _ = tokenize.detect_encoding(mapped.readline)
+        candidates.append(declared)
+    except (SyntaxError, LookupError):
+        pass  # 编码声明无效或与BOM冲突，按候选编码尝试
+    mapped.seek(0)
+    
+    for encoding in dict.fromkeys(candidates + SOURCE_ENCODINGS):
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            for chunk_start in range(0, len(mapped), _NEWLINE_COUNT_CHUNK):
+                decoder.decode(mapped[chunk_start:chunk_start + _NEWLINE_COUNT_CHUNK])
+            decoder.decode(b'', final=True)
+        except (UnicodeError, LookupError):
+            continue
+        return encoding
+    return None
+
+
+def _extract_imports_from_mapped(mapped: mmap.mmap, file_path: Path) -> Optional[List[ImportInfo]]:
+    """在mmap上定位候选行并提取（无法保证与文本模式一致时返回None）"""
+    if _BARE_CR_PATTERN.search(mapped):
+        return None
+    
+    # 编码：与read_file_safely相同，整个文件使用同一个编码，候选行按该编码解码
+    encoding = _mapped_source_encoding(mapped)
+    get_profiler().record_encoding(file_path, encoding)
+    if encoding is None:
+        print_colored(f"   ⚠️  无法读取文件（编码问题）: {file_path}", "yellow")
+        return []
+    
+    candidates = []
+    anchors = {}
+    line_index = 0
+    line_start = 0  # line_index 行的起始偏移
+    pos = mapped.find(b'import')
+    while pos != -1:
+        newline = mapped.rfind(b'\n', line_start, pos)
+        start = line_start if newline == -1 else newline + 1
+        line_index += _count_newlines(mapped, line_start, start)
+        line_start = start
+        candidates.append(line_index)
+        anchors[line_index] = start
+        end = mapped.find(b'\n', pos)
+        if end == -1:
+            break
+        pos = mapped.find(b'import', end)
+    if not candidates:
+        return []
+    
+    line_count = line_index + _count_newlines(mapped, line_start, len(mapped)) + 1
+    return _extract_imports_from_lines(_MappedLines(mapped, anchors, line_count, encoding), candidates, file_path)
+
+
+def extract_imports_mapped(file_path: Path) -> Optional[List[ImportInfo]]:
+    """
+    字节级提取：在文件的mmap上查找import关键字，只解码候选语句所在的行
+
+    内存和CPU开销与导入语句数量成正比，而不是与文件大小成正比；结果与
+    read_file_safely + extract_imports_with_details 一致（整个文件按同一编码解码）。
+
+    Returns:
+        ImportInfo列表；文件无法映射或使用单独的\\r换行时返回None（调用方改为完整读取）
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _extract_imports_from_mapped(mapped, file_path)
+    except (OSError, ValueError):
+        return None
+
+
+def extract_imports_ast(code_text: str, file_path: Path) -> List[ImportInfo]:
+    """
+    基于ast语法树提取import语句，返回与extract_imports_with_details相同的ImportInfo记录
+
+    相比逐行正则匹配：
+    - 不受字符串中引号数量的影响
+    - 能识别try/except、if TYPE_CHECKING、函数体内以及分号后的导入
+    - 多行括号导入直接由语法树给出起止行号
+    文件存在语法错误，或嵌套过深（如上万项相加的表达式）导致解析器递归超限、内存不足时，
+    该文件回退到正则提取。
+    """
+    source = code_text[1:] if code_text.startswith('\ufeff') else code_text
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return extract_imports_with_details(code_text, file_path)
+    
+    lines = source.split('\n')
+    nodes = [node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))]
+    # ast.walk是广度优先遍历，按源码位置排序以保持与正则提取相同的顺序
+    nodes.sort(key=lambda node: (node.lineno, node.col_offset))
+    
+    imports = []
+    resolve_pip_name = get_package_name_resolver().resolve
+    for node in nodes:
+        end_lineno = getattr(node, 'end_lineno', None) or node.lineno
+        statement = '\n'.join(lines[node.lineno - 1:end_lineno]).strip()
+        
+        if isinstance(node, ast.ImportFrom):
+            # 过滤相对导入（from . import x / from .mod import x）
+            if node.level or not node.module:
+                continue
+            package_names = [node.module.split('.')[0]]
+            import_type = 'from_import'
+        else:
+            package_names = [alias.name.split('.')[0] for alias in node.names]
+            import_type = 'import'
+        
+        for package_name in package_names:
+            if not package_name:
+                continue
+            imports.append(ImportInfo(
+                package_name=package_name,
+                import_type=import_type,
+                import_statement=statement,
+                line_number=node.lineno,
+                file_path=file_path,
+                pip_package=resolve_pip_name(package_name)
+            ))
+    
+    return imports
+
+
+# 可选的import提取后端: 名称 -> 提取函数(code_text, file_path) -> List[ImportInfo]
+EXTRACTOR_BACKENDS: Dict[str, Callable[[str, Path], List[ImportInfo]]] = {
+    'regex': extract_imports_with_details,
+    'ast': extract_imports_ast,
+}
+
+
+def get_extractor(backend: Optional[str] = None) -> Callable[[str, Path], List[ImportInfo]]:
+    """
+    获取import提取函数
+
+    Args:
+        backend: 后端名称（None=使用EXTRACTOR_BACKEND配置）
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    name = backend or EXTRACTOR_BACKEND
+    if name not in EXTRACTOR_BACKENDS:
+        raise ValueError(f"未知的提取后端: {name}（可选: {', '.join(sorted(EXTRACTOR_BACKENDS))}）")
+    return EXTRACTOR_BACKENDS[name]
+
+
+class ScanCache:
+    """
+    导入提取结果的持久化缓存（JSON Lines格式）
+
+    每行记录一个文件的导入信息，以路径为键，并保存文件的mtime、大小和内容哈希。
+    mtime和大小均未变化时直接复用缓存；仅mtime变化时比较内容哈希，
+    内容相同则同样复用，否则重新提取。未命中的文件不在查询时计算哈希，
+    而是使用提取时读取的字节的哈希（冷启动时每个文件只读取一次）。
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Path, extractor: Optional[str] = None):
+        self.cache_file = Path(cache_file)
+        self.extractor = extractor or EXTRACTOR_BACKEND  # 不同后端的结果不能混用
+        self.entries: Dict[str, dict] = {}     # 路径 -> 缓存记录
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[str, dict] = {}    # 未命中文件的stat和哈希（提取后写入）
+        self._dirty = False
+
+    def load(self) -> 'ScanCache':
+        """从磁盘加载缓存，文件不存在、版本不符或损坏的行会被忽略"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('version') != self.VERSION or header.get('extractor') != self.extractor:
+                    return self
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry['path']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except (OSError, ValueError):
+            pass
+        return self
+
+    @staticmethod
+    def _file_digest(file_path: Path) -> Optional[str]:
+        """计算文件内容哈希"""
+        try:
+            return hashlib.sha1(file_path.read_bytes()).hexdigest()
+        except (PermissionError, OSError):
+            return None
+
+    def lookup(self, file_path: Path) -> Optional[List[ImportInfo]]:
+        """
+        查询文件的缓存结果
+
+        Returns:
+            命中时返回重建的ImportInfo列表，未命中返回None
+        """
+        key = str(file_path)
+        try:
+            st = file_path.stat()
+        except (PermissionError, OSError):
+            self.misses += 1
+            return None
+
+        entry = self.entries.get(key)
+        digest = None
+        if entry is not None and entry['size'] == st.st_size:
+            if entry['mtime_ns'] == st.st_mtime_ns:
+                self.hits += 1
+                return self._to_imports(entry, file_path)
+            # mtime变化但大小相同：比较内容哈希（如git checkout后文件未变）
+            digest = self._file_digest(file_path)
+            if digest is not None and digest == entry['sha1']:
+                entry['mtime_ns'] = st.st_mtime_ns
+                self._dirty = True
+                self.hits += 1
+                return self._to_imports(entry, file_path)
+
+        self.misses += 1
+        # 在提取前记录stat：若文件在提取期间被修改，下次运行会因stat或哈希不符而重新提取
+        self._pending[key] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha1': digest}
+        return None
+
+    def store(self, file_path: Path, imports: List[ImportInfo], digest: Optional[str] = None):
+        """
+        保存文件的提取结果（需先调用lookup）
+
+        digest 为提取时读取的字节的内容哈希；没有时（如mmap提取的大文件）才单独读取文件计算
+        """
+        key = str(file_path)
+        meta = self._pending.pop(key, None)
+        if meta is None:
+            return
+        meta['sha1'] = digest or meta['sha1'] or self._file_digest(file_path)
+        if meta['sha1'] is None:
+            return
+        meta['path'] = key
+        meta['imports'] = [[imp.package_name, imp.import_type, imp.import_statement, imp.line_number]
+                           for imp in imports]
+        self.entries[key] = meta
+        self._dirty = True
+
+    def prune(self, live_files: Iterable[Path]):
+        """删除不在本次扫描结果中的文件记录"""
+        live = {str(p) for p in live_files}
+        stale = [key for key in self.entries if key not in live]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """写回磁盘（先写临时文件再替换，避免中断时损坏缓存）"""
+        if not self._dirty:
+            return
+        tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'version': self.VERSION, 'extractor': self.extractor}) + '\n')
+                for key in sorted(self.entries):
+                    f.write(json.dumps(self.entries[key], ensure_ascii=False) + '\n')
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except (PermissionError, OSError) as e:
+            print_colored(f"   ⚠️  无法写入扫描缓存: {e}", "yellow")
+
+    @staticmethod
+    def _to_imports(entry: dict, file_path: Path) -> List[ImportInfo]:
+        """由缓存记录重建ImportInfo（pip包名按当前映射重新计算）"""
+        resolve_pip_name = get_package_name_resolver().resolve
+        return [ImportInfo(
+            package_name=package_name,
+            import_type=import_type,
+            import_statement=import_statement,
+            line_number=line_number,
+            file_path=file_path,
+            pip_package=resolve_pip_name(package_name)
+        ) for package_name, import_type, import_statement, line_number in entry['imports']]
+
+
+def _init_extract_worker(package_mapping: Dict[str, str], package_patterns: List[Tuple[str, str]],
+                         package_mapping_db: Optional[str] = None):
+    """工作进程初始化：同步主进程的包名映射配置（spawn模式下子进程会重新导入模块）"""
+    global PACKAGE_MAPPING, PACKAGE_PATTERNS, PACKAGE_MAPPING_DB
+    PACKAGE_MAPPING = package_mapping
+    PACKAGE_PATTERNS = package_patterns
+    PACKAGE_MAPPING_DB = package_mapping_db
+
+
+def _extract_file_chunk(file_paths: List[Path], backend: Optional[str] = None,
+                        digests: Optional[List[Optional[str]]] = None) -> List[List[ImportInfo]]:
+    """
+    读取并解析一批文件，返回与输入顺序对应的结果（位于模块顶层，以便进程池pickle调用）
+
+    digests 为列表时，按文件顺序追加读取的字节的内容哈希（供扫描缓存使用；
+    未完整读取的大文件为None）
+    """
+    extractor = get_extractor(backend)
+    profiler = get_profiler()
+    results = []
+    for file_path in file_paths:
+        read_digest = []
+        large = _use_mapped_extraction(file_path)
+        if large and extractor is extract_imports_with_details:
+            with profiler.stage('extract', 1):
+                imports = extract_imports_mapped(file_path)
+            if imports is not None:
+                results.append(imports)
+                if digests is not None:
+                    digests.append(None)
+                continue
+        with profiler.stage('read', 1):
+            # 字节中没有import关键字的文件（如生成的数据表）不解码、不逐行扫描；
+            # 只有大文件先用mmap查找，其余文件在读取一次的字节中查找
+            if large and not file_may_contain_imports(file_path):
+                content = ""
+            else:
+                on_bytes = None if digests is None else (lambda data: read_digest.append(hashlib.sha1(data).hexdigest()))
+                content = read_file_safely(file_path, skip_without_imports=True, on_bytes=on_bytes)
+        with profiler.stage('extract', 1):
+            results.append(extractor(content, file_path))
+        if digests is not None:
+            digests.append(read_digest[0] if read_digest else None)
+    return results
+
+
+def _use_mapped_extraction(file_path: Path) -> bool:
+    """大文件（不小于MMAP_EXTRACT_MIN_BYTES）使用mmap字节级提取"""
+    if not MMAP_EXTRACT_MIN_BYTES:
+        return False
+    try:
+        return os.path.getsize(file_path) >= MMAP_EXTRACT_MIN_BYTES
+    except OSError:
+        return False
+
+
+def _extract_file_chunk_profiled(file_paths: List[Path], backend: Optional[str] = None,
+                                 with_digests: bool = False) -> Tuple[List[List[ImportInfo]], Dict, Dict, Dict, Dict,
+                                                                       Optional[List[Optional[str]]]]:
+    """工作进程中解析一批文件，并返回该批次的阶段计时、编码统计、包名解析缓存计数（由主进程合并）和内容哈希"""
+    global _profiler
+    _profiler = StageProfiler()
+    digests = [] if with_digests else None
+    results = _extract_file_chunk(file_paths, backend, digests)
+    return (results, _profiler.stages, _profiler.encodings, _profiler.file_encodings,
+            _profiler.name_cache_counts(), digests)
+
+
+def _iter_chunks(items: Iterable[Path], chunk_size: int) -> Iterator[List[Path]]:
+    """将文件序列按chunk_size切分成批次（惰性消费输入）"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _resolve_worker_count(workers: Optional[int]) -> int:
+    """解析并行进程数：None表示使用CPU核心数"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _create_extract_executor(workers: int) -> Optional[ProcessPoolExecutor]:
+    """创建导入提取进程池（工作进程继承当前的包名映射）；无法创建时返回None"""
+    try:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_extract_worker,
+            initargs=(dict(PACKAGE_MAPPING), list(PACKAGE_PATTERNS), PACKAGE_MAPPING_DB)
+        )
+    except (OSError, ImportError, NotImplementedError) as e:
+        # 某些环境（如受限沙箱）无法创建进程池，回退到串行
+        print_colored(f"   ⚠️  无法启动进程池，改为串行提取: {e}", "yellow")
+        return None
+
+
+def iter_extracted_imports(py_files: Iterable[Path], workers: Optional[int] = None,
+                           chunk_size: Optional[int] = None,
+                           backend: Optional[str] = None,
+                           executor: Optional[ProcessPoolExecutor] = None,
+                           with_digests: bool = False) -> Iterator[Tuple]:
+    """
+    逐个文件提取导入信息，支持多进程并行
+
+    结果按输入文件顺序产出，与串行模式完全一致；同时在途的批次数
+    限制为进程数的两倍，避免一次性提交全部文件。
+
+    Args:
+        py_files: 要解析的文件序列
+        workers: 并行进程数（None=CPU核心数, 1=串行）
+        chunk_size: 每批文件数（None=使用EXTRACT_CHUNK_SIZE）
+        backend: 提取后端名称（None=使用EXTRACTOR_BACKEND）
+        executor: 共享的进程池（由调用方创建和关闭；None=按workers自行创建）
+        with_digests: 同时产出读取的字节的内容哈希（扫描缓存使用，避免为计算哈希再次读取文件）
+
+    Yields:
+        (文件路径, 该文件的ImportInfo列表)；with_digests=True 时为 (文件路径, ImportInfo列表, 内容哈希或None)
+    """
+    if chunk_size is None:
+        chunk_size = EXTRACT_CHUNK_SIZE
+    chunk_size = max(1, chunk_size)
+    workers = _resolve_worker_count(workers)
+    backend = backend or EXTRACTOR_BACKEND
+    get_extractor(backend)  # 在提交任务前校验后端名称
+    chunks = _iter_chunks(py_files, chunk_size)
+
+    own_executor = executor is None
+    if own_executor and workers > 1:
+        executor = _create_extract_executor(workers)
+    def chunk_items(chunk, results, digests):
+        if with_digests:
+            return zip(chunk, results, digests)
+        return zip(chunk, results)
+
+    if executor is None:
+        for chunk in chunks:
+            digests = [] if with_digests else None
+            yield from chunk_items(chunk, _extract_file_chunk(chunk, backend, digests), digests)
+        return
+
+    pending = deque()  # (批次, future)，按提交顺序排列
+    try:
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(_extract_file_chunk_profiled, chunk, backend, with_digests)))
+            if len(pending) >= workers * 2:
+                chunk_done, future = pending.popleft()
+                yield from chunk_items(chunk_done, *_chunk_result(chunk_done, future, backend, with_digests))
+        while pending:
+            chunk_done, future = pending.popleft()
+            yield from chunk_items(chunk_done, *_chunk_result(chunk_done, future, backend, with_digests))
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+def _chunk_result(chunk: List[Path], future, backend: Optional[str] = None,
+                  with_digests: bool = False) -> Tuple[List[List[ImportInfo]], Optional[List[Optional[str]]]]:
+    """获取批次结果和内容哈希并合并工作进程的阶段计时；工作进程异常时在当前进程重新解析该批次"""
+    try:
+        results, stages, encodings, file_encodings, name_cache, digests = future.result()
+    except Exception:
+        digests = [] if with_digests else None
+        return _extract_file_chunk(chunk, backend, digests), digests
+    get_profiler().merge(stages, encodings, file_encodings, name_cache)
+    return results, digests
+
+
+def build_package_tracker(py_files: Iterable[Path], workers: Optional[int] = None,
+                          chunk_size: Optional[int] = None,
+                          cache: Optional[ScanCache] = None,
+                          backend: Optional[str] = None,
+                          executor: Optional[ProcessPoolExecutor] = None) -> PackageTracker:
+    """
+    解析所有文件并构建包追踪器（结束时清空路径和语句去重表）
+
+    Args:
+        py_files: 要解析的文件序列（列表按顺序合并结果；惰性序列则流式处理，
+                  边发现边解析，内存占用不随文件总数增长）
+        workers: 并行进程数（None=使用EXTRACT_WORKERS配置）
+        chunk_size: 每批文件数（None=使用EXTRACT_CHUNK_SIZE配置）
+        cache: 扫描缓存（命中的文件不再重新读取和解析）
+        backend: 提取后端名称（None=使用缓存记录的后端或EXTRACTOR_BACKEND）
+        executor: 共享的进程池（多个项目共用，文件数少时也不改为串行）
+    """
+    try:
+        return _build_package_tracker(py_files, workers, chunk_size, cache, backend, executor)
+    finally:
+        clear_intern_tables()
+
+
+def _build_package_tracker(py_files: Iterable[Path], workers: Optional[int], chunk_size: Optional[int],
+                           cache: Optional[ScanCache], backend: Optional[str],
+                           executor: Optional[ProcessPoolExecutor]) -> PackageTracker:
+    """build_package_tracker的主流程"""
+    if workers is None:
+        workers = EXTRACT_WORKERS
+    if cache is not None:
+        backend = backend or cache.extractor
+        if backend != cache.extractor:
+            raise ValueError(f"提取后端 {backend} 与扫描缓存的后端 {cache.extractor} 不一致")
+
+    tracker = PackageTracker()
+
+    def effective_workers(files):
+        # 共享进程池的启动开销已经支付，不再因文件少而改为串行
+        if executor is not None:
+            return _resolve_worker_count(workers), files
+        return _effective_workers(files, workers)
+
+    if cache is None:
+        workers, py_files = effective_workers(py_files)
+        for _, imports in iter_extracted_imports(py_files, workers, chunk_size, backend, executor):
+            for import_info in imports:
+                tracker.add_import(import_info)
+        return tracker
+
+    if not isinstance(py_files, (list, tuple)):
+        # 流式输入：缓存命中的文件直接写入追踪器，未命中的文件边发现边解析
+        seen_files = []
+
+        def cache_misses():
+            for py_file in py_files:
+                seen_files.append(py_file)
+                cached = cache.lookup(py_file)
+                if cached is None:
+                    yield py_file
+                    continue
+                for import_info in cached:
+                    tracker.add_import(import_info)
+
+        workers, misses = effective_workers(cache_misses())
+        for py_file, imports, digest in iter_extracted_imports(misses, workers, chunk_size, backend, executor,
+                                                               with_digests=True):
+            cache.store(py_file, imports, digest)
+            for import_info in imports:
+                tracker.add_import(import_info)
+        cache.prune(seen_files)
+        cache.save()
+        return tracker
+
+    cached_results = {}
+    misses = []
+    for py_file in py_files:
+        cached = cache.lookup(py_file)
+        if cached is None:
+            misses.append(py_file)
+        else:
+            cached_results[py_file] = cached
+
+    workers, misses = effective_workers(misses)
+    for py_file, imports, digest in iter_extracted_imports(misses, workers, chunk_size, backend, executor,
+                                                           with_digests=True):
+        cache.store(py_file, imports, digest)
+        cached_results[py_file] = imports
+
+    # 按原始文件顺序合并，保证结果与无缓存时一致
+    for py_file in py_files:
+        for import_info in cached_results[py_file]:
+            tracker.add_import(import_info)
+
+    cache.prune(py_files)
+    cache.save()
+    return tracker
+
+
+def _effective_workers(py_files: Iterable[Path], workers: Optional[int]) -> Tuple[int, Iterable[Path]]:
+    """
+    文件数少于PARALLEL_MIN_FILES时改为串行（进程池启动开销大于收益）
+
+    惰性序列只预读前PARALLEL_MIN_FILES个路径来判断，返回值中的序列仍包含全部文件。
+    """
+    if workers == 1:
+        return 1, py_files
+    if isinstance(py_files, (list, tuple)):
+        return (1 if len(py_files) < PARALLEL_MIN_FILES else workers), py_files
+    iterator = iter(py_files)
+    head = list(itertools.islice(iterator, PARALLEL_MIN_FILES))
+    if len(head) < PARALLEL_MIN_FILES:
+        return 1, head
+    return workers, itertools.chain(head, iterator)
 
 
 def backup_existing_requirements(requirements_file: str, max_backups: int = 5):
@@ -771,7 +2444,7 @@ def generate_enhanced_requirements(tracker: PackageTracker,
     except (PermissionError, OSError) as e:
         raise IOError(f"无法创建输出目录 {output_path.parent}: {e}")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with get_profiler().stage('write', len(successful_packages)), open(output_file, 'w', encoding='utf-8') as f:
         # === 文件头部 ===
         write_file_header(f, project_name, len(successful_packages), tracker)
         
@@ -825,11 +2498,8 @@ def generate_enhanced_requirements(tracker: PackageTracker,
 
 def write_file_header(f, project_name: Optional[str], package_count: int, tracker: PackageTracker):
     """写入文件头部信息"""
-    total_imports = sum(len(imports) for imports in tracker.package_imports.values()
-                       if imports and imports[0].package_name in tracker.get_third_party_packages())
-    total_files = len([fp for fp in tracker.file_imports.keys()
-                      if any(imp.package_name in tracker.get_third_party_packages()
-                            for imp in tracker.file_imports[fp])])
+    total_imports = tracker.third_party_import_count
+    total_files = tracker.third_party_file_count
     
     f.write("# " + "=" * 78 + "\n")
     f.write("# 📦 Enhanced Python Package Requirements\n")
@@ -863,9 +2533,8 @@ def write_dependency_overview(f, packages: Set[str], package_stats: Dict[str, Di
             
             # 聚合文件路径（使用set去重）和导入数
             # 从tracker获取该模块的真实文件路径
-            if tracker and package in tracker.package_imports:
-                for imp in tracker.package_imports[package]:
-                    pip_package_stats[pip_package]['files'].add(imp.file_path)
+            if tracker and package in tracker.package_file_counts:
+                pip_package_stats[pip_package]['files'].update(tracker.package_file_counts[package])
             
             pip_package_stats[pip_package]['imports'] += imports_count
     
@@ -934,9 +2603,10 @@ def write_file_usage_stats(f, tracker: PackageTracker):
     f.write("# 📊 FILE USAGE STATISTICS\n")
     f.write("# " + "=" * 78 + "\n")
     
-    third_party_packages = tracker.get_third_party_packages()
+    third_party_packages = tracker.third_party_packages
     
-    for file_path in sorted(tracker.file_imports.keys()):
+    # 只遍历包含第三方导入的文件
+    for file_path in sorted(tracker.file_third_party_counts):
         imports = tracker.file_imports[file_path]
         third_party_imports = [imp for imp in imports if imp.package_name in third_party_packages]
         
@@ -950,6 +2620,148 @@ def write_file_usage_stats(f, tracker: PackageTracker):
     f.write("# End of requirements.txt\n")
 
 
+def normalize_distribution_name(name: str) -> str:
+    """按PEP 503规范化发行包名（大小写、'-'、'_'、'.' 视为相同）"""
+    return _DISTRIBUTION_SEPARATORS_PATTERN.sub('-', name).lower()
+
+
+class InstalledIndex:
+    """
+    当前环境已安装发行包的索引
+
+    通过 importlib.metadata 一次性读取所有发行包的元数据，建立
+    顶层模块名 -> 发行包 的映射，"是否已安装"的检查变为字典查询，
+    不再需要逐个导入模块或调用 pip show。
+    """
+
+    def __init__(self):
+        self.distributions: Dict[str, Dict[str, str]] = {}  # 规范化包名 -> {Name, Version, Location}
+        self.module_to_distributions: Dict[str, List[str]] = {}  # 顶层模块名 -> 规范化包名列表
+        self.build()
+
+    @staticmethod
+    def _top_level_modules(dist) -> List[str]:
+        """读取发行包提供的顶层模块（优先top_level.txt，其次RECORD）"""
+        try:
+            top_level = dist.read_text('top_level.txt')
+        except Exception:
+            top_level = None
+        if top_level:
+            return [name.strip().replace('/', '.').split('.')[0]
+                    for name in top_level.splitlines() if name.strip()]
+        
+        modules = []
+        try:
+            files = dist.files or []
+        except Exception:
+            files = []
+        for file in files:
+            parts = file.parts
+            if not parts or parts[0].startswith('..'):
+                continue
+            top = parts[0]
+            if len(parts) == 1:
+                # 单文件模块（six.py）或扩展模块（_cffi_backend.cpython-311-x86_64-linux-gnu.so）
+                if not top.endswith(('.py', '.so', '.pyd')):
+                    continue
+                top = top.split('.')[0]
+            if top.isidentifier() and top != '__pycache__' and top not in modules:
+                modules.append(top)
+        return modules
+
+    def build(self):
+        """扫描当前环境的所有发行包"""
+        self.distributions.clear()
+        self.module_to_distributions.clear()
+        try:
+            dists = list(importlib.metadata.distributions())
+        except Exception:
+            return
+        for dist in dists:
+            try:
+                name = dist.metadata['Name']
+            except Exception:
+                continue
+            if not name:
+                continue
+            key = normalize_distribution_name(name)
+            if key in self.distributions:
+                continue  # sys.path中靠前的优先，与导入行为一致
+            try:
+                location = str(dist.locate_file(''))
+            except Exception:
+                location = ''
+            self.distributions[key] = {'Name': name, 'Version': dist.version or '', 'Location': location}
+            for module in self._top_level_modules(dist):
+                self.module_to_distributions.setdefault(module, []).append(key)
+
+    def has_module(self, module_name: str) -> bool:
+        """模块（按顶层包名）是否由某个已安装的发行包提供"""
+        if not module_name:
+            return False
+        return module_name.split('.')[0] in self.module_to_distributions
+
+    def has_distribution(self, pip_package: str) -> bool:
+        """发行包是否已安装"""
+        return bool(pip_package) and normalize_distribution_name(pip_package) in self.distributions
+
+    def get_info(self, pip_package: str) -> Optional[Dict[str, str]]:
+        """获取已安装发行包的信息（Name, Version, Location）"""
+        if not pip_package:
+            return None
+        info = self.distributions.get(normalize_distribution_name(pip_package))
+        return dict(info) if info else None
+
+
+_installed_index: Optional[InstalledIndex] = None
+
+
+def get_installed_index() -> InstalledIndex:
+    """获取已安装发行包索引（首次调用时构建）"""
+    global _installed_index
+    if _installed_index is None:
+        _installed_index = InstalledIndex()
+    return _installed_index
+
+
+def invalidate_installed_index():
+    """环境发生变化（如pip安装）后丢弃索引，下次使用时重新构建"""
+    global _installed_index
+    _installed_index = None
+
+
+def is_module_installed(module_name: str, allow_import: bool = True) -> bool:
+    """
+    "是否已安装"检查：先查已安装发行包索引，未命中时回退到 find_spec 和子进程导入验证
+    （用于不属于任何发行包的模块，如通过.pth加入路径的项目）
+    
+    Args:
+        allow_import: 为False时不导入模块，只用 find_spec 查找顶层包（不执行模块代码）；
+                      为True时在 verify_imports 的子进程中确认能导入，本进程不导入模块
+    """
+    if get_installed_index().has_module(module_name):
+        return True
+    if not find_top_level_spec(module_name):
+        return False
+    if not allow_import:
+        return True
+    return verify_imports([module_name])[module_name].success
+
+
+def find_top_level_spec(module_name: str) -> bool:
+    """
+    只查找顶层包的模块规范，不导入任何模块
+    （对带点的名称调用find_spec会导入父包，因此只查询第一段）
+    """
+    top_level = module_name.split('.')[0].strip() if module_name else ''
+    if not top_level:
+        return False
+    try:
+        return importlib.util.find_spec(top_level) is not None
+    except (ImportError, ValueError):
+        return False
+
+
 def check_package_installed(package_name: str) -> bool:
     """
     检查包是否已安装
@@ -976,22 +2788,142 @@ def check_package_installed(package_name: str) -> bool:
         return False
 
 
+@dataclass
+class ImportCheckResult:
+    """单个模块的导入验证结果"""
+    module: str
+    success: bool
+    seconds: float = 0.0  # 导入耗时
+    error: Optional[str] = None
+
+
+# 验证子进程执行的脚本：从stdin读取模块列表，逐个导入并按行输出JSON结果
+# 模块导入时的输出被重定向到stderr，结果行带标记前缀，避免与模块自身的输出混淆
+_VERIFY_RESULT_MARK = "@@verify@@"
+_VERIFY_IMPORT_SCRIPT = f"""
+import importlib, json, sys, time
+out = sys.stdout
+sys.stdout = sys.stderr
+for name in json.loads(sys.stdin.readline()):
+    start = time.perf_counter()
+    try:
+        importlib.import_module(name)
+        error = None
+    except BaseException as e:
+        error = type(e).__name__ + ': ' + str(e)
+    out.write({_VERIFY_RESULT_MARK!r} + json.dumps([name, time.perf_counter() - start, error]) + '\\n')
+    out.flush()
+"""
+
+
+def _verify_imports_in_child(modules: List[str], timeout: float) -> Dict[str, ImportCheckResult]:
+    """
+    在子进程中依次导入一组模块
+
+    子进程崩溃或超时时，第一个没有结果的模块记为失败，其余模块在新的子进程中继续验证。
+    """
+    results: Dict[str, ImportCheckResult] = {}
+    pending = list(modules)
+    while pending:
+        returncode = None
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-c", _VERIFY_IMPORT_SCRIPT],
+                input=json.dumps(pending) + "\n",
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                timeout=timeout
+            )
+            output, returncode = completed.stdout or "", completed.returncode
+        except subprocess.TimeoutExpired as e:
+            output = e.stdout or ""
+            if isinstance(output, bytes):
+                output = output.decode('utf-8', errors='replace')
+        except OSError as e:
+            for module in pending:
+                results[module] = ImportCheckResult(module, False, error=f"无法启动验证进程: {e}")
+            break
+        
+        for line in output.splitlines():
+            index = line.find(_VERIFY_RESULT_MARK)
+            if index < 0:
+                continue
+            try:
+                module, seconds, error = json.loads(line[index + len(_VERIFY_RESULT_MARK):])
+            except (ValueError, TypeError):
+                continue
+            results[module] = ImportCheckResult(module, error is None, seconds, error)
+        
+        remaining = [module for module in pending if module not in results]
+        if remaining:
+            # 子进程在导入remaining[0]时崩溃或超时
+            error = "导入超时" if returncode is None else f"验证进程异常退出(返回码 {returncode})"
+            results[remaining[0]] = ImportCheckResult(remaining[0], False, error=error)
+        pending = remaining[1:]
+    return results
+
+
+def verify_imports(modules: Iterable[str], processes: Optional[int] = None,
+                   timeout: Optional[float] = None) -> Dict[str, ImportCheckResult]:
+    """
+    在独立的子进程中批量验证模块能否导入
+
+    所有模块在一个（或processes个并行的）新Python进程中导入，不会把模块状态和内存
+    留在本进程中，也能验证需要新解释器才能导入的包。
+
+    Args:
+        modules: 要验证的模块名
+        processes: 并行的子进程数（None=使用VERIFY_PROCESSES配置）
+        timeout: 每个子进程的超时时间（None=使用VERIFY_TIMEOUT配置）
+
+    Returns:
+        模块名 -> ImportCheckResult，顺序与输入一致（重复的模块只验证一次）
+    """
+    if processes is None:
+        processes = VERIFY_PROCESSES
+    if timeout is None:
+        timeout = VERIFY_TIMEOUT
+    
+    names = list(dict.fromkeys(modules))
+    valid = [name for name in names
+             if name and all(part.isidentifier() for part in name.split('.'))]
+    
+    results: Dict[str, ImportCheckResult] = {}
+    if valid:
+        processes = max(1, min(processes or 1, len(valid)))
+        chunks = [valid[i::processes] for i in range(processes)]
+        with get_profiler().stage('verify', len(valid)):
+            if processes == 1:
+                results.update(_verify_imports_in_child(chunks[0], timeout))
+            else:
+                with ThreadPoolExecutor(max_workers=processes) as executor:
+                    for chunk_results in executor.map(lambda chunk: _verify_imports_in_child(chunk, timeout), chunks):
+                        results.update(chunk_results)
+    
+    return {name: results.get(name) or ImportCheckResult(name, False, error="无效的模块名")
+            for name in names}
+
+
 def check_package_installed_via_pip(pip_package: str) -> bool:
     """
-    通过pip show命令检查包是否已安装
+    检查发行包是否已安装（先查已安装索引，未命中时使用pip show确认）
     用于无法通过import验证的包（如pywin32需要重启进程才能导入）
     """
     # 参数验证
     if not pip_package or not pip_package.strip():
         return False
     
+    if get_installed_index().has_distribution(pip_package):
+        return True
+    
     try:
         result = subprocess.run(
             [sys.executable, "-m", "pip", "show", pip_package],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
-            timeout=30
+            timeout=PIP_SHOW_TIMEOUT
         )
         return result.returncode == 0
     except Exception:
@@ -1000,16 +2932,20 @@ def check_package_installed_via_pip(pip_package: str) -> bool:
 
 def get_installed_package_info(pip_package: str) -> Optional[Dict[str, str]]:
     """
-    获取已安装包的详细信息（通过pip show）
+    获取已安装包的详细信息（先查已安装索引，未命中时通过pip show）
     返回包含 Name, Version, Location 等信息的字典
     """
+    info = get_installed_index().get_info(pip_package)
+    if info:
+        return info
+    
     try:
         result = subprocess.run(
             [sys.executable, "-m", "pip", "show", pip_package],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
-            timeout=30
+            timeout=PIP_SHOW_TIMEOUT
         )
         if result.returncode != 0:
             return None
@@ -1081,10 +3017,10 @@ def diagnose_import_failure(expected_module: str, pip_package: str) -> Tuple[str
     if not pip_package or not pip_package.strip():
         return (f"无法导入 '{expected_module}'（pip包名无效）", None)
     
-    # 检查是否是大小写问题：尝试用小写模块名导入
+    # 检查是否是大小写问题：尝试用小写模块名导入（在子进程中验证，不在本进程中导入）
     lowercase_module = expected_module.lower()
-    if lowercase_module != expected_module:
-        if check_package_installed(lowercase_module):
+    if lowercase_module != expected_module and find_top_level_spec(lowercase_module):
+        if verify_imports([lowercase_module])[lowercase_module].success:
             return (
                 f"安装的包模块名是 '{lowercase_module}'（小写），而非 '{expected_module}'。"
                 f"\n   💡 这可能是一个不相关的包，请检查：\n"
@@ -1152,7 +3088,7 @@ def run_package_post_install(pip_package: str) -> bool:
                     [sys.executable, script_path] + script_args,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
-                    timeout=60
+                    timeout=POST_INSTALL_TIMEOUT
                 )
                 return result.returncode == 0
         except Exception:
@@ -1170,6 +3106,176 @@ def run_package_post_install(pip_package: str) -> bool:
     return True  # 没有后处理步骤或执行成功
 
 
+def _pip_install_timeout(count: int) -> float:
+    """一次pip调用安装count个包的超时时间"""
+    if count <= 1:
+        return PIP_INSTALL_TIMEOUT
+    return min(PIP_INSTALL_TIMEOUT * count, max(PIP_BATCH_TIMEOUT, PIP_INSTALL_TIMEOUT))
+
+
+def _run_pip_install(pip_packages: List[str]) -> subprocess.CompletedProcess:
+    """
+    在一次pip调用中安装一个或多个包
+
+    超时时间按包数量线性增加（每个包PIP_INSTALL_TIMEOUT秒），多个包时不超过PIP_BATCH_TIMEOUT。
+
+    Raises:
+        subprocess.TimeoutExpired: pip执行超时
+    """
+    try:
+        with get_profiler().stage('install', len(pip_packages)):
+            return subprocess.run(
+                [sys.executable, "-m", "pip", "install"] + list(pip_packages),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=_pip_install_timeout(len(pip_packages))
+            )
+    finally:
+        # 环境可能已变化（包括部分安装），已安装索引需要重建
+        invalidate_installed_index()
+
+
+def verification_modules(package_name: str, pip_package: str,
+                         additional_modules: Optional[List[str]] = None) -> List[str]:
+    """确定安装后需要验证导入的模块列表"""
+    special_config = PACKAGE_SPECIAL_HANDLING.get(pip_package, {})
+    
+    # 确定需要验证的模块列表
+    modules_to_check = [package_name]
+    
+    # 如果有配置的验证模块列表，使用它
+    if 'verify_modules' in special_config:
+        modules_to_check = list(special_config['verify_modules'])
+        # 如果配置的模块列表为空，回退到使用package_name
+        if not modules_to_check:
+            modules_to_check = [package_name]
+    # 否则，如果有额外模块列表，也验证它们
+    elif additional_modules:
+        modules_to_check.extend(additional_modules)
+    
+    # 确保至少有一个模块需要验证
+    if not modules_to_check:
+        modules_to_check = [package_name]
+    return modules_to_check
+
+
+def verify_installed_package(package_name: str, pip_package: str,
+                             additional_modules: Optional[List[str]] = None,
+                             import_results: Optional[Dict[str, ImportCheckResult]] = None
+                             ) -> Tuple[bool, str, Optional[str]]:
+    """
+    pip安装成功后执行后处理步骤并验证包是否可用
+
+    Args:
+        package_name: 导入时使用的模块名
+        pip_package: pip包名
+        additional_modules: 额外的模块名列表（用于验证，如pywin32的多个子模块）
+        import_results: 已批量得到的导入验证结果（缺少的模块在子进程中验证）
+
+    Returns:
+        (是否成功, 消息, 实际使用的pip包名)
+    """
+    # 执行后处理步骤（如果有配置）
+    run_package_post_install(pip_package)
+    
+    # 获取特殊处理配置
+    special_config = PACKAGE_SPECIAL_HANDLING.get(pip_package, {})
+    
+    # 检查是否跳过导入验证（某些包如pywin32需要重启进程才能导入）
+    if special_config.get('skip_import_verify', False):
+        # 使用pip show验证安装是否成功
+        if check_package_installed_via_pip(pip_package):
+            return True, "安装成功（需重启Python后可导入）", pip_package
+        else:
+            return False, "安装失败（pip验证未通过）", pip_package
+    
+    # 延迟验证（如果需要）
+    verify_delay = special_config.get('verify_delay', 0)
+    if verify_delay > 0:
+        time.sleep(verify_delay)
+    
+    modules_to_check = verification_modules(package_name, pip_package, additional_modules)
+    
+    # 在子进程中一次性导入所有需要验证的模块
+    import_results = dict(import_results or {})
+    missing = [module for module in modules_to_check if module not in import_results]
+    if missing:
+        import_results.update(verify_imports(missing))
+    
+    # 验证模式：verify_any=True表示只要有一个模块能导入就算成功
+    verify_any = special_config.get('verify_any', True)
+    
+    if verify_any:
+        # 只要有一个模块能导入就算成功
+        for module in modules_to_check:
+            if import_results[module].success:
+                return True, "安装并验证成功", pip_package
+        # 如果所有模块都验证失败，进行诊断
+        diagnosis_msg, actual_module = diagnose_import_failure(package_name, pip_package)
+        if actual_module:
+            # 找到了实际可以导入的模块名（大小写不同）
+            return False, f"安装成功但模块名不匹配: {diagnosis_msg}", pip_package
+        return False, f"安装成功但验证失败: {diagnosis_msg}", pip_package
+    else:
+        # 所有模块都必须能导入才算成功
+        failed_modules = [module for module in modules_to_check if not import_results[module].success]
+        
+        if failed_modules:
+            return False, f"安装成功但验证失败（无法导入: {', '.join(failed_modules)}）", pip_package
+        else:
+            return True, "安装并验证成功", pip_package
+
+
+def _handle_install_failure(package_name: str, pip_package: str, result: subprocess.CompletedProcess,
+                            auto_retry: bool = True) -> Tuple[bool, str, Optional[str]]:
+    """
+    处理pip安装失败：必要时尝试名称变体，否则提取关键错误信息
+
+    Returns:
+        (是否成功, 消息, 实际使用的pip包名)
+    """
+    # 检查是否是"No matching distribution found"错误
+    error_text = result.stderr.lower() if result.stderr else ""
+    is_no_distribution = "no matching distribution found" in error_text
+    
+    # 如果启用自动重试且是找不到包的错误，尝试变体
+    if auto_retry and is_no_distribution:
+        print_colored(f"   🔍 未找到包 {pip_package}，尝试智能查找...", "yellow")
+        success, msg, actual_pip_name = try_install_with_variants(package_name, pip_package)
+        if success:
+            return True, msg, actual_pip_name
+    
+    # 改进错误处理：提取关键错误信息，保留更多上下文
+    error_lines = result.stderr.strip().split('\n') if result.stderr else []
+    if error_lines:
+        # 优先查找ERROR/WARNING等关键词所在的行
+        error_msg = None
+        for line in reversed(error_lines):
+            if any(keyword in line.upper() for keyword in ['ERROR', 'FAILED', 'EXCEPTION', 'WARNING']):
+                error_msg = line.strip()
+                break
+        # 如果没有找到关键词，使用最后几行
+        if not error_msg:
+            error_msg = '\n'.join(error_lines[-3:]).strip()
+    else:
+        error_msg = "未知错误（无错误输出）"
+    
+    # 提供添加映射的建议
+    suggestion = ""
+    if is_no_distribution:
+        suggestion = f"\n   💡 提示: 如果 {package_name} 是某个包的子模块，请在 PACKAGE_MAPPING 中添加映射：\n      '{package_name}': '正确的pip包名'"
+    
+    return False, f"安装失败: {error_msg}{suggestion}", None
+
+
+def _install_timeout_message() -> str:
+    """pip安装超时的提示信息"""
+    if PIP_INSTALL_TIMEOUT % 60 == 0:
+        return f"安装超时(>{PIP_INSTALL_TIMEOUT // 60}分钟)"
+    return f"安装超时(>{PIP_INSTALL_TIMEOUT}秒)"
+
+
 def install_package(package_name: str, pip_package: str, auto_retry: bool = True, 
                    additional_modules: Optional[List[str]] = None) -> Tuple[bool, str, Optional[str]]:
     """
@@ -1191,115 +3297,129 @@ def install_package(package_name: str, pip_package: str, auto_retry: bool = True
         return False, "安装失败: 模块名不能为空", None
     
     try:
-        result = subprocess.run(
-            [sys.executable, "-m", "pip", "install", pip_package],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=300
-        )
+        result = _run_pip_install([pip_package])
         
         if result.returncode == 0:
-            # 执行后处理步骤（如果有配置）
-            run_package_post_install(pip_package)
-            
-            # 获取特殊处理配置
-            special_config = PACKAGE_SPECIAL_HANDLING.get(pip_package, {})
-            
-            # 检查是否跳过导入验证（某些包如pywin32需要重启进程才能导入）
-            if special_config.get('skip_import_verify', False):
-                # 使用pip show验证安装是否成功
-                if check_package_installed_via_pip(pip_package):
-                    return True, "安装成功（需重启Python后可导入）", pip_package
-                else:
-                    return False, "安装失败（pip验证未通过）", pip_package
-            
-            # 延迟验证（如果需要）
-            verify_delay = special_config.get('verify_delay', 0)
-            if verify_delay > 0:
-                import time
-                time.sleep(verify_delay)
-            
-            # 确定需要验证的模块列表
-            modules_to_check = [package_name]
-            
-            # 如果有配置的验证模块列表，使用它
-            if 'verify_modules' in special_config:
-                modules_to_check = special_config['verify_modules']
-                # 如果配置的模块列表为空，回退到使用package_name
-                if not modules_to_check:
-                    modules_to_check = [package_name]
-            # 否则，如果有额外模块列表，也验证它们
-            elif additional_modules:
-                modules_to_check.extend(additional_modules)
-            
-            # 确保至少有一个模块需要验证
-            if not modules_to_check:
-                modules_to_check = [package_name]
-            
-            # 验证模式：verify_any=True表示只要有一个模块能导入就算成功
-            verify_any = special_config.get('verify_any', True)
+            return verify_installed_package(package_name, pip_package, additional_modules)
+        else:
+            return _handle_install_failure(package_name, pip_package, result, auto_retry)
             
-            if verify_any:
-                # 只要有一个模块能导入就算成功
-                for module in modules_to_check:
-                    if check_package_installed(module):
-                        return True, "安装并验证成功", pip_package
-                # 如果所有模块都验证失败，进行诊断
-                diagnosis_msg, actual_module = diagnose_import_failure(package_name, pip_package)
-                if actual_module:
-                    # 找到了实际可以导入的模块名（大小写不同）
-                    return False, f"安装成功但模块名不匹配: {diagnosis_msg}", pip_package
-                return False, f"安装成功但验证失败: {diagnosis_msg}", pip_package
-            else:
-                # 所有模块都必须能导入才算成功
-                failed_modules = []
-                for module in modules_to_check:
-                    if not check_package_installed(module):
-                        failed_modules.append(module)
-                
-                if failed_modules:
-                    return False, f"安装成功但验证失败（无法导入: {', '.join(failed_modules)}）", pip_package
-                else:
-                    return True, "安装并验证成功", pip_package
+    except subprocess.TimeoutExpired:
+        return False, _install_timeout_message(), None
+    except Exception as e:
+        return False, f"异常: {str(e)}", None
+
+
+def _bisect_install(pip_packages: List[str],
+                    failures: Dict[str, Optional[subprocess.CompletedProcess]]) -> List[str]:
+    """
+    批量安装一组包；整组失败时二分拆分重试，定位出错的包
+
+    pip对一次调用中的所有包统一解析依赖，任何一个包找不到或冲突都会导致整组失败，
+    因此逐级二分直到单个包，出错的包记录到failures（超时则记录None）。
+    整组超时时二分只会让慢的包反复超时，因此改为逐个安装，每个包使用正常的超时时间。
+
+    Returns:
+        安装成功的pip包名列表
+    """
+    try:
+        result = _run_pip_install(pip_packages)
+    except subprocess.TimeoutExpired:
+        if len(pip_packages) == 1:
+            failures[pip_packages[0]] = None
+            return []
+        return _install_individually(pip_packages, failures)
+    
+    if result.returncode == 0:
+        return list(pip_packages)
+    if len(pip_packages) == 1:
+        failures[pip_packages[0]] = result
+        return []
+    
+    mid = len(pip_packages) // 2
+    return (_bisect_install(pip_packages[:mid], failures) +
+            _bisect_install(pip_packages[mid:], failures))
+
+
+def _install_individually(pip_packages: List[str],
+                          failures: Dict[str, Optional[subprocess.CompletedProcess]]) -> List[str]:
+    """每个包单独调用一次pip（批量调用超时后使用），出错的包记录到failures"""
+    installed = []
+    for pip_name in pip_packages:
+        try:
+            result = _run_pip_install([pip_name])
+        except subprocess.TimeoutExpired:
+            result = None
+        if result is not None and result.returncode == 0:
+            installed.append(pip_name)
+        else:
+            failures[pip_name] = result
+    return installed
+
+
+def install_packages_batch(packages: Dict[str, List[str]],
+                           batch_size: Optional[int] = None) -> Dict[str, Tuple[bool, str, Optional[str]]]:
+    """
+    用尽量少的pip调用安装多个包，并逐个返回安装结果
+
+    所有包合并为一次pip调用（或按batch_size分组），pip只需启动和解析依赖一次；
+    整组失败时二分定位出错的包，出错的包再按单包流程处理（名称变体查找、错误诊断）。
+
+    Args:
+        packages: pip包名 -> 映射到该包的import模块名列表（第一个模块用于验证）
+        batch_size: 每次pip调用最多安装的包数（None=使用INSTALL_BATCH_SIZE, 0=不限制）
+
+    Returns:
+        pip包名 -> (是否成功, 消息, 实际使用的pip包名)，顺序与输入一致
+    """
+    if batch_size is None:
+        batch_size = INSTALL_BATCH_SIZE
+    
+    pip_names = [name for name, import_names in packages.items() if name and name.strip() and import_names]
+    if batch_size <= 0:
+        batch_size = max(1, len(pip_names))
+    
+    installed = set()
+    failures: Dict[str, Optional[subprocess.CompletedProcess]] = {}
+    for start in range(0, len(pip_names), batch_size):
+        try:
+            installed.update(_bisect_install(pip_names[start:start + batch_size], failures))
+        except Exception as e:
+            for pip_name in pip_names[start:start + batch_size]:
+                failures[pip_name] = None
+            print_colored(f"   ⚠️  批量安装异常: {e}", "yellow")
+    
+    # 找不到的包稍后会查询PyPI：先一次性并发查询全部，避免逐个串行等待
+    not_found = [packages[name][0] for name, result in failures.items()
+                 if result is not None and "no matching distribution found" in (result.stderr or "").lower()]
+    if not_found:
+        resolve_pypi_names(not_found)
+    
+    # 没有特殊处理（后处理步骤、延迟验证）的包在同一个子进程中一次性验证导入
+    batch_modules = []
+    for pip_name in pip_names:
+        if pip_name in installed and pip_name not in PACKAGE_SPECIAL_HANDLING:
+            import_names = packages[pip_name]
+            batch_modules.extend(verification_modules(import_names[0], pip_name, import_names[1:] or None))
+    import_results = verify_imports(batch_modules) if batch_modules else {}
+    
+    results = {}
+    for pip_name, import_names in packages.items():
+        if not import_names:
+            continue
+        package_name = import_names[0]
+        additional_modules = import_names[1:] or None
+        if pip_name in installed:
+            results[pip_name] = verify_installed_package(package_name, pip_name, additional_modules,
+                                                         import_results=import_results)
+        elif failures.get(pip_name) is not None:
+            results[pip_name] = _handle_install_failure(package_name, pip_name, failures[pip_name])
+        elif pip_name in failures:
+            results[pip_name] = (False, _install_timeout_message(), None)
         else:
-            # 检查是否是"No matching distribution found"错误
-            error_text = result.stderr.lower() if result.stderr else ""
-            is_no_distribution = "no matching distribution found" in error_text
-            
-            # 如果启用自动重试且是找不到包的错误，尝试变体
-            if auto_retry and is_no_distribution:
-                print_colored(f"   🔍 未找到包 {pip_package}，尝试智能查找...", "yellow")
-                success, msg, actual_pip_name = try_install_with_variants(package_name, pip_package)
-                if success:
-                    return True, msg, actual_pip_name
-            
-            # 改进错误处理：提取关键错误信息，保留更多上下文
-            error_lines = result.stderr.strip().split('\n') if result.stderr else []
-            if error_lines:
-                # 优先查找ERROR/WARNING等关键词所在的行
-                error_msg = None
-                for line in reversed(error_lines):
-                    if any(keyword in line.upper() for keyword in ['ERROR', 'FAILED', 'EXCEPTION', 'WARNING']):
-                        error_msg = line.strip()
-                        break
-                # 如果没有找到关键词，使用最后几行
-                if not error_msg:
-                    error_msg = '\n'.join(error_lines[-3:]).strip()
-            else:
-                error_msg = "未知错误（无错误输出）"
-            
-            # 提供添加映射的建议
-            suggestion = ""
-            if is_no_distribution:
-                suggestion = f"\n   💡 提示: 如果 {package_name} 是某个包的子模块，请在 PACKAGE_MAPPING 中添加映射：\n      '{package_name}': '正确的pip包名'"
-            
-            return False, f"安装失败: {error_msg}{suggestion}", None
-            
-    except subprocess.TimeoutExpired:
-        return False, "安装超时(>5分钟)", None
-    except Exception as e:
-        return False, f"异常: {str(e)}", None
+            # 参数无效的包按单包流程返回错误信息
+            results[pip_name] = install_package(package_name, pip_name, additional_modules=additional_modules)
+    return results
 
 
 def replace_emojis(text: str) -> str:
@@ -1366,8 +3486,56 @@ def print_colored(text: str, color: str = ""):
             print(safe_text)
 
 
-def scan_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True, generate_req: bool = True):
-    """扫描项目并安装所有依赖（增强版）"""
+def _print_scan_stats(stats: ScanStats):
+    """打印扫描时跳过的条目统计"""
+    if stats.skipped:
+        safe_print(f"   跳过 {stats.skipped} 个条目（剪枝目录 {stats.dirs_pruned} 个, "
+                   f"排除文件 {stats.files_excluded} 个, 其他 {stats.other_entries + stats.errors} 个）")
+
+
+def scan_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True, generate_req: bool = True,
+                     workers: Optional[int] = None, use_cache: bool = True,
+                     extractor: Optional[str] = None, stream: Optional[bool] = None,
+                     report_file: Optional[str] = None, profile_file: Optional[str] = None):
+    """
+    扫描项目并安装所有依赖（增强版）
+
+    Args:
+        workers: 导入提取的并行进程数（None=使用EXTRACT_WORKERS配置）
+        use_cache: 是否使用扫描缓存（SCAN_CACHE_FILE为None时不生效）
+        extractor: import提取后端（None=使用EXTRACTOR_BACKEND配置）
+        stream: 是否流式扫描（None=使用STREAM_MODE配置）
+        report_file: 各阶段耗时的JSON报告路径（None=使用PROFILE_REPORT_FILE配置）
+        profile_file: cProfile输出路径（None=使用PROFILE_DUMP_FILE配置）
+
+    Returns:
+        运行摘要字典
+    """
+    if report_file is None:
+        report_file = PROFILE_REPORT_FILE
+    if profile_file is None:
+        profile_file = PROFILE_DUMP_FILE
+    
+    profiler = reset_profiler()
+    profile = cProfile.Profile() if profile_file else None
+    if profile is not None:
+        profile.enable()
+    try:
+        return _scan_and_install(scan_path, scan_subdirs, generate_req, workers, use_cache, extractor, stream)
+    finally:
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(profile_file)
+            safe_print(f"\n📊 cProfile结果已保存到: {profile_file}")
+        if report_file:
+            profiler.write_report(report_file)
+            safe_print(f"📊 阶段耗时报告已保存到: {report_file}")
+
+
+def _scan_and_install(scan_path: Optional[str], scan_subdirs: bool, generate_req: bool,
+                      workers: Optional[int], use_cache: bool,
+                      extractor: Optional[str], stream: Optional[bool]) -> Dict:
+    """scan_and_install的主流程（计时与性能分析由外层负责），返回运行摘要"""
     
     print_colored("\n" + "=" * 70, "cyan")
     print_colored("🚀 增强版Python项目智能包管理工具 - 扫描模式", "bold")
@@ -1381,44 +3549,92 @@ def scan_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True,
     project_name = Path(scan_path).name
     safe_print(f"\n📁 扫描路径: {scan_path}")
     safe_print(f"📋 项目名称: {project_name}")
+    summary = {'project': project_name, 'files': 0, 'third_party': []}
     safe_print(f"🔍 扫描模式: {'递归扫描子目录' if scan_subdirs else '仅当前目录'}")
     
-    # 步骤1: 扫描文件
-    print_colored("\n📝 步骤1: 扫描Python文件...", "blue")
-    py_files = scan_python_files(scan_path, scan_subdirs)
-    
-    if not py_files:
-        print_colored("   ⚠️  未找到任何Python文件!", "yellow")
-        return
-    
-    safe_print(f"   找到 {len(py_files)} 个Python文件")
+    if stream is None:
+        stream = STREAM_MODE
+    scan_stats = ScanStats()
     
-    # 显示扫描的文件列表(排除了安装脚本自己)
-    if len(py_files) <= 10:
-        safe_print("\n   扫描文件:")
-        for f in py_files:
-            safe_print(f"     • {f.name}")
+    # 仅分析模式下不启动提取进程，也不在被审计的仓库中写入扫描缓存
+    if ANALYZE_ONLY:
+        workers = 1
+        use_cache = False
     
-    # 步骤2: 详细分析import语句
-    print_colored("\n📦 步骤2: 详细分析import语句...", "blue")
-    tracker = PackageTracker()
+    cache = None
+    if use_cache and SCAN_CACHE_FILE:
+        cache = ScanCache(Path(scan_path) / SCAN_CACHE_FILE, extractor).load()
     
-    for py_file in py_files:
-        content = read_file_safely(py_file)
-        imports = extract_imports_with_details(content, py_file)
+    if stream:
+        # 步骤1+2: 边发现文件边解析，不预先收集完整的文件列表
+        print_colored("\n📝 步骤1-2: 流式扫描并分析import语句...", "blue")
+        file_count = 0
         
-        # 更新追踪器
-        for import_info in imports:
-            tracker.add_import(import_info)
+        def counted_files():
+            # 发现与解析交替进行，只统计遍历目录本身的耗时
+            nonlocal file_count
+            profiler = get_profiler()
+            files = iter_python_files(scan_path, scan_subdirs, scan_stats)
+            while True:
+                start_wall, start_cpu = time.perf_counter(), time.process_time()
+                py_file = next(files, None)
+                profiler.add('discover', time.perf_counter() - start_wall, time.process_time() - start_cpu,
+                             items=0 if py_file is None else 1)
+                if py_file is None:
+                    return
+                file_count += 1
+                yield py_file
+        
+        tracker = build_package_tracker(counted_files(), workers, cache=cache, backend=extractor)
+        
+        if not file_count:
+            print_colored("   ⚠️  未找到任何Python文件!", "yellow")
+            return summary
+        
+        safe_print(f"   处理了 {file_count} 个Python文件")
+        _print_scan_stats(scan_stats)
+    else:
+        # 步骤1: 扫描文件
+        print_colored("\n📝 步骤1: 扫描Python文件...", "blue")
+        with get_profiler().stage('discover'):
+            py_files = scan_python_files(scan_path, scan_subdirs, scan_stats)
+        get_profiler().count('discover', len(py_files))
+        
+        if not py_files:
+            print_colored("   ⚠️  未找到任何Python文件!", "yellow")
+            return summary
+        
+        file_count = len(py_files)
+        safe_print(f"   找到 {file_count} 个Python文件")
+        _print_scan_stats(scan_stats)
+        
+        # 显示扫描的文件列表(排除了安装脚本自己)
+        if file_count <= 10:
+            safe_print("\n   扫描文件:")
+            for f in py_files:
+                safe_print(f"     • {f.name}")
+        
+        # 步骤2: 详细分析import语句
+        print_colored("\n📦 步骤2: 详细分析import语句...", "blue")
+        tracker = build_package_tracker(py_files, workers, cache=cache, backend=extractor)
     
+    if cache is not None and cache.hits:
+        safe_print(f"   缓存命中 {cache.hits}/{cache.hits + cache.misses} 个文件")
+    other_encodings = {encoding: count for encoding, count in get_profiler().encodings.items()
+                       if encoding != 'utf-8'}
+    if other_encodings:
+        safe_print("   非UTF-8文件: " + ", ".join(f"{encoding} {count} 个"
+                                                for encoding, count in sorted(other_encodings.items())))
+    
+    summary['files'] = file_count
     if not tracker.all_packages:
         print_colored("   ⚠️  未检测到任何import语句", "yellow")
-        return
+        return summary
     
     safe_print(f"   检测到 {len(tracker.all_packages)} 个不同的包")
     
     # 显示详细信息
-    if len(py_files) <= 10:
+    if file_count <= 10:
         safe_print("\n   文件详情:")
         for file_path in sorted(tracker.file_imports.keys()):
             imports = tracker.file_imports[file_path]
@@ -1431,18 +3647,20 @@ def scan_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True,
     
     # 步骤3: 过滤标准库
     print_colored("\n🔍 步骤3: 过滤标准库...", "blue")
-    third_party = tracker.get_third_party_packages()
+    with get_profiler().stage('stdlib_filter', len(tracker.all_packages)):
+        third_party = tracker.get_third_party_packages()
     stdlib_count = len(tracker.all_packages) - len(third_party)
     safe_print(f"   标准库: {stdlib_count} 个 | 第三方库: {len(third_party)} 个")
     
     if not third_party:
         print_colored("\n✨ 所有包都是标准库,无需安装!", "green")
-        if generate_req:
+        if generate_req and not DRY_RUN:
             # 即使没有第三方包，也生成一个空的requirements.txt
             generate_enhanced_requirements(tracker, "requirements.txt", project_name, 
                                           failed_packages=set(), failed_pip_packages=set())
             print_colored("   📄 已生成空的requirements.txt文件", "cyan")
-        return
+            summary['requirements_file'] = "requirements.txt"
+        return summary
     
     # 显示检测到的第三方包统计
     safe_print(f"\n   第三方包详情:")
@@ -1461,18 +3679,76 @@ def scan_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True,
             safe_print(f"     • {pkg} ({files_count} 文件, {imports_count} 导入)")
     
     # 继续安装流程...
-    enhanced_process_installation(tracker, generate_req, project_name, Path(scan_path))
+    result = enhanced_process_installation(tracker, generate_req, project_name, Path(scan_path))
+    result['files'] = file_count
+    return result
 
 
-def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, project_name: str, 
-                                  scan_root: Optional[Path] = None):
-    """处理增强版安装流程"""
+def _is_package_group_installed(pip_pkg: str, module_names: List[str], metadata_only: bool = False) -> bool:
+    """
+    检查映射到同一pip包的一组模块是否已安装（遵循PACKAGE_SPECIAL_HANDLING的验证配置）
+    
+    Args:
+        metadata_only: 只使用发行包元数据和find_spec，不导入模块、不调用pip show
+    """
+    # 检查是否需要特殊处理
+    special_config = PACKAGE_SPECIAL_HANDLING.get(pip_pkg, {})
+    
+    # 检查是否跳过导入验证（某些包如pywin32需要重启进程才能导入）
+    skip_import_verify = special_config.get('skip_import_verify', False)
+    
+    # 检查包是否已安装
+    is_installed = False
+    
+    if skip_import_verify:
+        # 使用pip show验证
+        if metadata_only:
+            is_installed = get_installed_index().has_distribution(pip_pkg)
+        else:
+            is_installed = check_package_installed_via_pip(pip_pkg)
+    else:
+        verify_any = special_config.get('verify_any', True)
+        
+        # 确定需要检查的模块列表
+        modules_to_check = module_names
+        if 'verify_modules' in special_config:
+            modules_to_check = [m for m in special_config['verify_modules'] if m in module_names]
+        
+        # 如果模块列表为空，使用原始模块列表
+        if not modules_to_check:
+            modules_to_check = module_names
+        
+        if modules_to_check:  # 确保有模块需要检查
+            if verify_any:
+                # 只要有一个模块已安装就算已安装
+                for module in modules_to_check:
+                    if is_module_installed(module, allow_import=not metadata_only):
+                        is_installed = True
+                        break
+            else:
+                # 所有模块都必须已安装才算已安装
+                is_installed = all(is_module_installed(module, allow_import=not metadata_only)
+                                   for module in modules_to_check)
     
+    return is_installed
+
+
+def classify_third_party_packages(tracker: PackageTracker, scan_root: Optional[Path] = None,
+                                  metadata_only: bool = False) -> Tuple[List[str], List[Tuple[str, Path]],
+                                                                         List[Tuple[str, str]]]:
+    """
+    将第三方包分为 已安装 / 本地模块 / 需要安装 三类
+
+    Args:
+        scan_root: 项目根目录（与各文件所在目录一起作为本地模块的搜索路径）
+        metadata_only: 只使用发行包元数据和find_spec，不导入模块、不启动子进程
+
+    Returns:
+        (已安装的模块名列表, [(本地模块名, 路径)], [(模块名, pip包名)])
+    """
     third_party_packages = tracker.get_third_party_packages()
     package_stats = tracker.get_package_stats()
     
-    print_colored(f"\n📦 步骤4: 准备安装 {len(third_party_packages)} 个第三方包...", "blue")
-    
     already_installed = []
     need_install = []
     local_modules = []  # 检测到的本地模块
@@ -1498,59 +3774,51 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
         pip_package_groups[pip_pkg].append(pkg)
     
     # 检查每个pip包及其所有映射的模块
+    profiler = get_profiler()
     for pip_pkg, module_names in pip_package_groups.items():
         # 安全检查：确保有模块需要处理
         if not module_names:
             continue
         
-        # 检查是否需要特殊处理
-        special_config = PACKAGE_SPECIAL_HANDLING.get(pip_pkg, {})
-        
-        # 检查是否跳过导入验证（某些包如pywin32需要重启进程才能导入）
-        skip_import_verify = special_config.get('skip_import_verify', False)
-        
-        # 检查包是否已安装
-        is_installed = False
-        
-        if skip_import_verify:
-            # 使用pip show验证
-            is_installed = check_package_installed_via_pip(pip_pkg)
-        else:
-            verify_any = special_config.get('verify_any', True)
-            
-            # 确定需要检查的模块列表
-            modules_to_check = module_names
-            if 'verify_modules' in special_config:
-                modules_to_check = [m for m in special_config['verify_modules'] if m in module_names]
-            
-            # 如果模块列表为空，使用原始模块列表
-            if not modules_to_check:
-                modules_to_check = module_names
-            
-            if modules_to_check:  # 确保有模块需要检查
-                if verify_any:
-                    # 只要有一个模块能导入就算已安装
-                    for module in modules_to_check:
-                        if check_package_installed(module):
-                            is_installed = True
-                            break
-                else:
-                    # 所有模块都必须能导入才算已安装
-                    is_installed = all(check_package_installed(module) for module in modules_to_check)
+        with profiler.stage('installed_check', len(module_names)):
+            is_installed = _is_package_group_installed(pip_pkg, module_names, metadata_only)
         
         if is_installed:
             already_installed.extend(module_names)
         else:
             # 在安装前检查是否是本地模块（防止误安装不相关的PyPI包）
-            for module_name in module_names:
-                # 检查是否是本地模块
-                local_path = check_local_module_exists(module_name, list(search_paths))
-                if local_path:
-                    # 这是本地模块，跳过安装
-                    local_modules.append((module_name, local_path))
-                else:
-                    # 需要安装
-                    need_install.append((module_name, pip_pkg))
+            with profiler.stage('local_check', len(module_names)):
+                for module_name in module_names:
+                    # 检查是否是本地模块
+                    local_path = check_local_module_exists(module_name, list(search_paths))
+                    if local_path:
+                        # 这是本地模块，跳过安装
+                        local_modules.append((module_name, local_path))
+                    else:
+                        # 需要安装
+                        need_install.append((module_name, pip_pkg))
+    
+    return already_installed, local_modules, need_install
+
+
+def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, project_name: str, 
+                                  scan_root: Optional[Path] = None) -> Dict:
+    """
+    处理增强版安装流程
+
+    Returns:
+        运行摘要（第三方包、已安装、本地模块、安装成功/失败的包等），用于JSON输出
+    """
+    
+    third_party_packages = tracker.get_third_party_packages()
+    package_stats = tracker.get_package_stats()
+    
+    print_colored(f"\n📦 步骤4: 准备安装 {len(third_party_packages)} 个第三方包...", "blue")
+    
+    # 试运行和仅分析模式下不导入模块、不启动子进程
+    already_installed, local_modules, need_install = classify_third_party_packages(
+        tracker, scan_root, metadata_only=DRY_RUN or ANALYZE_ONLY
+    )
     
     if already_installed:
         print_colored(f"\n   ✓ 已安装 ({len(already_installed)}):", "green")
@@ -1569,10 +3837,39 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
     # 收集本地模块名称（用于从requirements中排除）
     local_module_names = set(module_name for module_name, _ in local_modules)
     
+    summary = {
+        'project': project_name,
+        'third_party': sorted(third_party_packages),
+        'already_installed': sorted(already_installed),
+        'local_modules': {module_name: str(local_path) for module_name, local_path in local_modules},
+        'to_install': {},
+        'installed': [],
+        'failed': {},
+        'requirements_file': None,
+    }
+    for import_name, pip_name in need_install:
+        summary['to_install'].setdefault(pip_name, []).append(import_name)
+    
+    if DRY_RUN:
+        print_colored("\n🔎 试运行: 不调用pip，不生成requirements.txt", "blue")
+        if need_install:
+            print_colored(f"   需要安装 {len(summary['to_install'])} 个包:", "yellow")
+            for pip_name, import_names in summary['to_install'].items():
+                safe_print(f"     • {pip_name} ({', '.join(import_names)})")
+        else:
+            print_colored("   🎉 所有包都已安装!", "green")
+        return summary
+    
     if not need_install:
         print_colored("\n🎉 所有包都已安装!", "green")
         failed_packages = set()
         failed_pip_packages = set()
+    elif ANALYZE_ONLY:
+        print_colored(f"\n🔎 仅分析: {len(summary['to_install'])} 个包未安装（不调用pip）", "yellow")
+        for pip_name, import_names in summary['to_install'].items():
+            safe_print(f"     • {pip_name} ({', '.join(import_names)})")
+        failed_packages = set()
+        failed_pip_packages = set()
     else:
         print_colored(f"\n⚙️  步骤5: 安装 {len(need_install)} 个缺失的包...", "blue")
         print_colored("   💡 提示: pip会自动安装依赖包(如numpy被wordcloud依赖)", "cyan")
@@ -1590,6 +3887,12 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
         failed_packages = set()  # 真正安装失败的包
         failed_pip_packages = set()  # 失败的pip包名
         
+        # 批量模式：一次pip调用安装全部缺失的包，再逐个输出结果
+        batch_results = None
+        if BATCH_INSTALL and len(pip_packages_to_install) > 1:
+            print_colored(f"   📦 批量安装: {' '.join(pip_packages_to_install)}", "cyan")
+            batch_results = install_packages_batch(pip_packages_to_install)
+        
         install_index = 0
         for pip_name, import_names in pip_packages_to_install.items():
             if not import_names:  # 安全检查：确保有模块需要安装
@@ -1602,11 +3905,14 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
             if len(import_names) > 1:
                 print(f"   (包含模块: {', '.join(import_names)})")
             
-            # 对于多个模块映射到同一个pip包的情况，传递所有模块名用于验证
-            is_success, msg, actual_pip_name = install_package(
-                import_name_for_check, pip_name, 
-                additional_modules=import_names[1:] if len(import_names) > 1 else None
-            )
+            if batch_results is not None and pip_name in batch_results:
+                is_success, msg, actual_pip_name = batch_results[pip_name]
+            else:
+                # 对于多个模块映射到同一个pip包的情况，传递所有模块名用于验证
+                is_success, msg, actual_pip_name = install_package(
+                    import_name_for_check, pip_name, 
+                    additional_modules=import_names[1:] if len(import_names) > 1 else None
+                )
             
             if is_success:
                 print_colored(f"   ✅ {msg}", "green")
@@ -1630,11 +3936,12 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
                 if not modules_to_check:
                     modules_to_check = import_names
                 
-                # 检查哪些模块能导入
+                # 检查哪些模块能导入（在同一个子进程中一次性验证）
                 if modules_to_check:  # 确保有模块需要检查
+                    import_results = verify_imports(list(modules_to_check) + list(import_names))
                     if verify_any:
                         # 只要有一个模块能导入，就不标记为完全失败
-                        can_import_any = any(check_package_installed(module) for module in modules_to_check)
+                        can_import_any = any(import_results[module].success for module in modules_to_check)
                         if not can_import_any:
                             # 所有模块都无法导入，标记为失败
                             for imp_name in import_names:
@@ -1643,7 +3950,7 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
                     else:
                         # 所有模块都必须能导入，检查哪些失败
                         for imp_name in import_names:
-                            if not check_package_installed(imp_name):
+                            if not import_results[imp_name].success:
                                 failed_packages.add(imp_name)
                 else:
                     # 如果没有模块需要检查，标记所有为失败
@@ -1672,6 +3979,9 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
             print_colored("\n💡 手动安装: pip install <包名>", "yellow")
         else:
             print_colored("🎉 全部安装成功!", "green")
+        
+        summary['installed'] = sorted(success_modules)
+        summary['failed'] = dict(failed)
     
     # 生成增强版requirements.txt
     if generate_req:
@@ -1684,6 +3994,7 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
                 local_packages=local_module_names
             )
             
+            summary['requirements_file'] = "requirements.txt"
             print_colored(f"   ✅ 已生成增强版 requirements.txt ({len(enhanced_requirements)} 个直接依赖)", "green")
             print_colored("   📋 包含详细的来源信息和使用统计", "cyan")
             print_colored("   🔍 每个包的文件路径和行号都已记录", "cyan")
@@ -1703,6 +4014,301 @@ def enhanced_process_installation(tracker: PackageTracker, generate_req: bool, p
     print_colored("\n" + "=" * 70, "cyan")
     print_colored("✨ 增强版包管理完成!", "bold")
     print_colored("=" * 70 + "\n", "cyan")
+    return summary
+
+
+def snapshot_python_files(root_path: str, scan_subdirs: bool = True) -> Dict[Path, Tuple[int, int]]:
+    """记录项目中所有Python文件的 (mtime_ns, 大小)，用于检测文件变化"""
+    snapshot = {}
+    for py_file in iter_python_files(root_path, scan_subdirs):
+        try:
+            st = py_file.stat()
+        except OSError:
+            continue  # 遍历期间被删除
+        snapshot[py_file] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+class ProjectWatcher:
+    """
+    在内存中保持项目的包追踪器，轮询检测文件变化并增量更新
+
+    通过定期比较文件的mtime和大小检测变化（不依赖inotify等额外依赖），
+    只重新解析新增或修改的文件，删除的文件从追踪器中撤回。
+    """
+
+    def __init__(self, scan_path: str, scan_subdirs: bool = True, extractor: Optional[str] = None):
+        self.scan_path = scan_path
+        self.scan_subdirs = scan_subdirs
+        self.extractor = extractor or EXTRACTOR_BACKEND
+        get_extractor(self.extractor)
+        self.snapshot: Dict[Path, Tuple[int, int]] = {}
+        self.tracker = PackageTracker()
+
+    def initial_scan(self) -> PackageTracker:
+        """完整扫描一次项目（仅分析和演练模式下与增量更新一样在当前进程中解析，不启动提取进程）"""
+        self.snapshot = snapshot_python_files(self.scan_path, self.scan_subdirs)
+        workers = 1 if ANALYZE_ONLY or DRY_RUN else None
+        self.tracker = build_package_tracker(sorted(self.snapshot), workers, backend=self.extractor)
+        return self.tracker
+
+    def poll(self) -> Tuple[List[Path], List[Path]]:
+        """
+        检测自上次轮询以来的变化
+
+        Returns:
+            (新增或修改的文件, 删除的文件)
+        """
+        current = snapshot_python_files(self.scan_path, self.scan_subdirs)
+        changed = [path for path, meta in current.items() if self.snapshot.get(path) != meta]
+        removed = [path for path in self.snapshot if path not in current]
+        self.snapshot = current
+        return sorted(changed), sorted(removed)
+
+    def apply_changes(self, changed: List[Path], removed: List[Path]) -> Tuple[Set[str], Set[str]]:
+        """
+        将文件变化应用到追踪器
+
+        Returns:
+            (新出现的第三方包, 不再使用的第三方包)
+        """
+        before = set(self.tracker.third_party_packages)
+        for path in removed:
+            self.tracker.remove_file(path)
+        try:
+            for path, imports in iter_extracted_imports(changed, workers=1, backend=self.extractor):
+                self.tracker.replace_file(path, imports)
+        finally:
+            clear_intern_tables()
+        after = self.tracker.third_party_packages
+        return after - before, before - after
+
+
+def watch_and_install(scan_path: Optional[str] = None, scan_subdirs: bool = True, generate_req: bool = True,
+                      interval: Optional[float] = None, extractor: Optional[str] = None,
+                      max_cycles: Optional[int] = None):
+    """
+    监视模式：首次完整扫描并安装，之后持续监视文件变化
+
+    只有第三方包集合发生变化时才重新执行安装流程和生成requirements.txt。
+
+    Args:
+        interval: 轮询间隔秒数（None=使用WATCH_INTERVAL配置）
+        max_cycles: 最多轮询次数（None=一直运行直到Ctrl+C）
+    """
+    if interval is None:
+        interval = WATCH_INTERVAL
+    if scan_path is None:
+        scan_path = os.getcwd()
+    scan_path = os.path.abspath(scan_path)
+    project_name = Path(scan_path).name
+    
+    print_colored("\n" + "=" * 70, "cyan")
+    print_colored("🚀 增强版Python项目智能包管理工具 - 监视模式", "bold")
+    print_colored("=" * 70, "cyan")
+    safe_print(f"\n📁 监视路径: {scan_path}")
+    
+    watcher = ProjectWatcher(scan_path, scan_subdirs, extractor)
+    tracker = watcher.initial_scan()
+    safe_print(f"   找到 {len(watcher.snapshot)} 个Python文件, {len(tracker.third_party_packages)} 个第三方包")
+    if tracker.third_party_packages:
+        enhanced_process_installation(tracker, generate_req, project_name, Path(scan_path))
+    
+    print_colored(f"\n👀 正在监视文件变化（每 {interval:g} 秒检查一次，Ctrl+C 退出）...", "cyan")
+    cycles = 0
+    try:
+        while max_cycles is None or cycles < max_cycles:
+            cycles += 1
+            time.sleep(interval)
+            changed, removed = watcher.poll()
+            if not changed and not removed:
+                continue
+            
+            added_packages, removed_packages = watcher.apply_changes(changed, removed)
+            safe_print(f"\n🔄 [{datetime.now().strftime('%H:%M:%S')}] "
+                       f"{len(changed)} 个文件变化, {len(removed)} 个文件删除")
+            if not added_packages and not removed_packages:
+                safe_print("   第三方包未变化")
+                continue
+            
+            if added_packages:
+                safe_print(f"   新增第三方包: {', '.join(sorted(added_packages))}")
+            if removed_packages:
+                safe_print(f"   不再使用的包: {', '.join(sorted(removed_packages))}")
+            enhanced_process_installation(watcher.tracker, generate_req, project_name, Path(scan_path))
+    except KeyboardInterrupt:
+        print_colored("\n👋 已停止监视", "cyan")
+
+
+def read_roots_manifest(manifest_file: str) -> List[str]:
+    """
+    读取项目列表文件：每行一个项目根目录，空行和#开头的行忽略，
+    相对路径相对于列表文件所在目录
+    """
+    manifest_path = Path(manifest_file).resolve()
+    roots = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            root = Path(line).expanduser()
+            if not root.is_absolute():
+                root = manifest_path.parent / root
+            roots.append(str(root))
+    return roots
+
+
+def analyze_project_root(scan_root: str, scan_subdirs: bool = True, extractor: Optional[str] = None) -> Dict:
+    """
+    分析单个项目（不安装、不导入模块、不启动子进程），返回该项目的报告
+
+    在当前进程中串行提取导入，不读写项目目录中的扫描缓存。
+
+    Raises:
+        ValueError: 项目根目录不存在
+    """
+    root = Path(scan_root).resolve()
+    if not root.is_dir():
+        raise ValueError(f"目录不存在: {scan_root}")
+    
+    with get_profiler().stage('discover'):
+        py_files = scan_python_files(str(root), scan_subdirs)
+    get_profiler().count('discover', len(py_files))
+    
+    tracker = build_package_tracker(py_files, workers=1, backend=extractor)
+    already_installed, local_modules, need_install = classify_third_party_packages(
+        tracker, root, metadata_only=True
+    )
+    
+    local_module_names = {module_name for module_name, _ in local_modules}
+    packages = {pkg: stat for pkg, stat in sorted(tracker.get_package_stats().items())
+                if pkg not in local_module_names}
+    to_install = {}
+    for import_name, pip_name in need_install:
+        to_install.setdefault(pip_name, []).append(import_name)
+    return {
+        'project': root.name,
+        'root': str(root),
+        'files': len(py_files),
+        'packages': packages,
+        'already_installed': sorted(already_installed),
+        'local_modules': {module_name: str(local_path) for module_name, local_path in local_modules},
+        'to_install': to_install,
+    }
+
+
+def build_dependency_matrix(reports: List[Dict]) -> Dict[str, Dict[str, int]]:
+    """跨项目依赖矩阵: {pip包名: {项目标签: 导入次数}}（按包名排序）"""
+    matrix = {}
+    for report in reports:
+        for stat in report.get('packages', {}).values():
+            row = matrix.setdefault(stat['pip_package'], {})
+            row[report['label']] = row.get(report['label'], 0) + stat['imports_count']
+    return {pip_name: matrix[pip_name] for pip_name in sorted(matrix, key=str.lower)}
+
+
+def write_batch_reports(reports: List[Dict], matrix: Dict[str, Dict[str, int]], output_dir: Path):
+    """
+    写出批量扫描结果:
+        <项目标签>.json         每个项目的报告
+        dependency_matrix.csv   跨项目依赖矩阵（行=pip包, 列=项目, 值=导入次数）
+        summary.json            所有项目的汇总和依赖矩阵
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for report in reports:
+        with open(output_dir / f"{report['label']}.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    labels = [report['label'] for report in reports]
+    with open(output_dir / "dependency_matrix.csv", 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['package'] + labels + ['projects'])
+        for pip_name, row in matrix.items():
+            writer.writerow([pip_name] + [row.get(label, 0) for label in labels] + [len(row)])
+    
+    summary = {
+        'projects': [{key: report[key] for key in ('label', 'root', 'files', 'error') if key in report}
+                     for report in reports],
+        'matrix': matrix,
+    }
+    with open(output_dir / "summary.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+# 批量分析输出目录中的汇总文件名，不能用作项目标签（否则项目报告会覆盖汇总文件）
+_RESERVED_LABELS = {'summary', 'dependency_matrix'}
+
+
+def _unique_labels(roots: List[str]) -> List[str]:
+    """用目录名作为项目标签，与其他标签或汇总文件重名时追加序号"""
+    labels = []
+    used = set(_RESERVED_LABELS)
+    for root in roots:
+        name = Path(root).resolve().name or "root"
+        label, index = name, 1
+        while label.lower() in used:
+            index += 1
+            label = f"{name}-{index}"
+        used.add(label.lower())
+        labels.append(label)
+    return labels
+
+
+def batch_scan(roots: List[str], scan_subdirs: bool = True, root_workers: Optional[int] = None,
+               output_dir: Optional[str] = None, extractor: Optional[str] = None) -> Dict:
+    """
+    在一个进程中分析多个项目（只分析，不安装）
+
+    所有项目共用已安装发行包索引、标准库集合和包名映射，解释器启动和环境检查只需一次。
+    与仅分析模式相同，不启动提取子进程，也不在被审计的仓库中写入扫描缓存。
+    项目分给root_workers个线程处理，线程只让目录遍历和文件读取等I/O相互重叠；
+    导入提取是纯Python计算，受GIL限制，总耗时仍接近逐个分析各项目之和。
+
+    Args:
+        roots: 项目根目录列表
+        root_workers: 处理项目的线程数（None=使用BATCH_ROOT_WORKERS配置）
+        output_dir: 报告输出目录（None=使用BATCH_OUTPUT_DIR配置）
+
+    Returns:
+        {'projects': 每个项目的报告列表, 'matrix': 跨项目依赖矩阵, 'output_dir': 输出目录}
+    """
+    if root_workers is None:
+        root_workers = BATCH_ROOT_WORKERS
+    output_path = Path(output_dir or BATCH_OUTPUT_DIR).resolve()
+    labels = _unique_labels(roots)
+    
+    print_colored("\n" + "=" * 70, "cyan")
+    print_colored(f"🚀 增强版Python项目智能包管理工具 - 批量分析 {len(roots)} 个项目", "bold")
+    print_colored("=" * 70, "cyan")
+    
+    # 共享状态在启动线程前准备好，各项目不再重复构建
+    get_installed_index()
+    
+    def analyze(index: int) -> Dict:
+        try:
+            report = analyze_project_root(roots[index], scan_subdirs, extractor)
+        except Exception as e:
+            root = Path(roots[index]).resolve()
+            report = {'project': root.name, 'root': str(root), 'files': 0, 'error': str(e)}
+        report['label'] = labels[index]
+        return report
+    
+    reports = [None] * len(roots)
+    with ThreadPoolExecutor(max_workers=max(1, root_workers)) as pool:
+        futures = {pool.submit(analyze, index): index for index in range(len(roots))}
+        for done, future in enumerate(as_completed(futures), 1):
+            report = reports[futures[future]] = future.result()
+            if 'error' in report:
+                print_colored(f"   [{done}/{len(roots)}] ❌ {report['label']}: {report['error']}", "red")
+            else:
+                safe_print(f"   [{done}/{len(roots)}] {report['label']}: {report['files']} 个文件, "
+                           f"{len(report['packages'])} 个第三方包, {len(report['to_install'])} 个未安装")
+    
+    matrix = build_dependency_matrix(reports)
+    write_batch_reports(reports, matrix, output_path)
+    print_colored(f"\n📊 共 {len(matrix)} 个不同的第三方包，报告已保存到: {output_path}", "green")
+    return {'projects': reports, 'matrix': matrix, 'output_dir': str(output_path)}
 
 
 def manual_install(imports_code: str, generate_req: bool = True):
@@ -1717,7 +4323,7 @@ def manual_install(imports_code: str, generate_req: bool = True):
     temp_file_path = Path("manual_imports")
     
     # 使用增强版提取函数获取详细的导入信息
-    imports_details = extract_imports_with_details(imports_code, temp_file_path)
+    imports_details = get_extractor()(imports_code, temp_file_path)
     
     if not imports_details:
         print_colored("   ⚠️  未检测到任何import语句", "yellow")
@@ -1739,16 +4345,286 @@ def manual_install(imports_code: str, generate_req: bool = True):
         return
     
     # 使用增强版安装流程（手动模式没有扫描路径）
-    enhanced_process_installation(tracker, generate_req, "manual_imports", None)
+    return enhanced_process_installation(tracker, generate_req, "manual_imports", None)
 
 
-if __name__ == "__main__":
-    # 检查命令行参数
-    if len(sys.argv) > 1:
-        SCAN_PATH = sys.argv[1]
+# ==================== 命令行与配置文件 ====================
+
+# 配置项名称 -> 模块级配置常量（命令行参数和 [tool.package_installer] 使用相同的名称）
+CONFIG_OPTIONS = {
+    'scan_subdirs': 'SCAN_SUBDIRS',
+    'exclude_dirs': 'EXCLUDE_DIRS',
+    'exclude_files': 'EXCLUDE_FILES',
+    'exclude_file_patterns': 'EXCLUDE_FILE_PATTERNS',
+    'generate_requirements': 'GENERATE_REQUIREMENTS',
+    'workers': 'EXTRACT_WORKERS',
+    'chunk_size': 'EXTRACT_CHUNK_SIZE',
+    'parallel_min_files': 'PARALLEL_MIN_FILES',
+    'stream': 'STREAM_MODE',
+    'extractor': 'EXTRACTOR_BACKEND',
+    'mapping_db': 'PACKAGE_MAPPING_DB',
+    'mmap_min_bytes': 'MMAP_EXTRACT_MIN_BYTES',
+    'scan_cache_file': 'SCAN_CACHE_FILE',
+    'batch_install': 'BATCH_INSTALL',
+    'install_batch_size': 'INSTALL_BATCH_SIZE',
+    'pypi_url': 'PYPI_JSON_URL',
+    'pypi_timeout': 'PYPI_TIMEOUT',
+    'pypi_max_workers': 'PYPI_MAX_WORKERS',
+    'pypi_cache_file': 'PYPI_CACHE_FILE',
+    'pip_install_timeout': 'PIP_INSTALL_TIMEOUT',
+    'pip_batch_timeout': 'PIP_BATCH_TIMEOUT',
+    'pip_show_timeout': 'PIP_SHOW_TIMEOUT',
+    'post_install_timeout': 'POST_INSTALL_TIMEOUT',
+    'verify_processes': 'VERIFY_PROCESSES',
+    'verify_timeout': 'VERIFY_TIMEOUT',
+    'watch': 'WATCH_MODE',
+    'watch_interval': 'WATCH_INTERVAL',
+    'dry_run': 'DRY_RUN',
+    'analyze_only': 'ANALYZE_ONLY',
+    'batch_root_workers': 'BATCH_ROOT_WORKERS',
+    'batch_output_dir': 'BATCH_OUTPUT_DIR',
+    'output_format': 'OUTPUT_FORMAT',
+    'profile_report_file': 'PROFILE_REPORT_FILE',
+    'profile_dump_file': 'PROFILE_DUMP_FILE',
+}
+
+# 列表类配置项：pyproject.toml和命令行的值都在默认配置基础上追加（不替换内置的排除规则）
+_APPENDED_OPTIONS = ('exclude_dirs', 'exclude_files', 'exclude_file_patterns')
+
+# 可以为None的配置项（其余配置项的类型必须与默认值一致）
+_NULLABLE_OPTIONS = {'workers', 'mapping_db', 'scan_cache_file', 'pypi_cache_file', 'profile_report_file', 'profile_dump_file'}
+
+# 文件路径类配置项（默认值可能为None，非None时必须是字符串）
+_PATH_OPTIONS = {'mapping_db', 'scan_cache_file', 'pypi_cache_file', 'batch_output_dir',
+                 'profile_report_file', 'profile_dump_file'}
+
+
+def _import_toml_parser():
+    """返回TOML解析模块（Python 3.11+ 的tomllib，其次tomli），都不可用时返回None"""
+    try:
+        import tomllib
+    except ImportError:  # Python 3.10及以下
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return None
+    return tomllib
+
+
+def load_pyproject_config(config_file: Path) -> Dict:
+    """
+    读取 pyproject.toml 中的 [tool.package_installer] 配置节
+
+    配置项名称与命令行参数相同（'-' 和 '_' 等价）。文件中没有该配置节时返回空字典。
+
+    Raises:
+        ValueError: 文件无法解析，或包含未知的配置项
+    """
+    tomllib = _import_toml_parser()
+    if tomllib is None:
+        raise ValueError("读取pyproject.toml需要Python 3.11+ 或安装tomli")
     
-    # 执行
-    if SCAN_MODE:
-        scan_and_install(SCAN_PATH, SCAN_SUBDIRS, GENERATE_REQUIREMENTS)
-    else:
-        manual_install(YOUR_IMPORTS, GENERATE_REQUIREMENTS)
+    try:
+        with open(config_file, 'rb') as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"无法读取配置文件 {config_file}: {e}")
+    
+    section = data.get('tool', {}).get(CONFIG_SECTION, {})
+    options = {key.replace('-', '_'): value for key, value in section.items()}
+    unknown = sorted(set(options) - set(CONFIG_OPTIONS))
+    if unknown:
+        raise ValueError(f"配置文件 {config_file} 中有未知的配置项: {', '.join(unknown)}")
+    return options
+
+
+def apply_config(options: Dict):
+    """
+    将配置项写入对应的模块级配置常量（_APPENDED_OPTIONS 中的列表类配置项追加到当前值）
+
+    Raises:
+        ValueError: 配置值的类型与默认值不一致
+    """
+    module_globals = globals()
+    for key, value in options.items():
+        name = CONFIG_OPTIONS[key]
+        default = module_globals[name]
+        if value is None:
+            if key not in _NULLABLE_OPTIONS:
+                raise ValueError(f"配置项 {key} 不能为空")
+        elif isinstance(default, (set, list)):
+            if isinstance(value, str) or not isinstance(value, (list, tuple, set)):
+                raise ValueError(f"配置项 {key} 应为列表")
+            if key in _APPENDED_OPTIONS:
+                value = list(dict.fromkeys(list(default) + list(value)))
+            value = type(default)(value)
+        elif isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"配置项 {key} 应为true/false")
+        elif isinstance(default, (int, float)) and not isinstance(default, bool):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"配置项 {key} 应为数字")
+        elif isinstance(default, str) or key in _PATH_OPTIONS:
+            if not isinstance(value, str):
+                raise ValueError(f"配置项 {key} 应为字符串")
+        module_globals[name] = value
+    if EXTRACTOR_BACKEND not in EXTRACTOR_BACKENDS:
+        raise ValueError(f"未知的提取后端: {EXTRACTOR_BACKEND}")
+    if OUTPUT_FORMAT not in ('text', 'json'):
+        raise ValueError(f"未知的输出格式: {OUTPUT_FORMAT}")
+
+
+def build_arg_parser():
+    """构造命令行参数解析器（只有显式给出的参数才会覆盖配置）"""
+    import argparse
+    
+    # --xxx / --no-xxx 开关: argparse.BooleanOptionalAction 需要Python 3.9+，旧版本使用等价实现
+    boolean_action = getattr(argparse, 'BooleanOptionalAction', None)
+    if boolean_action is None:
+        class boolean_action(argparse.Action):
+            def __init__(self, option_strings, dest, **kwargs):
+                option_strings = [name for option in option_strings
+                                  for name in ([option, '--no-' + option[2:]] if option.startswith('--') else [option])]
+                super().__init__(option_strings, dest, nargs=0, **kwargs)
+
+            def __call__(self, parser, namespace, values, option_string=None):
+                setattr(namespace, self.dest, not option_string.startswith('--no-'))
+    
+    parser = argparse.ArgumentParser(
+        prog="package_installer_yulibupt.py",
+        description="扫描Python项目的import语句，自动安装缺失的第三方包并生成requirements.txt",
+        argument_default=argparse.SUPPRESS,
+    )
+    parser.add_argument("path", nargs="?", help="扫描路径（默认当前目录）")
+    parser.add_argument("--config", metavar="FILE",
+                        help=f"配置文件（默认使用扫描路径下pyproject.toml的[tool.{CONFIG_SECTION}]）")
+    
+    group = parser.add_argument_group("扫描")
+    group.add_argument("--subdirs", dest="scan_subdirs", action=boolean_action,
+                       help="是否递归扫描子目录")
+    group.add_argument("--exclude-dir", dest="exclude_dirs", action="append", metavar="NAME",
+                       help="额外排除的目录名（可多次使用）")
+    group.add_argument("--exclude-file", dest="exclude_files", action="append", metavar="NAME",
+                       help="额外排除的文件名（可多次使用）")
+    group.add_argument("--exclude-pattern", dest="exclude_file_patterns", action="append", metavar="TEXT",
+                       help="额外排除文件名包含该关键词的文件（可多次使用）")
+    group.add_argument("--stream", action=boolean_action, help="流式扫描")
+    group.add_argument("--extractor", choices=sorted(EXTRACTOR_BACKENDS), help="import提取后端")
+    group.add_argument("--mapping-db", metavar="FILE", help="模块名→发行包名映射数据库（TSV）")
+    group.add_argument("--no-mapping-db", dest="mapping_db", action="store_const", const=None,
+                       help="不使用映射数据库")
+    group.add_argument("--mmap-min-bytes", type=int, metavar="BYTES",
+                       help="不小于该大小的文件使用mmap字节级提取（0=禁用）")
+    group.add_argument("--workers", type=int, metavar="N", help="提取进程数（1=串行）")
+    group.add_argument("--chunk-size", type=int, metavar="N", help="每个进程任务处理的文件数")
+    group.add_argument("--parallel-min-files", type=int, metavar="N", help="文件数少于该值时串行提取")
+    group.add_argument("--cache", dest="scan_cache_file", metavar="FILE", help="扫描缓存文件名")
+    group.add_argument("--no-cache", dest="scan_cache_file", action="store_const", const=None,
+                       help="禁用扫描缓存")
+    
+    group = parser.add_argument_group("批量分析")
+    group.add_argument("--roots", nargs="+", metavar="PATH", help="在一个进程中分析多个项目（只分析，不安装）")
+    group.add_argument("--manifest", metavar="FILE", help="项目列表文件（每行一个项目根目录）")
+    group.add_argument("--root-workers", dest="batch_root_workers", type=int, metavar="N",
+                       help="处理项目的线程数（只重叠文件读取等I/O，导入提取仍是串行的）")
+    group.add_argument("--output-dir", dest="batch_output_dir", metavar="DIR", help="批量分析的报告输出目录")
+    
+    group = parser.add_argument_group("安装")
+    group.add_argument("--dry-run", action="store_true", help="只分析并列出需要安装的包，不调用pip")
+    group.add_argument("--analyze-only", action="store_true",
+                       help="只分析并生成requirements.txt，不启动子进程、不导入被检测的模块")
+    group.add_argument("--batch", dest="batch_install", action=boolean_action,
+                       help="将缺失的包合并为一次pip调用")
+    group.add_argument("--batch-size", dest="install_batch_size", type=int, metavar="N",
+                       help="每次pip调用最多安装的包数（0=不限制）")
+    group.add_argument("--pip-timeout", dest="pip_install_timeout", type=int, metavar="SECONDS",
+                       help="每个包的pip安装超时时间")
+    group.add_argument("--pip-batch-timeout", dest="pip_batch_timeout", type=int, metavar="SECONDS",
+                       help="一次批量pip调用的超时上限（超时后逐个安装）")
+    group.add_argument("--verify-processes", type=int, metavar="N", help="导入验证的子进程数")
+    group.add_argument("--verify-timeout", type=float, metavar="SECONDS", help="导入验证子进程的超时时间")
+    group.add_argument("--pypi-url", metavar="URL", help="PyPI JSON API地址")
+    group.add_argument("--pypi-timeout", type=float, metavar="SECONDS", help="PyPI查询超时时间")
+    group.add_argument("--pypi-cache", dest="pypi_cache_file", metavar="FILE", help="PyPI查询缓存文件")
+    group.add_argument("--no-pypi-cache", dest="pypi_cache_file", action="store_const", const=None,
+                       help="只在进程内缓存PyPI查询结果")
+    
+    group = parser.add_argument_group("输出")
+    group.add_argument("--requirements", dest="generate_requirements", action=boolean_action,
+                       help="是否生成requirements.txt")
+    group.add_argument("--format", dest="output_format", choices=["text", "json"], help="结果输出格式")
+    group.add_argument("--report", dest="profile_report_file", metavar="FILE", help="输出各阶段耗时的JSON报告")
+    group.add_argument("--profile", dest="profile_dump_file", metavar="FILE", help="输出cProfile结果")
+    group.add_argument("--watch", action="store_true", help="监视模式：文件变化时增量重新分析")
+    group.add_argument("--interval", dest="watch_interval", type=float, metavar="SECONDS",
+                       help="监视模式的轮询间隔")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+
+    配置优先级: 命令行参数 > pyproject.toml的[tool.package_installer] > 脚本顶部的配置常量
+
+    Returns:
+        退出码（0=成功, 1=有包安装失败, 2=参数或配置错误）
+    """
+    parser = build_arg_parser()
+    args = vars(parser.parse_args(argv))
+    scan_path = args.pop('path', None) or SCAN_PATH
+    config_file = args.pop('config', None)
+    roots = args.pop('roots', [])
+    manifest = args.pop('manifest', None)
+    
+    config_warning = None
+    try:
+        options = {}
+        if config_file is None:
+            candidate = Path(scan_path or os.getcwd()) / "pyproject.toml"
+            # 自动发现的配置文件在无法解析TOML时跳过（只有--config指定的文件才必须读取）
+            if candidate.is_file() and _import_toml_parser() is None:
+                config_warning = f"   ⚠️  未安装tomli（Python 3.10及以下需要），忽略配置文件 {candidate}"
+            elif candidate.is_file():
+                config_file = candidate
+        if config_file is not None:
+            options.update(load_pyproject_config(Path(config_file)))
+        # 列表类参数: 默认配置 + pyproject.toml + 命令行（追加到默认值由apply_config完成）
+        for key in _APPENDED_OPTIONS:
+            if key in args:
+                args[key] = list(options.get(key, [])) + args[key]
+        options.update(args)
+        apply_config(options)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if manifest:
+        try:
+            roots = roots + read_roots_manifest(manifest)
+        except OSError as e:
+            parser.error(f"无法读取项目列表文件: {e}")
+    
+    # JSON格式时过程信息输出到stderr，stdout只输出最终的JSON摘要
+    output = sys.stdout
+    progress = sys.stderr if OUTPUT_FORMAT == 'json' else sys.stdout
+    with redirect_stdout(progress):
+        if config_warning:
+            print_colored(config_warning, "yellow")
+        if roots:
+            summary = batch_scan(roots, SCAN_SUBDIRS)
+        elif SCAN_MODE and WATCH_MODE:
+            watch_and_install(scan_path, SCAN_SUBDIRS, GENERATE_REQUIREMENTS)
+            return 0
+        elif SCAN_MODE:
+            summary = scan_and_install(scan_path, SCAN_SUBDIRS, GENERATE_REQUIREMENTS)
+        else:
+            summary = manual_install(YOUR_IMPORTS, GENERATE_REQUIREMENTS)
+    
+    summary = summary or {}
+    if OUTPUT_FORMAT == 'json':
+        output.write(json.dumps(summary, indent=2, ensure_ascii=False) + "\n")
+    return 1 if summary.get('failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
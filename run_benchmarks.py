@@ -0,0 +1,362 @@
+"""
+性能基准测试
+
+使用方法:
+    python run_benchmarks.py                          # 在合成项目上测量扫描→提取→追踪→生成各阶段
+    python run_benchmarks.py --files 2000 --depth 4   # 指定合成项目的规模
+    python run_benchmarks.py --save-baseline base.json  # 保存结果作为基线
+    python run_benchmarks.py --compare base.json      # 与基线对比，变慢超过阈值时返回非零退出码
+    python run_benchmarks.py --extractors             # 对比各import提取后端在大文件上的耗时
+    python run_benchmarks.py --patterns               # 对比逐行正则和包名模式匹配在预编译前后的单次耗时
+"""
+import sys
+import io
+import json
+import time
+import random
+import re
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from package_installer_yulibupt import (  # noqa: E402
+    EXTRACTOR_BACKENDS,
+    PACKAGE_MAPPING,
+    PACKAGE_PATTERNS,
+    PackagePatternMatcher,
+    _strip_comment,
+    _FROM_IMPORT_PATTERN,
+    _IMPORT_PATTERN,
+    PackageTracker,
+    scan_python_files,
+    read_file_safely,
+    extract_imports_with_details,
+    generate_enhanced_requirements,
+)
+
+# 合成项目中使用的模块名
+STDLIB_MODULES = ['os', 'sys', 'json', 're', 'time', 'pathlib', 'collections', 'typing', 'itertools', 'logging']
+THIRD_PARTY_MODULES = ['requests', 'numpy', 'pandas', 'flask', 'click', 'tqdm'] + sorted(PACKAGE_MAPPING)[:20]
+
+# 基线对比时默认允许的变慢比例
+DEFAULT_THRESHOLD = 0.2
+
+
+def generate_large_source(lines: int) -> str:
+    """生成合成的大文件源码：少量导入 + 大量普通代码（模拟生成的数据表模块）"""
+    parts = [
+        "import os",
+        "import sys, json",
+        "from collections import (",
+        "    OrderedDict,",
+        "    defaultdict,",
+        ")",
+        "import numpy as np  # 数值计算",
+        "",
+    ]
+    block = [
+        "def func_{i}(x):",
+        "    \"\"\"docstring mentioning import statements\"\"\"",
+        "    if x > {i}:",
+        "        import requests",
+        "        return requests.get('http://example.com/{i}')",
+        "    data = {{'key_{i}': [{i}, {i}, {i}], 'name': \"value_{i}\"}}",
+        "    return data",
+        "",
+    ]
+    i = 0
+    while len(parts) < lines:
+        parts.extend(line.format(i=i) for line in block)
+        i += 1
+    return "\n".join(parts[:lines]) + "\n"
+
+
+def generate_module_source(rng: random.Random, imports: int, multiline_ratio: float, index: int) -> str:
+    """生成单个合成模块：混合标准库、第三方、本地模块的各种导入形式"""
+    lines = [f'"""synthetic module {index}"""']
+    for i in range(imports):
+        kind = rng.random()
+        if kind < 0.4:
+            module = rng.choice(STDLIB_MODULES)
+        elif kind < 0.85:
+            module = rng.choice(THIRD_PARTY_MODULES)
+        else:
+            module = f"local_mod{rng.randrange(50)}"
+        if rng.random() < multiline_ratio:
+            lines.append(f"from {module} import (\n    name_a{i},\n    name_b{i},  # 注释\n)")
+        elif rng.random() < 0.5:
+            lines.append(f"import {module}")
+        else:
+            lines.append(f"from {module} import name{i} as alias{i}")
+    lines.append("")
+    for i in range(imports * 3):
+        lines.append(f"def func_{i}(x):\n    text = 'import fake_{i}'\n    return x + {i}\n")
+    return "\n".join(lines)
+
+
+def generate_synthetic_project(root: Path, files: int, imports_per_file: int = 10, depth: int = 2,
+                               multiline_ratio: float = 0.2, seed: int = 0) -> List[Path]:
+    """
+    在root下生成合成项目（相同参数和seed生成的项目完全相同）
+
+    Args:
+        files: Python文件数
+        imports_per_file: 每个文件的导入语句数
+        depth: 目录嵌套深度（0=所有文件在根目录）
+        multiline_ratio: 多行括号导入所占比例
+    """
+    rng = random.Random(seed)
+    created = []
+    for index in range(files):
+        directory = root
+        for level in range(depth):
+            directory = directory / f"pkg{level}_{(index >> level) % 4}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"module_{index}.py"
+        path.write_text(generate_module_source(rng, imports_per_file, multiline_ratio, index), encoding='utf-8')
+        created.append(path)
+    return created
+
+
+def _measure(func: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """测量一个阶段：多次计时取最佳值，再单独运行一次测量峰值内存（tracemalloc会拖慢计时）"""
+    best = float('inf')
+    items = 0
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        items = func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': best,
+        'items': items,
+        'throughput': items / best if best > 0 else 0.0,
+        'peak_kb': peak / 1024,
+    }
+
+
+def bench_pipeline(files: int, imports_per_file: int, depth: int, multiline_ratio: float,
+                   repeat: int, seed: int = 0) -> Dict:
+    """在合成项目上分别测量 扫描 → 读取 → 提取 → 追踪 → 生成requirements 各阶段"""
+    root = Path(tempfile.mkdtemp(prefix="pkg_bench_"))
+    try:
+        generate_synthetic_project(root, files, imports_per_file, depth, multiline_ratio, seed)
+        py_files = scan_python_files(str(root))
+        contents = [read_file_safely(path) for path in py_files]
+        all_imports = [imp for path, text in zip(py_files, contents)
+                       for imp in extract_imports_with_details(text, path)]
+        tracker = PackageTracker()
+        for imp in all_imports:
+            tracker.add_import(imp)
+        output_file = root / "requirements.txt"
+
+        def discover():
+            return len(scan_python_files(str(root)))
+
+        def read():
+            return len([read_file_safely(path) for path in py_files])
+
+        def extract():
+            return sum(len(extract_imports_with_details(text, path)) for path, text in zip(py_files, contents))
+
+        def track():
+            new_tracker = PackageTracker()
+            for imp in all_imports:
+                new_tracker.add_import(imp)
+            return len(all_imports)
+
+        def requirements():
+            # 生成函数会打印提示并备份旧文件，基准测试中屏蔽输出并每次从空目录开始
+            for old in root.glob("requirements*.txt*"):
+                old.unlink()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_enhanced_requirements(tracker, str(output_file), "benchmark")
+            return len(tracker.all_packages)
+
+        stages = {}
+        for name, func in [('discover', discover), ('read', read), ('extract', extract),
+                           ('track', track), ('requirements', requirements)]:
+            stages[name] = _measure(func, repeat)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        'config': {'files': files, 'imports_per_file': imports_per_file, 'depth': depth,
+                   'multiline_ratio': multiline_ratio, 'seed': seed},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'stages': stages,
+    }
+
+
+def print_results(results: Dict):
+    """打印各阶段结果"""
+    config = results['config']
+    print(f"合成项目: {config['files']} 个文件, 每个文件 {config['imports_per_file']} 个导入, "
+          f"嵌套深度 {config['depth']}, 多行导入比例 {config['multiline_ratio']}")
+    print(f"{'阶段':<14}{'最佳耗时(s)':>14}{'条目':>10}{'条目/秒':>16}{'峰值内存(KB)':>16}")
+    for name, stage in results['stages'].items():
+        print(f"{name:<14}{stage['seconds']:>14.4f}{stage['items']:>10}"
+              f"{stage['throughput']:>16,.0f}{stage['peak_kb']:>16,.0f}")
+
+
+def compare_results(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    与基线对比各阶段耗时和峰值内存
+
+    Returns:
+        超过阈值的回退描述列表（为空表示没有回退）
+    """
+    regressions = []
+    if results.get('config') != baseline.get('config'):
+        print("⚠️  基线的合成项目配置与本次不同，对比结果仅供参考")
+    print(f"\n{'阶段':<14}{'耗时变化':>12}{'内存变化':>12}")
+    for name, stage in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base:
+            continue
+        time_ratio = stage['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        memory_ratio = stage['peak_kb'] / base['peak_kb'] if base['peak_kb'] > 0 else 1.0
+        print(f"{name:<14}{time_ratio - 1:>+12.1%}{memory_ratio - 1:>+12.1%}")
+        if time_ratio > 1 + threshold:
+            regressions.append(f"{name}: 耗时 {base['seconds']:.4f}s → {stage['seconds']:.4f}s")
+        if memory_ratio > 1 + threshold:
+            regressions.append(f"{name}: 峰值内存 {base['peak_kb']:.0f}KB → {stage['peak_kb']:.0f}KB")
+    return regressions
+
+
+def bench_extractors(lines: int, repeat: int):
+    """对比各提取后端在大文件上的耗时"""
+    source = generate_large_source(lines)
+    file_path = Path("synthetic_large.py")
+    print(f"合成文件: {lines} 行, {len(source) / 1024 / 1024:.1f} MB")
+    print(f"{'后端':<10}{'最佳耗时(s)':>14}{'行/秒':>16}{'导入数':>10}")
+    for name, extractor in sorted(EXTRACTOR_BACKENDS.items()):
+        best = float('inf')
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = len(extractor(source, file_path))
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<10}{best:>14.3f}{lines / best:>16,.0f}{count:>10}")
+
+
+def _legacy_match_line(line: str):
+    """预编译之前的逐行匹配方式：每次传入模式字符串，经re模块的模式缓存查找"""
+    stripped = re.sub(r'#.*$', '', line).strip()
+    return (re.match(r'^\s*from\s+([a-zA-Z_.][a-zA-Z0-9_.]*)\s+import', stripped)
+            or re.match(r'^\s*import\s+(.+)$', stripped))
+
+
+def _compiled_match_line(line: str):
+    """当前的逐行匹配方式：使用预编译的模式"""
+    stripped = _strip_comment(line).strip()
+    return _FROM_IMPORT_PATTERN.match(stripped) or _IMPORT_PATTERN.match(stripped)
+
+
+def _legacy_pattern_lookup(name: str, patterns: List):
+    """预编译之前的包名模式匹配方式：逐个 re.match"""
+    for pattern, pip_name in patterns:
+        if re.match(pattern, name):
+            return pip_name
+    return None
+
+
+def _time_per_item(func: Callable, items: List, repeat: int) -> float:
+    """多次计时取最佳值，返回每个条目的纳秒数"""
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e9
+
+
+def bench_patterns(lines: int, pattern_count: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    对比预编译前后的单次耗时（纳秒）:
+        line: 逐行移除注释并匹配 from/import 语句
+        package_pattern: 在 pattern_count 条 PACKAGE_PATTERNS 规则中查找模块名
+    """
+    corpus = generate_large_source(lines).split('\n')
+    patterns = list(PACKAGE_PATTERNS) + [(f'^vendor{i}_', f'vendor{i}-sdk')
+                                         for i in range(max(0, pattern_count - len(PACKAGE_PATTERNS)))]
+    rng = random.Random(0)
+    names = [rng.choice(THIRD_PARTY_MODULES + STDLIB_MODULES) for _ in range(lines // 2)]
+    names += [f'vendor{rng.randrange(max(1, pattern_count))}_mod' for _ in range(lines // 10)] + ['win32api'] * 100
+    matcher = PackagePatternMatcher(patterns)
+    for name in names:
+        assert matcher.match(name) == _legacy_pattern_lookup(name, patterns)
+    return {
+        'line': {'before': _time_per_item(_legacy_match_line, corpus, repeat),
+                 'after': _time_per_item(_compiled_match_line, corpus, repeat)},
+        'package_pattern': {'before': _time_per_item(lambda n: _legacy_pattern_lookup(n, patterns), names, repeat),
+                            'after': _time_per_item(matcher.match, names, repeat)},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="包管理工具性能基准测试")
+    parser.add_argument("--files", type=int, default=500, help="合成项目的文件数")
+    parser.add_argument("--imports", type=int, default=10, help="每个文件的导入语句数")
+    parser.add_argument("--depth", type=int, default=2, help="目录嵌套深度")
+    parser.add_argument("--multiline", type=float, default=0.2, help="多行括号导入所占比例")
+    parser.add_argument("--seed", type=int, default=0, help="合成项目的随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数")
+    parser.add_argument("--save-baseline", metavar="FILE", help="将结果保存为基线JSON")
+    parser.add_argument("--compare", metavar="FILE", help="与基线JSON对比")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="允许的变慢/内存增长比例（默认0.2即20%%）")
+    parser.add_argument("--extractors", action="store_true", help="只对比各import提取后端")
+    parser.add_argument("--lines", type=int, default=100000, help="提取后端/正则对比使用的合成文件行数")
+    parser.add_argument("--patterns", action="store_true", help="只对比预编译前后的正则单次耗时")
+    parser.add_argument("--pattern-count", type=int, default=50, help="包名模式匹配对比使用的规则数")
+    args = parser.parse_args(argv)
+
+    if args.extractors:
+        bench_extractors(args.lines, args.repeat)
+        return 0
+    
+    if args.patterns:
+        print(f"合成语料: {args.lines} 行, {args.pattern_count} 条包名模式")
+        print(f"{'对比项':<18}{'预编译前(ns)':>14}{'预编译后(ns)':>14}{'加速比':>10}")
+        for name, result in bench_patterns(args.lines, args.pattern_count, args.repeat).items():
+            print(f"{name:<18}{result['before']:>14.0f}{result['after']:>14.0f}"
+                  f"{result['before'] / result['after']:>9.1f}x")
+        return 0
+
+    results = bench_pipeline(args.files, args.imports, args.depth, args.multiline, args.repeat, args.seed)
+    print_results(results)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\n基线已保存到 {args.save_baseline}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ 检测到 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）:")
+            for line in regressions:
+                print(f"   • {line}")
+            return 1
+        print("\n✅ 没有超过阈值的性能回退")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -34,9 +34,21 @@ def run_all_tests(verbosity=2):
         'tests.test_file_operations',        # 文件操作测试
         'tests.test_package_tracker',        # 包追踪器测试
         'tests.test_package_mapping',        # 包名映射测试
+        'tests.test_mapping_database',       # 映射数据库测试
         'tests.test_special_handling',       # 特殊包处理测试
         'tests.test_requirements_generation', # Requirements生成测试
         'tests.test_local_modules',          # 本地模块测试（新增）
+        'tests.test_parallel_extraction',    # 并行提取测试
+        'tests.test_scan_cache',             # 扫描缓存测试
+        'tests.test_batch_install',          # 批量安装测试
+        'tests.test_pypi_resolution',        # PyPI并发查询测试
+        'tests.test_installed_index',        # 已安装包索引测试
+        'tests.test_import_verification',    # 子进程导入验证测试
+        'tests.test_benchmarks',             # 基准测试工具测试
+        'tests.test_profiling',              # 阶段计时测试
+        'tests.test_watch_mode',             # 监视模式测试
+        'tests.test_cli',                    # 命令行与配置文件测试
+        'tests.test_batch_scan',             # 多项目批量分析测试
         'tests.test_integration',            # 集成测试
     ]
     
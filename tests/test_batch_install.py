@@ -0,0 +1,185 @@
+"""
+测试批量安装功能
+覆盖: install_packages_batch, verify_installed_package
+"""
+import subprocess
+import unittest
+from unittest.mock import patch, ANY
+from package_installer_yulibupt import (
+    install_packages_batch,
+    install_package,
+    verify_installed_package,
+    ImportCheckResult,
+    _run_pip_install,
+)
+
+
+def _fake_pip(bad_packages=(), timeout_packages=()):
+    """构造模拟的pip调用：包含任一坏包的调用整体失败"""
+    calls = []
+
+    def run(pip_packages):
+        calls.append(list(pip_packages))
+        if any(name in timeout_packages for name in pip_packages):
+            raise subprocess.TimeoutExpired(cmd="pip", timeout=300)
+        bad = [name for name in pip_packages if name in bad_packages]
+        if bad:
+            return subprocess.CompletedProcess(
+                args=[], returncode=1, stdout="",
+                stderr=f"ERROR: No matching distribution found for {bad[0]}"
+            )
+        return subprocess.CompletedProcess(args=[], returncode=0, stdout="ok", stderr="")
+
+    return run, calls
+
+
+class TestInstallPackagesBatch(unittest.TestCase):
+    """测试批量安装与二分定位失败包"""
+
+    def setUp(self):
+        """模拟验证步骤，避免真实导入"""
+        patcher = patch('package_installer_yulibupt.verify_installed_package',
+                        side_effect=lambda pkg, pip, extra=None, import_results=None: (True, "安装并验证成功", pip))
+        self.mock_verify = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('package_installer_yulibupt.verify_imports',
+                        side_effect=lambda modules: {m: ImportCheckResult(m, True) for m in modules})
+        self.mock_verify_imports = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('package_installer_yulibupt.try_install_with_variants',
+                        return_value=(False, "未找到", None))
+        self.mock_variants = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('package_installer_yulibupt.resolve_pypi_names', return_value={})
+        self.mock_resolve = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_pip_invocation_for_all_packages(self):
+        """测试所有包合并为一次pip调用"""
+        run, calls = _fake_pip()
+        packages = {'requests': ['requests'], 'pillow': ['PIL'], 'pyyaml': ['yaml']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            results = install_packages_batch(packages, batch_size=0)
+        self.assertEqual(calls, [['requests', 'pillow', 'pyyaml']])
+        self.assertEqual(list(results), ['requests', 'pillow', 'pyyaml'])
+        self.assertTrue(all(result[0] for result in results.values()))
+        self.mock_verify.assert_any_call('PIL', 'pillow', None, import_results=ANY)
+        # 所有包的导入验证合并为一次子进程调用
+        self.mock_verify_imports.assert_called_once_with(['requests', 'PIL', 'yaml'])
+
+    def test_bisect_isolates_failing_package(self):
+        """测试整组失败时二分定位出错的包"""
+        run, calls = _fake_pip(bad_packages={'not-a-real-pkg'})
+        packages = {name: [name] for name in ['a', 'b', 'not-a-real-pkg', 'c']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            results = install_packages_batch(packages, batch_size=0)
+        self.assertFalse(results['not-a-real-pkg'][0])
+        self.assertIn("No matching distribution", results['not-a-real-pkg'][1])
+        for name in ['a', 'b', 'c']:
+            self.assertTrue(results[name][0])
+        self.assertIn(['not-a-real-pkg'], calls)
+        # 失败包先批量查询PyPI，再进入智能查找流程
+        self.mock_resolve.assert_called_once_with(['not-a-real-pkg'])
+        self.mock_variants.assert_called_once_with('not-a-real-pkg', 'not-a-real-pkg')
+
+    def test_batch_size_groups_invocations(self):
+        """测试按batch_size分组调用pip"""
+        run, calls = _fake_pip()
+        packages = {name: [name] for name in ['a', 'b', 'c']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            install_packages_batch(packages, batch_size=2)
+        self.assertEqual(calls, [['a', 'b'], ['c']])
+
+    def test_timeout_reported_per_package(self):
+        """测试超时的包单独标记为超时"""
+        run, _ = _fake_pip(timeout_packages={'slow'})
+        packages = {'fast': ['fast'], 'slow': ['slow']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            results = install_packages_batch(packages, batch_size=0)
+        self.assertTrue(results['fast'][0])
+        self.assertEqual(results['slow'], (False, "安装超时(>5分钟)", None))
+
+    def test_timeout_falls_back_to_individual_installs(self):
+        """测试整组超时后不再二分，而是逐个安装（慢的包只再超时一次）"""
+        run, calls = _fake_pip(bad_packages={'bad'}, timeout_packages={'slow'})
+        packages = {name: [name] for name in ['a', 'slow', 'b', 'bad']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            results = install_packages_batch(packages, batch_size=0)
+        self.assertEqual(calls, [['a', 'slow', 'b', 'bad'], ['a'], ['slow'], ['b'], ['bad']])
+        self.assertTrue(results['a'][0] and results['b'][0])
+        self.assertEqual(results['slow'], (False, "安装超时(>5分钟)", None))
+        self.assertFalse(results['bad'][0])
+
+    def test_batch_timeout_capped(self):
+        """测试批量调用的超时时间不随包数无限增长"""
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout="", stderr="")
+        with patch('package_installer_yulibupt.PIP_INSTALL_TIMEOUT', 300), \
+             patch('package_installer_yulibupt.PIP_BATCH_TIMEOUT', 900), \
+             patch('package_installer_yulibupt.subprocess.run', return_value=completed) as mock_run:
+            _run_pip_install(['a'])
+            _run_pip_install(['a', 'b'])
+            _run_pip_install([f"pkg{i}" for i in range(50)])
+        self.assertEqual([call.kwargs['timeout'] for call in mock_run.call_args_list], [300, 600, 900])
+
+    def test_additional_modules_passed_to_verification(self):
+        """测试多模块映射到同一pip包时传递额外模块用于验证"""
+        run, _ = _fake_pip()
+        packages = {'pywin32': ['win32api', 'win32con']}
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            install_packages_batch(packages)
+        self.mock_verify.assert_called_once_with('win32api', 'pywin32', ['win32con'], import_results=ANY)
+
+    def test_empty_input(self):
+        """测试空输入不调用pip"""
+        run, calls = _fake_pip()
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            self.assertEqual(install_packages_batch({}), {})
+        self.assertEqual(calls, [])
+
+
+class TestVerifyInstalledPackage(unittest.TestCase):
+    """测试安装后的导入验证使用批量结果"""
+
+    def test_uses_prefetched_results(self):
+        """测试已有批量结果时不再启动验证进程"""
+        results = {'yaml': ImportCheckResult('yaml', True, 0.01)}
+        with patch('package_installer_yulibupt.verify_imports') as mock_verify_imports:
+            outcome = verify_installed_package('yaml', 'pyyaml', import_results=results)
+        self.assertEqual(outcome, (True, "安装并验证成功", 'pyyaml'))
+        mock_verify_imports.assert_not_called()
+
+    def test_missing_results_verified_in_one_call(self):
+        """测试所有待验证模块在一次调用中验证"""
+        with patch('package_installer_yulibupt.verify_imports',
+                   side_effect=lambda modules: {m: ImportCheckResult(m, True) for m in modules}) as mock_verify_imports:
+            outcome = verify_installed_package('foo', 'foo', ['foo_extra'])
+        self.assertTrue(outcome[0])
+        mock_verify_imports.assert_called_once_with(['foo', 'foo_extra'])
+
+
+class TestInstallPackageRefactor(unittest.TestCase):
+    """测试单包安装仍使用相同的流程"""
+
+    def test_install_success_runs_verification(self):
+        """测试pip成功后执行验证"""
+        run, calls = _fake_pip()
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run), \
+             patch('package_installer_yulibupt.verify_installed_package',
+                   return_value=(True, "安装并验证成功", "requests")) as mock_verify:
+            result = install_package('requests', 'requests')
+        self.assertEqual(result, (True, "安装并验证成功", "requests"))
+        self.assertEqual(calls, [['requests']])
+        mock_verify.assert_called_once_with('requests', 'requests', None)
+
+    def test_install_failure_without_retry(self):
+        """测试pip失败且不重试时返回错误信息"""
+        run, _ = _fake_pip(bad_packages={'missing'})
+        with patch('package_installer_yulibupt._run_pip_install', side_effect=run):
+            success, msg, actual = install_package('missing', 'missing', auto_retry=False)
+        self.assertFalse(success)
+        self.assertIn("No matching distribution", msg)
+        self.assertIsNone(actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+测试多项目批量分析
+覆盖: batch_scan, analyze_project_root, read_roots_manifest, build_dependency_matrix
+"""
+import io
+import csv
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
+from package_installer_yulibupt import (
+    batch_scan,
+    analyze_project_root,
+    read_roots_manifest,
+    build_dependency_matrix,
+    _unique_labels,
+)
+
+
+class _BatchTestCase(unittest.TestCase):
+    """创建包含多个项目的临时目录"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self._write("alpha/app.py", "import requests\nimport numpy as np\nimport helper\n")
+        self._write("alpha/helper.py", "import os\n")
+        self._write("beta/pkg/main.py", "import requests\nfrom requests import get\nimport pip\n")
+        self._write("other/alpha/run.py", "import pip\n")
+
+    def _write(self, relative, text):
+        path = self.test_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        return path
+
+
+class TestAnalyzeProjectRoot(_BatchTestCase):
+    """测试单个项目的报告"""
+
+    def test_report(self):
+        """测试报告包含第三方包统计，本地模块不计入"""
+        with patch('package_installer_yulibupt.subprocess.run', side_effect=AssertionError("不应启动子进程")):
+            report = analyze_project_root(str(self.test_dir / "alpha"))
+        self.assertEqual(report['files'], 2)
+        self.assertEqual(sorted(report['packages']), ['numpy', 'requests'])
+        self.assertIn('helper', report['local_modules'])
+        self.assertEqual(report['packages']['requests']['imports_count'], 1)
+
+    def test_missing_root(self):
+        """测试目录不存在时报错"""
+        with self.assertRaises(ValueError):
+            analyze_project_root(str(self.test_dir / "missing"))
+
+
+class TestBatchScan(_BatchTestCase):
+    """测试批量分析、依赖矩阵和报告文件"""
+
+    def _scan(self, roots):
+        output_dir = self.test_dir / "out"
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = batch_scan([str(self.test_dir / root) for root in roots],
+                                root_workers=2, output_dir=str(output_dir))
+        return result, output_dir
+
+    def test_matrix_and_reports(self):
+        """测试每个项目的报告与跨项目依赖矩阵"""
+        result, output_dir = self._scan(["alpha", "beta", "other/alpha", "missing"])
+        self.assertEqual([r['label'] for r in result['projects']], ['alpha', 'beta', 'alpha-2', 'missing'])
+        self.assertIn('error', result['projects'][3])
+        self.assertEqual(result['matrix']['requests'], {'alpha': 1, 'beta': 2})
+        self.assertEqual(result['matrix']['pip'], {'beta': 1, 'alpha-2': 1})
+        self.assertEqual(list(result['matrix']), ['numpy', 'pip', 'requests'])
+
+        report = json.loads((output_dir / "alpha-2.json").read_text(encoding='utf-8'))
+        self.assertEqual(report['root'], str((self.test_dir / "other" / "alpha").resolve()))
+        with open(output_dir / "dependency_matrix.csv", encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['package', 'alpha', 'beta', 'alpha-2', 'missing', 'projects'])
+        self.assertEqual(rows[3], ['requests', '1', '2', '0', '0', '2'])
+        summary = json.loads((output_dir / "summary.json").read_text(encoding='utf-8'))
+        self.assertEqual(len(summary['projects']), 4)
+
+    def test_no_process_pool_or_cache(self):
+        """测试文件再多也不启动提取进程池，且不在被审计的项目中写入扫描缓存"""
+        with patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0), \
+             patch('package_installer_yulibupt.EXTRACT_WORKERS', 4), \
+             patch('package_installer_yulibupt.ProcessPoolExecutor', side_effect=AssertionError("不应启动子进程")):
+            result, _ = self._scan(["alpha", "beta"])
+        self.assertEqual(result['matrix']['requests'], {'alpha': 1, 'beta': 2})
+        self.assertEqual(list(self.test_dir.rglob(installer.SCAN_CACHE_FILE)), [])
+
+    def test_root_workers_are_threads(self):
+        """测试root_workers个线程在同一进程中处理项目，目录遍历等I/O可以相互重叠"""
+        barrier = threading.Barrier(2, timeout=10)
+        scan = installer.scan_python_files
+
+        def scan_in_step(*args, **kwargs):
+            # 两个项目的目录遍历必须同时进行，否则屏障超时、项目报告记录错误
+            barrier.wait()
+            return scan(*args, **kwargs)
+
+        with patch('package_installer_yulibupt.scan_python_files', side_effect=scan_in_step), \
+             patch('package_installer_yulibupt.ThreadPoolExecutor', wraps=installer.ThreadPoolExecutor) as mock_pool, \
+             patch('package_installer_yulibupt.ProcessPoolExecutor', side_effect=AssertionError("不应启动子进程")):
+            result, _ = self._scan(["alpha", "beta"])
+        mock_pool.assert_called_once_with(max_workers=2)
+        self.assertEqual([r.get('error') for r in result['projects']], [None, None])
+
+    def test_root_named_summary(self):
+        """测试名为summary的项目不会覆盖汇总文件"""
+        self._write("summary/app.py", "import requests\n")
+        result, output_dir = self._scan(["summary", "alpha"])
+        self.assertEqual([r['label'] for r in result['projects']], ['summary-2', 'alpha'])
+        summary = json.loads((output_dir / "summary.json").read_text(encoding='utf-8'))
+        self.assertEqual([p['label'] for p in summary['projects']], ['summary-2', 'alpha'])
+        report = json.loads((output_dir / "summary-2.json").read_text(encoding='utf-8'))
+        self.assertEqual(report['packages']['requests']['imports_count'], 1)
+
+    def test_unique_labels(self):
+        """测试标签不与汇总文件、其他标签或追加序号后的标签重名（不区分大小写）"""
+        roots = ["/a/alpha", "/b/alpha", "/c/alpha-2", "/d/Summary", "/e/dependency_matrix", "/f/ALPHA"]
+        self.assertEqual(_unique_labels(roots),
+                         ['alpha', 'alpha-2', 'alpha-2-2', 'Summary-2', 'dependency_matrix-2', 'ALPHA-3'])
+
+    def test_build_dependency_matrix(self):
+        """测试多个模块映射到同一pip包时导入次数合并"""
+        reports = [{'label': 'p', 'packages': {
+            'yaml': {'pip_package': 'pyyaml', 'imports_count': 2, 'files_count': 1},
+            '_yaml': {'pip_package': 'pyyaml', 'imports_count': 1, 'files_count': 1},
+        }}, {'label': 'q', 'error': "目录不存在"}]
+        self.assertEqual(build_dependency_matrix(reports), {'pyyaml': {'p': 3}})
+
+
+class TestManifest(unittest.TestCase):
+    """测试项目列表文件"""
+
+    def test_read_manifest(self):
+        """测试忽略空行和注释，相对路径相对于列表文件"""
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        manifest = test_dir / "roots.txt"
+        manifest.write_text("# 项目列表\nrepo_a\n\n  /abs/repo_b  \n", encoding='utf-8')
+        self.assertEqual(read_roots_manifest(str(manifest)),
+                         [str(test_dir.resolve() / "repo_a"), str(Path("/abs/repo_b"))])
+
+
+if __name__ == '__main__':
+    unittest.main()
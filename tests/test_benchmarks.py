@@ -0,0 +1,82 @@
+"""
+测试基准测试工具
+覆盖: run_benchmarks.generate_synthetic_project, bench_pipeline, compare_results, bench_patterns
+"""
+import io
+import shutil
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+from run_benchmarks import generate_synthetic_project, bench_pipeline, compare_results, bench_patterns
+from package_installer_yulibupt import read_file_safely, extract_imports_with_details
+
+
+class TestSyntheticProject(unittest.TestCase):
+    """测试合成项目生成"""
+
+    def setUp(self):
+        """创建临时目录"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def test_size_and_depth(self):
+        """测试文件数、嵌套深度和每个文件的导入数"""
+        files = generate_synthetic_project(self.test_dir, files=12, imports_per_file=5, depth=3)
+        self.assertEqual(len(files), 12)
+        for path in files:
+            self.assertEqual(len(path.relative_to(self.test_dir).parts), 4)
+            self.assertEqual(len(extract_imports_with_details(read_file_safely(path), path)), 5)
+
+    def test_deterministic(self):
+        """测试相同参数生成完全相同的项目"""
+        first = generate_synthetic_project(self.test_dir / "a", files=5, multiline_ratio=0.5, seed=7)
+        second = generate_synthetic_project(self.test_dir / "b", files=5, multiline_ratio=0.5, seed=7)
+        for a, b in zip(first, second):
+            self.assertEqual(a.read_text(encoding='utf-8'), b.read_text(encoding='utf-8'))
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+    """测试各阶段测量与基线对比"""
+
+    @classmethod
+    def setUpClass(cls):
+        """在很小的合成项目上运行一次"""
+        cls.results = bench_pipeline(files=10, imports_per_file=4, depth=1, multiline_ratio=0.3, repeat=1)
+
+    def test_all_stages_measured(self):
+        """测试报告每个阶段的耗时、吞吐量和峰值内存"""
+        self.assertEqual(list(self.results['stages']),
+                         ['discover', 'read', 'extract', 'track', 'requirements'])
+        for stage in self.results['stages'].values():
+            self.assertGreater(stage['items'], 0)
+            self.assertGreaterEqual(stage['peak_kb'], 0)
+        self.assertEqual(self.results['stages']['discover']['items'], 10)
+        self.assertEqual(self.results['stages']['extract']['items'], 40)
+
+    def test_compare_detects_regression(self):
+        """测试超过阈值的变慢被报告"""
+        slower = {'config': self.results['config'], 'stages': {
+            name: dict(stage, seconds=stage['seconds'] * 2) for name, stage in self.results['stages'].items()
+        }}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(compare_results(self.results, self.results), [])
+            regressions = compare_results(slower, self.results, threshold=0.2)
+        self.assertEqual(len(regressions), 5)
+        self.assertTrue(regressions[0].startswith("discover: 耗时"))
+
+
+class TestPatternBenchmark(unittest.TestCase):
+    """测试预编译前后的正则对比"""
+
+    def test_bench_patterns(self):
+        """测试两组对比都报告预编译前后的单次耗时"""
+        results = bench_patterns(lines=200, pattern_count=30, repeat=1)
+        self.assertEqual(list(results), ['line', 'package_pattern'])
+        for result in results.values():
+            self.assertGreater(result['before'], 0)
+            self.assertGreater(result['after'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+测试命令行与配置文件
+覆盖: main, build_arg_parser, load_pyproject_config, apply_config
+"""
+import io
+import json
+import shutil
+import tempfile
+import unittest
+import argparse
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
+from package_installer_yulibupt import (
+    CONFIG_OPTIONS,
+    main,
+    build_arg_parser,
+    load_pyproject_config,
+    apply_config,
+    _import_toml_parser,
+)
+
+# Python 3.10及以下没有安装tomli时无法读取pyproject.toml
+requires_toml = unittest.skipUnless(_import_toml_parser(), "需要tomllib或tomli")
+
+
+class _ConfigTestCase(unittest.TestCase):
+    """保存并恢复所有可配置的模块常量"""
+
+    def setUp(self):
+        saved = {name: getattr(installer, name) for name in CONFIG_OPTIONS.values()}
+        self.addCleanup(lambda: [setattr(installer, name, value) for name, value in saved.items()])
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def _write_pyproject(self, text):
+        path = self.test_dir / "pyproject.toml"
+        path.write_text(text, encoding='utf-8')
+        return path
+
+
+class TestConfigFile(_ConfigTestCase):
+    """测试pyproject.toml配置节"""
+
+    @requires_toml
+    def test_load_section(self):
+        """测试读取配置节，'-'与'_'等价"""
+        path = self._write_pyproject(
+            '[project]\nname = "x"\n\n[tool.package_installer]\nworkers = 2\nchunk-size = 16\n'
+        )
+        self.assertEqual(load_pyproject_config(path), {'workers': 2, 'chunk_size': 16})
+
+    @requires_toml
+    def test_missing_section(self):
+        """测试没有配置节时返回空字典"""
+        self.assertEqual(load_pyproject_config(self._write_pyproject('[project]\nname = "x"\n')), {})
+
+    @requires_toml
+    def test_unknown_key(self):
+        """测试未知配置项报错"""
+        with self.assertRaises(ValueError):
+            load_pyproject_config(self._write_pyproject('[tool.package_installer]\nworkrs = 2\n'))
+
+    def test_apply_config(self):
+        """测试配置写入模块常量，排除列表追加到默认值并转换为默认值的类型"""
+        defaults = set(installer.EXCLUDE_DIRS)
+        apply_config({'workers': 3, 'exclude_dirs': ['generated'], 'dry_run': True})
+        self.assertEqual(installer.EXTRACT_WORKERS, 3)
+        self.assertEqual(installer.EXCLUDE_DIRS, defaults | {'generated'})
+        self.assertTrue(installer.DRY_RUN)
+
+    def test_apply_config_type_errors(self):
+        """测试类型不符的配置值报错"""
+        for options in [{'chunk_size': "64"}, {'dry_run': 1}, {'exclude_dirs': "build"},
+                        {'chunk_size': None}, {'extractor': "nope"}, {'mapping_db': 1},
+                        {'mapping_db': ["a.tsv"]}, {'profile_report_file': True}, {'pypi_url': 5}]:
+            with self.subTest(options=options), self.assertRaises(ValueError):
+                apply_config(options)
+
+
+class TestMain(_ConfigTestCase):
+    """测试命令行入口"""
+
+    def setUp(self):
+        """创建测试项目"""
+        super().setUp()
+        (self.test_dir / "app.py").write_text("import os\nimport notarealpkg_cli_12345\n", encoding='utf-8')
+
+    def _run(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main([str(self.test_dir), *argv])
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_dry_run_json(self):
+        """测试试运行输出JSON摘要，过程信息不混入stdout"""
+        code, stdout, stderr = self._run("--dry-run", "--format", "json", "--no-cache")
+        summary = json.loads(stdout)
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['files'], 1)
+        self.assertEqual(summary['to_install'], {'notarealpkg_cli_12345': ['notarealpkg_cli_12345']})
+        self.assertIn("步骤1", stderr)
+        self.assertFalse((self.test_dir / "requirements.txt").exists())
+
+    @requires_toml
+    def test_cli_overrides_config_file(self):
+        """测试命令行参数优先于pyproject.toml"""
+        self._write_pyproject('[tool.package_installer]\nworkers = 4\nchunk_size = 8\n')
+        self._run("--dry-run", "--workers", "1", "--no-cache", "--format", "json")
+        self.assertEqual(installer.EXTRACT_WORKERS, 1)
+        self.assertEqual(installer.EXTRACT_CHUNK_SIZE, 8)
+        self.assertIsNone(installer.SCAN_CACHE_FILE)
+
+    def test_exclude_options_extend_defaults(self):
+        """测试排除参数在默认配置基础上追加"""
+        self._run("--dry-run", "--exclude-dir", "generated", "--format", "json")
+        self.assertIn("generated", installer.EXCLUDE_DIRS)
+        self.assertIn(".git", installer.EXCLUDE_DIRS)
+
+    def test_batch_roots(self):
+        """测试--roots批量分析并输出跨项目依赖矩阵"""
+        output_dir = self.test_dir / "audit"
+        code, stdout, _ = self._run("--roots", str(self.test_dir), "--output-dir", str(output_dir),
+                                    "--format", "json", "--no-cache")
+        result = json.loads(stdout)
+        self.assertEqual(code, 0)
+        self.assertEqual(result['matrix'], {'notarealpkg_cli_12345': {self.test_dir.name: 1}})
+        self.assertTrue((output_dir / "dependency_matrix.csv").exists())
+
+    @requires_toml
+    def test_exclude_options_merge_config_and_cli(self):
+        """测试排除列表为 默认配置 + pyproject.toml + 命令行"""
+        self._write_pyproject('[tool.package_installer]\nexclude_dirs = ["generated", "vendor"]\n')
+        for relative in [".venv/lib/b.py", "generated/c.py", "vendor/d.py", "build_out/e.py"]:
+            path = self.test_dir / relative
+            path.parent.mkdir(parents=True)
+            path.write_text("import os\n", encoding='utf-8')
+        self._run("--dry-run", "--exclude-dir", "build_out", "--format", "json", "--no-cache")
+        for name in [".venv", ".git", "node_modules", "generated", "vendor", "build_out"]:
+            self.assertIn(name, installer.EXCLUDE_DIRS)
+        self.assertEqual([f.name for f in installer.scan_python_files(str(self.test_dir))], ["app.py"])
+
+    @requires_toml
+    def test_invalid_config_exits(self):
+        """测试配置错误时以参数错误退出"""
+        self._write_pyproject('[tool.package_installer]\nunknown = 1\n')
+        with self.assertRaises(SystemExit) as ctx:
+            self._run("--dry-run")
+        self.assertEqual(ctx.exception.code, 2)
+
+    def test_discovered_config_skipped_without_toml_parser(self):
+        """测试没有TOML解析模块时跳过自动发现的pyproject.toml并给出警告"""
+        self._write_pyproject('[project]\nname = "x"\n')
+        with patch('package_installer_yulibupt._import_toml_parser', return_value=None):
+            code, stdout, stderr = self._run("--dry-run", "--format", "json", "--no-cache")
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stdout)['files'], 1)
+        self.assertIn("pyproject.toml", stderr)
+
+    def test_explicit_config_requires_toml_parser(self):
+        """测试--config指定的配置文件无法读取时以参数错误退出"""
+        config = self._write_pyproject('[tool.package_installer]\nworkers = 1\n')
+        with patch('package_installer_yulibupt._import_toml_parser', return_value=None), \
+             self.assertRaises(SystemExit) as ctx:
+            self._run("--dry-run", "--config", str(config))
+        self.assertEqual(ctx.exception.code, 2)
+
+    def test_boolean_options_without_boolean_optional_action(self):
+        """测试Python 3.8的argparse（没有BooleanOptionalAction）也支持--xxx/--no-xxx开关"""
+        with patch.object(argparse, 'BooleanOptionalAction', None, create=True):
+            parser = build_arg_parser()
+        args = vars(parser.parse_args(["--stream", "--no-requirements"]))
+        self.assertEqual(args, {'stream': True, 'generate_requirements': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
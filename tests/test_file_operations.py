@@ -1,14 +1,20 @@
 """
 测试文件操作功能
-覆盖: scan_python_files, read_file_safely
+覆盖: scan_python_files, iter_python_files, read_file_safely, decode_source
 """
+import os
 import unittest
 import tempfile
 import shutil
 from pathlib import Path
+from unittest.mock import patch
 from package_installer_yulibupt import (
     scan_python_files,
+    iter_python_files,
+    ScanStats,
     read_file_safely,
+    decode_source,
+    reset_profiler,
     EXCLUDE_DIRS,
     EXCLUDE_FILES,
     EXCLUDE_FILE_PATTERNS
@@ -46,6 +52,14 @@ class TestScanPythonFiles(unittest.TestCase):
         files = scan_python_files(str(self.test_dir), scan_subdirs=False)
         self.assertEqual(len(files), 0)
 
+    def test_iter_python_files_is_lazy(self):
+        """测试惰性遍历返回生成器，且结果集合与scan_python_files一致"""
+        for i in range(3):
+            (self.test_dir / f"mod{i}.py").write_text("import os", encoding='utf-8')
+        files = iter_python_files(str(self.test_dir))
+        self.assertFalse(isinstance(files, list))
+        self.assertEqual(sorted(files), scan_python_files(str(self.test_dir)))
+
     def test_scan_empty_directory(self):
         """测试空目录"""
         files = scan_python_files(str(self.test_dir), scan_subdirs=False)
@@ -195,6 +209,70 @@ class TestScanPythonFiles(unittest.TestCase):
         file_names = [f.name for f in files]
         self.assertEqual(file_names, sorted(file_names))
 
+    # ==================== 目录剪枝测试 ====================
+
+    def test_excluded_dirs_are_not_descended(self):
+        """测试排除目录在进入之前被剪枝，不会遍历其中的条目"""
+        venv = self.test_dir / ".venv" / "lib"
+        venv.mkdir(parents=True)
+        (venv / "site.py").write_text("import os", encoding='utf-8')
+        (self.test_dir / "main.py").write_text("import os", encoding='utf-8')
+        
+        scanned = []
+        real_scandir = os.scandir
+        
+        def tracking_scandir(path):
+            scanned.append(Path(path).name)
+            return real_scandir(path)
+        
+        with patch('package_installer_yulibupt.os.scandir', side_effect=tracking_scandir):
+            files = scan_python_files(str(self.test_dir))
+        self.assertEqual([f.name for f in files], ["main.py"])
+        self.assertNotIn(".venv", scanned)
+        self.assertNotIn("lib", scanned)
+
+    def test_scan_stats_counts_skipped_entries(self):
+        """测试统计跳过的目录、文件和其他条目"""
+        (self.test_dir / "node_modules").mkdir()
+        (self.test_dir / ".git").mkdir()
+        (self.test_dir / "main.py").write_text("import os", encoding='utf-8')
+        (self.test_dir / "test_main.py").write_text("import os", encoding='utf-8')
+        (self.test_dir / "README.md").write_text("# readme", encoding='utf-8')
+        
+        stats = ScanStats()
+        files = scan_python_files(str(self.test_dir), stats=stats)
+        self.assertEqual(len(files), 1)
+        self.assertEqual(stats.dirs_pruned, 2)
+        self.assertEqual(stats.files_excluded, 1)
+        self.assertEqual(stats.other_entries, 1)
+        self.assertEqual(stats.skipped, 4)
+        self.assertEqual(stats.dirs_scanned, 1)
+
+    def test_root_inside_excluded_dir_name(self):
+        """测试扫描根目录本身位于名为build的目录下时仍能扫描"""
+        root = self.test_dir / "build" / "project"
+        root.mkdir(parents=True)
+        (root / "main.py").write_text("import os", encoding='utf-8')
+        files = scan_python_files(str(root))
+        self.assertEqual(len(files), 1)
+
+    def test_directory_named_like_py_file(self):
+        """测试名为xxx.py的目录不会被当作文件"""
+        (self.test_dir / "weird.py").mkdir()
+        (self.test_dir / "weird.py" / "inner.py").write_text("import os", encoding='utf-8')
+        files = scan_python_files(str(self.test_dir))
+        self.assertEqual([f.name for f in files], ["inner.py"])
+
+    def test_nested_order_matches_sorted_paths(self):
+        """测试惰性遍历顺序与全局路径排序一致"""
+        for rel in ["b.py", "a/z.py", "a.py", "a/b/c.py", "ab/x.py"]:
+            path = self.test_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("import os", encoding='utf-8')
+        files = list(iter_python_files(str(self.test_dir)))
+        self.assertEqual(files, sorted(files))
+        self.assertEqual(len(files), 5)
+
 
 class TestReadFileSafely(unittest.TestCase):
     """测试安全文件读取功能"""
@@ -254,6 +332,45 @@ class TestReadFileSafely(unittest.TestCase):
         result = read_file_safely(test_file)
         self.assertEqual(result, content)
 
+    def test_single_read(self):
+        """测试只读取文件一次，在内存中尝试各候选编码"""
+        test_file = self.test_dir / "gbk.py"
+        test_file.write_bytes("# 中文注释\nimport os\n".encode('gbk'))
+        with patch('builtins.open', wraps=open) as mock_open, \
+             patch.object(Path, 'read_bytes', autospec=True, side_effect=Path.read_bytes) as mock_read:
+            self.assertEqual(read_file_safely(test_file), "# 中文注释\nimport os\n")
+        self.assertEqual(mock_read.call_count, 1)
+        mock_open.assert_not_called()
+
+    def test_encoding_recorded(self):
+        """测试使用的编码计入运行统计"""
+        profiler = reset_profiler()
+        self.addCleanup(reset_profiler)
+        gbk_file = self.test_dir / "gbk.py"
+        gbk_file.write_bytes("# 中文注释\nimport os\n".encode('gbk'))
+        utf8_file = self.test_dir / "utf8.py"
+        utf8_file.write_text("import os\n", encoding='utf-8')
+        bom_file = self.test_dir / "bom.py"
+        bom_file.write_bytes("\ufeffimport os\n".encode('utf-8'))
+        read_file_safely(gbk_file)
+        read_file_safely(utf8_file)
+        read_file_safely(bom_file)
+        # 带BOM的UTF-8文件不计入非UTF-8文件
+        self.assertEqual(profiler.encodings, {'gbk': 1, 'utf-8': 2})
+        self.assertEqual(profiler.file_encodings, {str(gbk_file): 'gbk'})
+        self.assertEqual(profiler.report()['non_utf8_files'], {str(gbk_file): 'gbk'})
+
+    def test_decode_source(self):
+        """测试BOM、PEP 263编码声明和换行符处理"""
+        self.assertEqual(decode_source("\ufeffimport os\n".encode('utf-8')), ("import os\n", 'utf-8-sig'))
+        self.assertEqual(decode_source("# -*- coding: gbk -*-\n# 注释\n".encode('gbk'))[1], 'gbk')
+        # 声明为latin-1时按声明解码（与Python解释器一致）
+        self.assertEqual(decode_source("# coding: latin-1\nx = 'é'\n".encode('latin-1'))[1], 'iso-8859-1')
+        # 无效的编码声明：按候选编码尝试
+        self.assertEqual(decode_source(b"# coding: nope-123\nimport os\n")[1], 'utf-8')
+        self.assertEqual(decode_source(b"import os\r\nimport sys\rx = 1")[0], "import os\nimport sys\nx = 1")
+        self.assertEqual(decode_source("字".encode('gbk') + b"\xff")[1], 'latin-1')
+
     # ==================== 错误处理测试 ====================
 
     def test_read_nonexistent_file(self):
@@ -1,12 +1,22 @@
 """
 测试import提取功能
-覆盖: extract_imports_with_details, extract_imports_from_code
+覆盖: extract_imports_with_details, extract_imports_from_code, extract_imports_ast, get_extractor,
+      file_may_contain_imports, extract_imports_mapped
 """
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
 from package_installer_yulibupt import (
     extract_imports_with_details,
     extract_imports_from_code,
+    extract_imports_ast,
+    get_extractor,
+    file_may_contain_imports,
+    extract_imports_mapped,
+    read_file_safely,
     ImportInfo
 )
 
@@ -352,5 +362,250 @@ def main():
         self.assertNotIn("fake", package_names)  # 字符串
 
 
+class TestAstExtractor(unittest.TestCase):
+    """测试基于ast的import提取后端"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.test_file = Path("test_temp.py")
+
+    @staticmethod
+    def _records(imports):
+        """转换为可比较的记录"""
+        return [(imp.package_name, imp.import_type, imp.import_statement,
+                 imp.line_number, imp.pip_package) for imp in imports]
+
+    def test_matches_regex_backend(self):
+        """测试常规代码与正则后端结果一致"""
+        code = """import os
+import sys, json
+from PIL import Image  # 图像处理
+import numpy as np
+from bs4 import (
+    BeautifulSoup,
+    Tag,
+)
+from .local import helper
+"""
+        self.assertEqual(
+            self._records(extract_imports_ast(code, self.test_file)),
+            self._records(extract_imports_with_details(code, self.test_file))
+        )
+
+    def test_multiline_statement_line_numbers(self):
+        """测试多行括号导入的行号和完整语句"""
+        code = "x = 1\nfrom requests import (\n    get,\n    post,\n)\n"
+        imports = extract_imports_ast(code, self.test_file)
+        self.assertEqual(len(imports), 1)
+        self.assertEqual(imports[0].line_number, 2)
+        self.assertEqual(imports[0].import_statement, "from requests import (\n    get,\n    post,\n)")
+
+    def test_nested_block_imports(self):
+        """测试try、TYPE_CHECKING和函数体内的导入"""
+        code = """from typing import TYPE_CHECKING
+try:
+    import ujson as json
+except ImportError:
+    import json
+if TYPE_CHECKING: from pandas import DataFrame
+def load():
+    import yaml; import toml
+"""
+        package_names = [imp.package_name for imp in extract_imports_ast(code, self.test_file)]
+        self.assertEqual(package_names, ["typing", "ujson", "json", "pandas", "yaml", "toml"])
+
+    def test_unbalanced_quotes_on_line(self):
+        """测试引号数量为奇数的行不会被丢弃"""
+        code = "import requests; msg = \"it's\"\n"
+        package_names = {imp.package_name for imp in extract_imports_ast(code, self.test_file)}
+        self.assertIn("requests", package_names)
+
+    def test_import_in_string_ignored(self):
+        """测试字符串中的import不被识别"""
+        code = 's = """\nimport fake\n"""\nimport real_package\n'
+        package_names = {imp.package_name for imp in extract_imports_ast(code, self.test_file)}
+        self.assertEqual(package_names, {"real_package"})
+
+    def test_relative_imports_skipped(self):
+        """测试过滤相对导入"""
+        code = "from . import a\nfrom ..b import c\nimport d\n"
+        package_names = [imp.package_name for imp in extract_imports_ast(code, self.test_file)]
+        self.assertEqual(package_names, ["d"])
+
+    def test_syntax_error_falls_back_to_regex(self):
+        """测试语法错误时回退到正则提取"""
+        code = "import requests\ndef broken(:\n"
+        self.assertEqual(
+            self._records(extract_imports_ast(code, self.test_file)),
+            self._records(extract_imports_with_details(code, self.test_file))
+        )
+
+    def test_deeply_nested_expression_falls_back_to_regex(self):
+        """测试嵌套过深导致解析器递归超限时回退到正则提取"""
+        code = "import requests\nTABLE = " + "+".join(["1"] * 100000) + "\n"
+        records = self._records(extract_imports_ast(code, self.test_file))
+        self.assertEqual(records, self._records(extract_imports_with_details(code, self.test_file)))
+        self.assertEqual([record[0] for record in records], ["requests"])
+
+    def test_parser_resource_errors_fall_back_to_regex(self):
+        """测试解析时递归超限或内存不足都回退到正则提取"""
+        code = "import requests\n"
+        for error in (RecursionError, MemoryError):
+            with self.subTest(error=error.__name__), \
+                 patch.object(installer.ast, 'parse', side_effect=error):
+                imports = extract_imports_ast(code, self.test_file)
+            self.assertEqual([imp.package_name for imp in imports], ["requests"])
+
+    def test_bom_prefixed_source(self):
+        """测试带BOM的源码"""
+        imports = extract_imports_ast("\ufeffimport requests\n", self.test_file)
+        self.assertEqual([imp.package_name for imp in imports], ["requests"])
+
+    def test_get_extractor(self):
+        """测试按名称选择提取后端"""
+        self.assertIs(get_extractor('ast'), extract_imports_ast)
+        self.assertIs(get_extractor('regex'), extract_imports_with_details)
+        with self.assertRaises(ValueError):
+            get_extractor('unknown')
+
+
+class TestImportPrefilter(unittest.TestCase):
+    """测试import关键字预过滤：结果必须与逐行全量扫描完全一致"""
+
+    CASES = [
+        "",
+        "x = 1\ny = 2\n",
+        "import os\nimport sys, json\n",
+        "from a import (\n    importlib_name,\n    b,  # import c\n)\nimport d\n",
+        "import (e,\n   f)\nx = 'import g'\n# import h\nimport i",
+        "def f():\n    import j\n    s = \"from k import l\"\n\nfrom .rel import m\nfrom n.o import p as q\n",
+        "data = [\n" + "    {'row': 1},\n" * 50 + "]\nimport r\r\nimport s\n",
+        "important = True\nreimport = 1\nfrom t import u",
+    ]
+
+    def _full_scan(self, code):
+        """禁用预过滤：每一行都作为候选行"""
+        with patch.object(installer, '_import_candidate_lines',
+                          lambda text: list(range(text.count('\n') + 1))):
+            return extract_imports_with_details(code, Path("x.py"))
+
+    def test_identical_to_full_scan(self):
+        """测试各种边界情况下的结果与全量扫描一致"""
+        for code in self.CASES:
+            with self.subTest(code=code):
+                self.assertEqual(extract_imports_with_details(code, Path("x.py")), self._full_scan(code))
+
+    def test_candidate_lines(self):
+        """测试候选行号"""
+        self.assertEqual(installer._import_candidate_lines("a\nimport b\nc\nimport d; import e\n"), [1, 3])
+        self.assertEqual(installer._import_candidate_lines("no keyword here"), [])
+
+    def test_file_prefilter(self):
+        """测试字节级文件预过滤"""
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        (test_dir / "data.py").write_bytes(b"ROWS = [1, 2, 3]\n")
+        (test_dir / "empty.py").write_bytes(b"")
+        (test_dir / "gbk.py").write_bytes("# 中文注释\nimport requests\n".encode('gbk'))
+        self.assertFalse(file_may_contain_imports(test_dir / "data.py"))
+        self.assertFalse(file_may_contain_imports(test_dir / "empty.py"))
+        self.assertTrue(file_may_contain_imports(test_dir / "gbk.py"))
+        # 无法打开的文件交给read_file_safely处理
+        self.assertTrue(file_may_contain_imports(test_dir / "missing.py"))
+
+    def test_small_files_read_once(self):
+        """测试小文件只读取一次字节，在读取的字节中预过滤（不再单独mmap）"""
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        (test_dir / "data.py").write_bytes(b"ROWS = [1, 2, 3]\n")
+        (test_dir / "app.py").write_bytes("# 中文注释\nimport requests\n".encode('gbk'))
+        files = [test_dir / "data.py", test_dir / "app.py"]
+        read_bytes = Path.read_bytes
+        with patch.object(Path, 'read_bytes', autospec=True, side_effect=read_bytes) as mock_read, \
+             patch('package_installer_yulibupt.file_may_contain_imports',
+                   side_effect=AssertionError("小文件不应单独预过滤")):
+            results = installer._extract_file_chunk(files)
+        self.assertEqual(mock_read.call_count, 2)
+        self.assertEqual(results[0], [])
+        self.assertEqual([imp.package_name for imp in results[1]], ["requests"])
+        self.assertEqual(read_file_safely(files[0], skip_without_imports=True), "")
+        self.assertEqual(read_file_safely(files[0]), "ROWS = [1, 2, 3]\n")
+
+
+class TestMappedExtraction(unittest.TestCase):
+    """测试mmap字节级提取：结果必须与完整读取后提取一致"""
+
+    def setUp(self):
+        """创建临时目录"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def _compare(self, data: bytes, name="big.py"):
+        path = self.test_dir / name
+        path.write_bytes(data)
+        expected = extract_imports_with_details(read_file_safely(path), path)
+        self.assertEqual(extract_imports_mapped(path), expected)
+        return expected
+
+    def test_identical_to_text_extraction(self):
+        """测试各种边界情况"""
+        for index, code in enumerate(TestImportPrefilter.CASES):
+            with self.subTest(code=code):
+                self._compare(code.encode('utf-8'), f"case{index}.py")
+
+    def test_line_endings_and_encodings(self):
+        """测试CRLF换行、BOM、GBK编码和编码声明"""
+        self.assertEqual(len(self._compare(b"import a\r\nfrom b import (\r\n  c,\r\n)\r\nimport d", "crlf.py")), 3)
+        imports = self._compare("\ufeffimport os\nimport sys\n".encode('utf-8'), "bom.py")
+        self.assertEqual(imports[0].package_name, "os")
+        self._compare("# 中文注释\nimport requests  # 网络请求\nx = '数据'\n".encode('gbk'), "gbk.py")
+        self._compare("# -*- coding: gbk -*-\nfrom 模块 import x\nimport y\n".encode('gbk'), "cookie.py")
+
+    def test_whole_file_encoding_fallback(self):
+        """测试整个文件统一回退编码：UTF-8的导入行与GBK的其他行混合时与完整读取一致"""
+        data = "import requests  # 网络请求\n".encode('utf-8') + "# 中文注释\nimport y\n".encode('gbk')
+        imports = self._compare(data, "mixed.py")
+        self.assertEqual(imports[0].import_statement, "import requests  # 网络请求".encode('utf-8').decode('gbk'))
+
+    def test_encoding_stats_for_mapped_gbk_file(self):
+        """测试mmap提取的GBK文件按实际解码的编码计入统计"""
+        path = self.test_dir / "gbk.py"
+        path.write_bytes("import requests  # 网络请求\nx = '数据'\n".encode('gbk'))
+        profiler = installer.reset_profiler()
+        self.addCleanup(installer.reset_profiler)
+        with patch.object(installer, 'MMAP_EXTRACT_MIN_BYTES', 1), \
+             patch.object(installer, 'read_file_safely') as mock_read:
+            [imports] = installer._extract_file_chunk([path], 'regex')
+            mock_read.assert_not_called()
+        self.assertEqual([imp.package_name for imp in imports], ["requests"])
+        self.assertEqual(profiler.encodings, {'gbk': 1})
+        self.assertEqual(profiler.file_encodings, {str(path): 'gbk'})
+
+    def test_large_generated_file(self):
+        """测试大量普通行中的少量导入，行号正确"""
+        rows = "".join(f"ROW_{i} = {{'value': {i}}}\n" for i in range(50000))
+        imports = self._compare(("import os\n" + rows + "from numpy import (\n    array,\n)\n").encode('utf-8'))
+        self.assertEqual([imp.line_number for imp in imports], [1, 50002])
+
+    def test_fallback_cases(self):
+        """测试单独的\\r换行返回None，由调用方改为完整读取"""
+        path = self.test_dir / "cr.py"
+        path.write_bytes(b"import os\rimport sys\r")
+        self.assertIsNone(extract_imports_mapped(path))
+        self.assertIsNone(extract_imports_mapped(self.test_dir / "missing.py"))
+        (self.test_dir / "empty.py").write_bytes(b"")
+        self.assertEqual(extract_imports_mapped(self.test_dir / "empty.py"), [])
+
+    def test_chunk_uses_mapped_extraction_for_large_files(self):
+        """测试达到阈值的文件不再完整读取"""
+        path = self.test_dir / "big.py"
+        path.write_text("import os\nimport requests\n", encoding='utf-8')
+        expected = extract_imports_with_details(read_file_safely(path), path)
+        with patch.object(installer, 'MMAP_EXTRACT_MIN_BYTES', 1), \
+             patch.object(installer, 'read_file_safely') as mock_read:
+            self.assertEqual(installer._extract_file_chunk([path], 'regex'), [expected])
+            mock_read.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
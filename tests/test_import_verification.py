@@ -0,0 +1,85 @@
+"""
+测试子进程批量导入验证
+覆盖: verify_imports, ImportCheckResult
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from package_installer_yulibupt import verify_imports, ImportCheckResult
+
+
+class TestVerifyImports(unittest.TestCase):
+    """在临时目录中创建测试模块，验证子进程导入"""
+
+    def setUp(self):
+        """创建测试模块并切换到其所在目录（子进程从当前目录导入）"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        modules = {
+            'vi_good': "VALUE = 1\n",
+            'vi_noisy': "print('hello from import')\nimport sys\nsys.stdout.write('no newline')\n",
+            'vi_broken': "raise RuntimeError('boom')\n",
+            'vi_crash': "import os\nos._exit(3)\n",
+            'vi_slow': "import time\ntime.sleep(30)\n",
+        }
+        for name, code in modules.items():
+            (self.test_dir / f"{name}.py").write_text(code, encoding='utf-8')
+        cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_success_and_failure(self):
+        """测试返回逐模块的结构化结果"""
+        results = verify_imports(['vi_good', 'vi_broken', 'vi_missing_12345'])
+        self.assertEqual(list(results), ['vi_good', 'vi_broken', 'vi_missing_12345'])
+        self.assertTrue(results['vi_good'].success)
+        self.assertGreaterEqual(results['vi_good'].seconds, 0)
+        self.assertIsNone(results['vi_good'].error)
+        self.assertEqual(results['vi_broken'].error, "RuntimeError: boom")
+        self.assertIn("ModuleNotFoundError", results['vi_missing_12345'].error)
+
+    def test_modules_not_imported_into_current_process(self):
+        """测试验证的模块不会进入本进程"""
+        verify_imports(['vi_good'])
+        self.assertNotIn('vi_good', sys.modules)
+
+    def test_import_output_does_not_break_results(self):
+        """测试模块导入时的输出不影响结果解析"""
+        results = verify_imports(['vi_noisy', 'vi_good'])
+        self.assertTrue(results['vi_noisy'].success)
+        self.assertTrue(results['vi_good'].success)
+
+    def test_crash_is_isolated(self):
+        """测试导入时进程崩溃只影响该模块，其余模块继续验证"""
+        results = verify_imports(['vi_good', 'vi_crash', 'json'])
+        self.assertTrue(results['vi_good'].success)
+        self.assertFalse(results['vi_crash'].success)
+        self.assertIn("返回码 3", results['vi_crash'].error)
+        self.assertTrue(results['json'].success)
+
+    def test_timeout(self):
+        """测试超时的模块记为失败"""
+        results = verify_imports(['vi_slow', 'vi_good'], timeout=1)
+        self.assertEqual(results['vi_slow'].error, "导入超时")
+        self.assertTrue(results['vi_good'].success)
+
+    def test_parallel_processes(self):
+        """测试多个子进程并行验证，结果顺序与输入一致"""
+        modules = ['vi_good', 'json', 'vi_broken', 'os.path']
+        results = verify_imports(modules, processes=2)
+        self.assertEqual(list(results), modules)
+        self.assertEqual([r.success for r in results.values()], [True, True, False, True])
+
+    def test_invalid_and_duplicate_names(self):
+        """测试无效名称不启动进程，重复名称只验证一次"""
+        results = verify_imports(['', 'bad name', 'json', 'json'])
+        self.assertEqual(list(results), ['', 'bad name', 'json'])
+        self.assertEqual(results['bad name'], ImportCheckResult('bad name', False, error="无效的模块名"))
+        self.assertEqual(verify_imports([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+"""
+测试已安装发行包索引
+覆盖: InstalledIndex, is_module_installed, check_package_installed_via_pip, get_installed_package_info,
+      ANALYZE_ONLY
+"""
+import io
+import os
+import importlib.metadata
+import shutil
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
+from package_installer_yulibupt import (
+    InstalledIndex,
+    normalize_distribution_name,
+    is_module_installed,
+    find_top_level_spec,
+    scan_and_install,
+    check_package_installed_via_pip,
+    get_installed_package_info,
+    invalidate_installed_index,
+    ImportCheckResult,
+)
+
+
+def _write_dist(site_dir: Path, name: str, version: str, top_level=None, record=None):
+    """在site目录中创建一个最小的 .dist-info 元数据目录"""
+    dist_info = site_dir / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n", encoding='utf-8'
+    )
+    if top_level is not None:
+        (dist_info / "top_level.txt").write_text("\n".join(top_level) + "\n", encoding='utf-8')
+    if record is not None:
+        (dist_info / "RECORD").write_text("".join(f"{path},,\n" for path in record), encoding='utf-8')
+
+
+class TestInstalledIndex(unittest.TestCase):
+    """使用临时site目录测试索引构建"""
+
+    def setUp(self):
+        """创建包含若干发行包的临时site目录"""
+        self.site_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.site_dir)
+        _write_dist(self.site_dir, "PyYAML", "6.0", top_level=["_yaml", "yaml"])
+        _write_dist(self.site_dir, "python-dateutil", "2.9.0", record=[
+            "dateutil/__init__.py",
+            "dateutil/tz/tz.py",
+            "python_dateutil-2.9.0.dist-info/METADATA",
+            "../../bin/some-script",
+        ])
+        _write_dist(self.site_dir, "six", "1.16.0", record=["six.py", "__pycache__/six.cpython-311.pyc"])
+        _write_dist(self.site_dir, "cffi", "1.16.0", record=[
+            "_cffi_backend.cpython-311-x86_64-linux-gnu.so",
+            "cffi.libs/libffi.so",
+        ])
+        distributions = importlib.metadata.distributions
+        patcher = patch('package_installer_yulibupt.importlib.metadata.distributions',
+                        side_effect=lambda: distributions(path=[str(self.site_dir)]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = InstalledIndex()
+
+    def test_modules_from_top_level_txt(self):
+        """测试从top_level.txt读取模块"""
+        self.assertTrue(self.index.has_module("yaml"))
+        self.assertEqual(self.index.module_to_distributions["yaml"], ["pyyaml"])
+
+    def test_modules_from_record(self):
+        """测试没有top_level.txt时从RECORD推断模块"""
+        self.assertTrue(self.index.has_module("dateutil"))
+        self.assertTrue(self.index.has_module("six"))
+        self.assertTrue(self.index.has_module("_cffi_backend"))
+        self.assertNotIn("__pycache__", self.index.module_to_distributions)
+        self.assertNotIn("cffi.libs", self.index.module_to_distributions)
+
+    def test_submodule_uses_top_level_name(self):
+        """测试子模块按顶层包名查询"""
+        self.assertTrue(self.index.has_module("dateutil.tz"))
+        self.assertFalse(self.index.has_module("missing_module"))
+
+    def test_distribution_lookup_is_normalized(self):
+        """测试发行包名按PEP 503规范化查询"""
+        self.assertTrue(self.index.has_distribution("pyyaml"))
+        self.assertTrue(self.index.has_distribution("Python_Dateutil"))
+        self.assertFalse(self.index.has_distribution("requests-not-here"))
+
+    def test_get_info(self):
+        """测试返回与pip show相同字段的信息"""
+        info = self.index.get_info("pyyaml")
+        self.assertEqual(info['Name'], "PyYAML")
+        self.assertEqual(info['Version'], "6.0")
+        self.assertEqual(Path(info['Location']), self.site_dir)
+        self.assertIsNone(self.index.get_info("missing"))
+
+    def test_normalize_distribution_name(self):
+        """测试包名规范化"""
+        self.assertEqual(normalize_distribution_name("Foo.Bar_baz--qux"), "foo-bar-baz-qux")
+
+
+class TestIndexLookups(unittest.TestCase):
+    """测试已安装检查使用索引而不是导入和子进程"""
+
+    def setUp(self):
+        """每个测试使用新构建的索引"""
+        invalidate_installed_index()
+        self.addCleanup(invalidate_installed_index)
+
+    def test_installed_module_not_imported(self):
+        """测试索引命中时不导入模块"""
+        with patch('package_installer_yulibupt.verify_imports') as mock_verify:
+            self.assertTrue(is_module_installed("pip"))
+            mock_verify.assert_not_called()
+
+    def test_miss_falls_back_to_child_import_check(self):
+        """测试索引未命中时回退到子进程导入检查，本进程不导入模块"""
+        with patch('package_installer_yulibupt.verify_imports',
+                   return_value={"json": ImportCheckResult("json", True)}) as mock_verify, \
+             patch('package_installer_yulibupt.importlib.import_module') as mock_import:
+            self.assertTrue(is_module_installed("json"))
+            mock_verify.assert_called_once_with(["json"])
+            mock_import.assert_not_called()
+
+    def test_child_import_failure(self):
+        """测试子进程中导入失败时视为未安装"""
+        with patch('package_installer_yulibupt.verify_imports',
+                   return_value={"json": ImportCheckResult("json", False, error="ImportError")}):
+            self.assertFalse(is_module_installed("json"))
+
+    def test_missing_module_skips_child_process(self):
+        """测试find_spec找不到的模块不启动验证子进程"""
+        with patch('package_installer_yulibupt.verify_imports') as mock_verify:
+            self.assertFalse(is_module_installed("notarealpkg_idx_12345"))
+            mock_verify.assert_not_called()
+
+    def test_pip_queries_without_subprocess(self):
+        """测试已安装的发行包查询不启动pip子进程"""
+        with patch('package_installer_yulibupt.subprocess.run') as mock_run:
+            self.assertTrue(check_package_installed_via_pip("pip"))
+            info = get_installed_package_info("pip")
+            mock_run.assert_not_called()
+        self.assertEqual(info['Name'].lower(), "pip")
+        self.assertTrue(info['Version'])
+
+
+    def test_no_import_fallback(self):
+        """测试allow_import=False时只用find_spec，不导入模块"""
+        with patch('package_installer_yulibupt.verify_imports') as mock_verify:
+            self.assertTrue(is_module_installed("json", allow_import=False))
+            self.assertFalse(is_module_installed("notarealpkg_idx_12345", allow_import=False))
+            mock_verify.assert_not_called()
+
+    def test_find_top_level_spec(self):
+        """测试只查找顶层包"""
+        self.assertTrue(find_top_level_spec("xml.etree.ElementTree"))
+        self.assertFalse(find_top_level_spec("notarealpkg_idx_12345.sub"))
+        self.assertFalse(find_top_level_spec(""))
+
+
+class TestAnalyzeOnly(unittest.TestCase):
+    """测试仅分析模式：不启动子进程、不导入被检测的模块"""
+
+    def setUp(self):
+        """创建测试项目并切换到其目录（requirements.txt生成在当前目录）"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        (self.test_dir / "app.py").write_text(
+            "import pip\nimport json\nimport localmod\nimport notarealpkg_ao_12345\n", encoding='utf-8'
+        )
+        (self.test_dir / "localmod.py").write_text("raise RuntimeError('must not be imported')\n", encoding='utf-8')
+        cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.addCleanup(os.chdir, cwd)
+        invalidate_installed_index()
+        self.addCleanup(invalidate_installed_index)
+
+    def test_no_subprocess_or_import(self):
+        """测试生成requirements.txt，且没有子进程和模块导入"""
+        forbidden = AssertionError("仅分析模式不应调用")
+        with patch('package_installer_yulibupt.ANALYZE_ONLY', True), \
+             patch('package_installer_yulibupt.subprocess.run', side_effect=forbidden), \
+             patch('package_installer_yulibupt.subprocess.Popen', side_effect=forbidden), \
+             patch('package_installer_yulibupt.importlib.import_module', side_effect=forbidden), \
+             contextlib.redirect_stdout(io.StringIO()):
+            summary = scan_and_install(str(self.test_dir), use_cache=False, workers=1)
+        self.assertEqual(summary['already_installed'], ['pip'])
+        self.assertIn('localmod', summary['local_modules'])
+        self.assertEqual(summary['to_install'], {'notarealpkg_ao_12345': ['notarealpkg_ao_12345']})
+        self.assertEqual(summary['failed'], {})
+        self.assertEqual(summary['requirements_file'], "requirements.txt")
+        content = (self.test_dir / "requirements.txt").read_text(encoding='utf-8')
+        self.assertIn("notarealpkg_ao_12345", content)
+
+    def test_no_process_pool_or_cache(self):
+        """测试文件数超过并行阈值时也不启动提取进程池，且不写入扫描缓存"""
+        with patch('package_installer_yulibupt.ANALYZE_ONLY', True), \
+             patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0), \
+             patch('package_installer_yulibupt.ProcessPoolExecutor', side_effect=AssertionError("不应启动子进程")), \
+             contextlib.redirect_stdout(io.StringIO()):
+            summary = scan_and_install(str(self.test_dir), workers=4)
+        self.assertIn('localmod', summary['local_modules'])
+        self.assertFalse((self.test_dir / installer.SCAN_CACHE_FILE).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+"""
+测试模块名→发行包名映射数据库
+覆盖: PackageMappingDatabase, get_pip_package_name(PACKAGE_MAPPING_DB), try_install_with_variants,
+      build_mapping_db（生成工具、语料）
+"""
+import io
+import shutil
+import zipfile
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
+from package_installer_yulibupt import (
+    PackageMappingDatabase,
+    PackageNameResolver,
+    PyPICache,
+    get_pip_package_name,
+    normalize_distribution_name,
+    try_install_with_variants,
+)
+from build_mapping_db import (
+    MAPPING_CORPUS,
+    build_rows,
+    collect_module_owners,
+    iter_wheel_distributions,
+    read_corpus,
+    read_mapping_database,
+    write_mapping_database,
+    main as build_main,
+)
+
+ROWS = {'attr': 'attrs', 'jwt': 'PyJWT', 'magic': 'python-magic', 'PIL': 'Pillow', 'zmq': 'pyzmq',
+        '_yaml': 'PyYAML', 'Bio': 'biopython'}
+
+
+class _DatabaseTestCase(unittest.TestCase):
+    """在临时目录中写入数据库"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.db_file = str(self.test_dir / "mapping.tsv")
+        write_mapping_database(ROWS, self.db_file)
+
+
+class TestPackageMappingDatabase(_DatabaseTestCase):
+    """测试二分查找"""
+
+    def test_lookup(self):
+        """测试每一条都能找到，未收录的名称（包括排在首尾和中间的）返回None"""
+        database = PackageMappingDatabase(self.db_file)
+        for module, pip_name in ROWS.items():
+            with self.subTest(module=module):
+                self.assertEqual(database.lookup(module), pip_name)
+        for module in ['AAA', 'zzz', 'jw', 'jwtx', 'pil', '#', '']:
+            with self.subTest(module=module):
+                self.assertIsNone(database.lookup(module))
+
+    def test_lazy_load(self):
+        """测试创建时不读取文件，文件不存在时视为空数据库"""
+        database = PackageMappingDatabase(self.db_file)
+        self.assertIsNone(database._data)
+        database.lookup('attr')
+        self.assertIsNotNone(database._data)
+        self.assertIsNone(PackageMappingDatabase(str(self.test_dir / "missing.tsv")).lookup('attr'))
+        self.assertIsNone(PackageMappingDatabase(None).lookup('attr'))
+
+    def test_crlf_file(self):
+        """测试CRLF换行的文件（如在Windows上被编辑过）"""
+        path = self.test_dir / "crlf.tsv"
+        path.write_bytes(Path(self.db_file).read_bytes().replace(b'\n', b'\r\n'))
+        self.assertEqual(PackageMappingDatabase(str(path)).lookup('magic'), 'python-magic')
+
+    def test_bundled_database(self):
+        """测试随工具发布的数据库已排序、不含与原名称相同的条目和私有模块，且每条都能查到"""
+        rows = read_mapping_database(installer.PACKAGE_MAPPING_DB)
+        self.assertGreater(len(rows), 100)
+        modules = list(rows)
+        self.assertEqual(modules, sorted(modules, key=lambda name: name.encode('utf-8')))
+        database = PackageMappingDatabase(installer.PACKAGE_MAPPING_DB)
+        for module, pip_name in rows.items():
+            self.assertNotEqual(normalize_distribution_name(module), normalize_distribution_name(pip_name))
+            self.assertFalse(module.startswith('_'))
+            self.assertEqual(database.lookup(module), pip_name)
+
+    def test_bundled_database_matches_corpus(self):
+        """测试随工具发布的数据库只包含语料中的发行包"""
+        corpus = {normalize_distribution_name(requirement.partition('==')[0])
+                  for requirement in read_corpus(MAPPING_CORPUS)}
+        for module, pip_name in read_mapping_database(installer.PACKAGE_MAPPING_DB).items():
+            with self.subTest(module=module):
+                self.assertIn(normalize_distribution_name(pip_name), corpus)
+
+
+class TestResolution(_DatabaseTestCase):
+    """测试映射数据库接入包名解析和变体安装"""
+
+    def test_lookup_order(self):
+        """测试PACKAGE_MAPPING优先于数据库，数据库优先于原名称"""
+        with patch.object(installer, 'PACKAGE_MAPPING_DB', self.db_file), \
+             patch.dict(installer.PACKAGE_MAPPING, {'PIL': 'pillow-simd'}):
+            self.assertEqual(get_pip_package_name('jwt'), 'PyJWT')
+            self.assertEqual(get_pip_package_name('PIL'), 'pillow-simd')
+            self.assertEqual(get_pip_package_name('notinthedb'), 'notinthedb')
+        with patch.object(installer, 'PACKAGE_MAPPING_DB', None):
+            self.assertEqual(get_pip_package_name('jwt'), 'jwt')
+
+    def test_resolver_invalidated_when_database_changes(self):
+        """测试PACKAGE_MAPPING_DB变化后解析缓存失效"""
+        resolver = PackageNameResolver()
+        with patch.object(installer, 'PACKAGE_MAPPING_DB', None):
+            self.assertEqual(resolver.refresh().resolve('zmq'), 'zmq')
+        with patch.object(installer, 'PACKAGE_MAPPING_DB', self.db_file):
+            self.assertEqual(resolver.refresh().resolve('zmq'), 'pyzmq')
+
+    def test_variants_try_database_name(self):
+        """测试映射覆盖了数据库结果且安装失败时，尝试数据库中的发行包名"""
+        def fake_install(module, pip_name, auto_retry=True):
+            return (pip_name == 'PyJWT'), "", pip_name
+
+        with patch.object(installer, 'PACKAGE_MAPPING_DB', self.db_file), \
+             patch.dict(installer.PACKAGE_MAPPING, {'jwt': 'jwt-custom'}), \
+             patch('package_installer_yulibupt._pypi_cache', PyPICache(None)), \
+             patch('package_installer_yulibupt.install_package', side_effect=fake_install) as mock_install:
+            success, _, actual = try_install_with_variants('jwt', 'jwt-custom')
+        self.assertTrue(success)
+        self.assertEqual(actual, 'PyJWT')
+        mock_install.assert_called_once_with('jwt', 'PyJWT', auto_retry=False)
+
+
+class TestBuildMappingDatabase(unittest.TestCase):
+    """测试从发行包元数据生成数据库"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def _write_wheel(self, name, top_level=None, files=()):
+        """生成只含元数据的wheel文件"""
+        dist_info = f"{name.replace('-', '_')}-1.0.dist-info"
+        with zipfile.ZipFile(self.test_dir / f"{name.replace('-', '_')}-1.0-py3-none-any.whl", 'w') as archive:
+            archive.writestr(f"{dist_info}/METADATA", f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n")
+            if top_level is not None:
+                archive.writestr(f"{dist_info}/top_level.txt", "\n".join(top_level) + "\n")
+            record = [f"{path},," for path in files] + [f"{dist_info}/METADATA,,"]
+            archive.writestr(f"{dist_info}/RECORD", "\n".join(record) + "\n")
+
+    def test_build_rows(self):
+        """测试跳过标准库和同名条目，多个发行包提供的模块保留原有条目"""
+        owners = {'attr': {'attrs'}, 'enum': {'enum34'}, 'requests': {'requests'},
+                  'google': {'protobuf', 'google-auth'}, 'dateutil': {'python-dateutil'}}
+        owners.update({'_pytest': {'pytest'}, '_distutils_hack': {'setuptools'}, 'tests': {'python-barcode'}})
+        rows, ambiguous = build_rows(owners, {'google': 'protobuf', 'jwt': 'PyJWT'})
+        self.assertEqual(rows, {'attr': 'attrs', 'dateutil': 'python-dateutil',
+                                'google': 'protobuf', 'jwt': 'PyJWT'})
+        self.assertEqual(ambiguous, ['google'])
+
+    def test_wheels(self):
+        """测试从wheel文件读取top_level.txt或RECORD"""
+        self._write_wheel('attrs', top_level=['attr', 'attrs'])
+        self._write_wheel('python-magic', files=['magic/__init__.py', 'magic/loader.py'])
+        self._write_wheel('six', files=['six.py'])
+        owners = collect_module_owners(iter_wheel_distributions([str(self.test_dir)]))
+        self.assertEqual(owners, {'attr': {'attrs'}, 'attrs': {'attrs'}, 'magic': {'python-magic'},
+                                  'six': {'six'}})
+
+    def test_main_merges_existing(self):
+        """测试命令行生成数据库，合并现有条目"""
+        self._write_wheel('attrs', top_level=['attr'])
+        output = self.test_dir / "out.tsv"
+        write_mapping_database({'jwt': 'PyJWT'}, str(output))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(build_main(["--wheels", str(self.test_dir), "-o", str(output)]), 0)
+        self.assertEqual(read_mapping_database(str(output)), {'attr': 'attrs', 'jwt': 'PyJWT'})
+        self.assertEqual(PackageMappingDatabase(str(output)).lookup('attr'), 'attrs')
+
+    def test_read_corpus(self):
+        """测试语料忽略注释和空行，未固定版本的条目报错"""
+        corpus = self.test_dir / "corpus.txt"
+        corpus.write_text("# 语料\nattrs == 1.0\n\nPyJWT==2.0  # 注释\n", encoding='utf-8')
+        self.assertEqual(read_corpus(str(corpus)), ['attrs==1.0', 'PyJWT==2.0'])
+        corpus.write_text("attrs==1.0\nrequests\n", encoding='utf-8')
+        with self.assertRaises(ValueError):
+            read_corpus(str(corpus))
+
+    def test_main_corpus(self):
+        """测试按语料下载wheel后生成，目录中语料之外或其他版本的wheel不参与生成"""
+        wheelhouse = self.test_dir / "wheelhouse"
+        corpus = self.test_dir / "corpus.txt"
+        corpus.write_text("attrs==1.0\nPython-Magic==1.0\n", encoding='utf-8')
+        output = self.test_dir / "out.tsv"
+
+        def fake_download(requirements, directory):
+            self.assertEqual(requirements, ['attrs==1.0', 'Python-Magic==1.0'])
+            self.assertEqual(directory, str(wheelhouse))
+            self.test_dir, test_dir = wheelhouse, self.test_dir
+            try:
+                self._write_wheel('attrs', top_level=['attr'])
+                self._write_wheel('python-magic', files=['magic/__init__.py'])
+                self._write_wheel('python-dateutil', files=['dateutil/__init__.py'])
+            finally:
+                self.test_dir = test_dir
+            return []
+
+        with patch('build_mapping_db.download_corpus', side_effect=fake_download), \
+             contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(build_main(["--corpus", str(corpus), "--wheels", str(wheelhouse),
+                                         "--no-merge", "-o", str(output)]), 0)
+        # 使用语料中的写法，而不是wheel元数据中的名称
+        self.assertEqual(read_mapping_database(str(output)), {'attr': 'attrs', 'magic': 'Python-Magic'})
+
+    def test_main_corpus_download_failure(self):
+        """测试有wheel下载失败时不写入数据库"""
+        corpus = self.test_dir / "corpus.txt"
+        corpus.write_text("attrs==1.0\n", encoding='utf-8')
+        output = self.test_dir / "out.tsv"
+        with patch('build_mapping_db.download_corpus', return_value=['attrs==1.0']), \
+             contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(build_main(["--corpus", str(corpus), "-o", str(output)]), 1)
+        self.assertFalse(output.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
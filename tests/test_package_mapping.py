@@ -1,12 +1,16 @@
 """
 测试包名映射功能
 覆盖: get_pip_package_name, generate_package_name_variants, search_pypi_package,
-      PACKAGE_MAPPING, PACKAGE_PATTERNS
+      PACKAGE_MAPPING, PACKAGE_PATTERNS, PackagePatternMatcher, PackageNameResolver
 """
 import unittest
+from unittest.mock import patch
+import package_installer_yulibupt as installer
 from package_installer_yulibupt import (
     get_pip_package_name,
     generate_package_name_variants,
+    PackagePatternMatcher,
+    PackageNameResolver,
     PACKAGE_MAPPING,
     PACKAGE_PATTERNS
 )
@@ -219,6 +223,61 @@ class TestPackageMappingIntegrity(unittest.TestCase):
             self.assertEqual(PACKAGE_MAPPING[import_name], pip_name)
 
 
+
+class TestPackagePatternMatcher(unittest.TestCase):
+    """测试PACKAGE_PATTERNS的合并编译"""
+
+    PATTERNS = [(r'^win32', 'pywin32'), (r'^google_', 'google-stub'), (r'^win', 'winstuff'), (r'^x\d+$', 'xnum')]
+
+    def test_first_matching_pattern_wins(self):
+        """测试合并后仍返回第一个匹配的模式（与逐个re.match一致）"""
+        matcher = PackagePatternMatcher(self.PATTERNS)
+        self.assertIsNotNone(matcher.combined)
+        for name, expected in [("win32api", "pywin32"), ("winreg2", "winstuff"), ("google_auth", "google-stub"),
+                               ("x12", "xnum"), ("x12a", None), ("requests", None), ("awin32", None)]:
+            with self.subTest(name=name):
+                self.assertEqual(matcher.match(name), expected)
+
+    def test_patterns_with_groups_not_combined(self):
+        """测试含捕获组的模式逐个匹配（合并会改变反向引用编号）"""
+        matcher = PackagePatternMatcher([(r'^(ab)\1', 'abab'), (r'^win32', 'pywin32')])
+        self.assertIsNone(matcher.combined)
+        self.assertEqual(matcher.match("ababx"), "abab")
+        self.assertEqual(matcher.match("win32api"), "pywin32")
+        self.assertIsNone(PackagePatternMatcher([]).match("anything"))
+
+    def test_recompiled_when_patterns_change(self):
+        """测试PACKAGE_PATTERNS被替换或原地修改后重新编译"""
+        patterns = [(r'^win32', 'pywin32')]
+        with patch.object(installer, 'PACKAGE_PATTERNS', patterns):
+            self.assertEqual(get_pip_package_name("mycorp_utils"), "mycorp_utils")
+            patterns.append((r'^mycorp_', 'mycorp-sdk'))
+            self.assertEqual(get_pip_package_name("mycorp_utils"), "mycorp-sdk")
+        self.assertEqual(get_pip_package_name("mycorp_utils"), "mycorp_utils")
+
+
+class TestPackageNameResolver(unittest.TestCase):
+    """测试包名解析缓存"""
+
+    def test_results_cached(self):
+        """测试映射、模式和默认三种结果都被缓存"""
+        resolver = PackageNameResolver().refresh()
+        for _ in range(3):
+            self.assertEqual([resolver.resolve(name) for name in ["cv2", "win32api", "requests"]],
+                             ["opencv-python", "pywin32", "requests"])
+        self.assertEqual(resolver.stats(), {'hits': 6, 'misses': 3, 'entries': 3, 'invalidations': 0})
+
+    def test_invalidated_when_mapping_changes(self):
+        """测试PACKAGE_MAPPING原地修改或PACKAGE_PATTERNS被替换后缓存失效"""
+        resolver = PackageNameResolver().refresh()
+        self.assertEqual(resolver.resolve("mycorp"), "mycorp")
+        with patch.dict(installer.PACKAGE_MAPPING, {'mycorp': 'mycorp-client'}):
+            self.assertEqual(resolver.refresh().resolve("mycorp"), "mycorp-client")
+        with patch.object(installer, 'PACKAGE_PATTERNS', [(r'^my', 'my-sdk')]):
+            self.assertEqual(resolver.refresh().resolve("mycorp"), "my-sdk")
+        self.assertEqual(resolver.refresh().resolve("mycorp"), "mycorp")
+        self.assertEqual(resolver.invalidations, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
-
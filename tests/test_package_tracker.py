@@ -1,13 +1,21 @@
 """
 测试包追踪器功能
-覆盖: PackageTracker类
+覆盖: PackageTracker类, ImportInfo紧凑存储
 """
+import pickle
+import shutil
+import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
 from package_installer_yulibupt import (
     PackageTracker,
+    PackageImports,
     ImportInfo,
-    STDLIB
+    STDLIB,
+    build_package_tracker,
+    clear_intern_tables,
 )
 
 
@@ -213,5 +221,188 @@ class TestPackageTracker(unittest.TestCase):
         self.assertEqual(line_numbers, [1, 2, 3, 4, 5])
 
 
+class TestIncrementalStats(unittest.TestCase):
+    """测试增量维护的统计与逐条重新计算的结果一致"""
+
+    def setUp(self):
+        """添加分布在多个文件中的标准库和第三方导入"""
+        self.tracker = PackageTracker()
+        spec = [("a.py", "os"), ("a.py", "requests"), ("a.py", "requests"),
+                ("b.py", "numpy"), ("b.py", "requests"), ("c.py", "sys")]
+        for line, (file_name, package) in enumerate(spec, 1):
+            self.tracker.add_import(ImportInfo(package, "import", f"import {package}", line,
+                                               Path(file_name), package))
+
+    def test_counters(self):
+        """测试第三方导入数和文件数"""
+        self.assertEqual(self.tracker.third_party_import_count, 4)
+        self.assertEqual(self.tracker.third_party_file_count, 2)
+        self.assertTrue(self.tracker.is_third_party("numpy"))
+        self.assertFalse(self.tracker.is_third_party("os"))
+
+    def test_single_package_stat(self):
+        """测试单个包的统计查询"""
+        self.assertEqual(self.tracker.get_package_stat("requests"),
+                         {'files_count': 2, 'imports_count': 3, 'pip_package': 'requests'})
+        self.assertIsNone(self.tracker.get_package_stat("os"))
+        self.assertIsNone(self.tracker.get_package_stat("missing"))
+
+    def test_matches_full_recomputation(self):
+        """测试增量统计与从导入记录重新计算的结果一致"""
+        expected = {}
+        for package, imports in self.tracker.package_imports.items():
+            if package not in STDLIB:
+                expected[package] = {'files_count': len({imp.file_path for imp in imports}),
+                                     'imports_count': len(imports), 'pip_package': imports[0].pip_package}
+        self.assertEqual(self.tracker.get_package_stats(), expected)
+
+    def test_returned_set_is_a_copy(self):
+        """测试修改返回的集合不影响追踪器"""
+        self.tracker.get_third_party_packages().add("fake")
+        self.assertNotIn("fake", self.tracker.get_third_party_packages())
+
+
+class TestFileRemoval(unittest.TestCase):
+    """测试按文件撤回和替换导入记录"""
+
+    SPEC = {
+        "a.py": ["os", "requests", "requests", "numpy"],
+        "b.py": ["requests", "yaml"],
+        "c.py": ["sys", "numpy"],
+    }
+
+    def _imports(self, file_name, packages):
+        return [ImportInfo(package, "import", f"import {package}", line, Path(file_name), package)
+                for line, package in enumerate(packages, 1)]
+
+    def _build(self, spec):
+        tracker = PackageTracker()
+        for file_name, packages in spec.items():
+            for import_info in self._imports(file_name, packages):
+                tracker.add_import(import_info)
+        return tracker
+
+    def _assert_same(self, tracker, expected):
+        """比较两个追踪器的内容和统计（不比较记录顺序）"""
+        self.assertEqual(tracker.all_packages, expected.all_packages)
+        self.assertEqual(tracker.get_third_party_packages(), expected.get_third_party_packages())
+        self.assertEqual(tracker.get_package_stats(), expected.get_package_stats())
+        self.assertEqual(tracker.third_party_import_count, expected.third_party_import_count)
+        self.assertEqual(tracker.third_party_file_count, expected.third_party_file_count)
+        self.assertEqual(set(tracker.file_imports), set(expected.file_imports))
+        for package, imports in expected.package_imports.items():
+            self.assertCountEqual(tracker.package_imports[package], imports)
+
+    def test_remove_file(self):
+        """测试移除文件后与不含该文件重新构建的结果一致"""
+        tracker = self._build(self.SPEC)
+        removed = tracker.remove_file(Path("a.py"))
+        self.assertEqual(len(removed), 4)
+        self._assert_same(tracker, self._build({k: v for k, v in self.SPEC.items() if k != "a.py"}))
+
+    def test_remove_last_user_of_package(self):
+        """测试包的最后一个使用文件被移除时，包也被移除"""
+        tracker = self._build(self.SPEC)
+        tracker.remove_file(Path("b.py"))
+        self.assertNotIn("yaml", tracker.all_packages)
+        self.assertNotIn("yaml", tracker.package_imports)
+        self.assertIsNone(tracker.get_package_stat("yaml"))
+
+    def test_remove_only_touches_file_entries(self):
+        """测试撤回文件时不遍历其他文件的记录，剩余记录保持顺序"""
+        tracker = self._build({f"m{index}.py": ["requests"] for index in range(50)})
+        with patch.object(PackageImports, '__iter__', side_effect=AssertionError("不应遍历全部记录")):
+            tracker.remove_file(Path("m10.py"))
+        imports = tracker.package_imports["requests"]
+        self.assertEqual(len(imports), 49)
+        self.assertEqual(imports[0].file_path, Path("m0.py"))
+        self.assertNotIn(Path("m10.py"), [imp.file_path for imp in imports])
+        self.assertEqual(tracker.get_package_stat("requests")['files_count'], 49)
+
+    def test_remove_unknown_file(self):
+        """测试移除不存在的文件不影响追踪器"""
+        tracker = self._build(self.SPEC)
+        self.assertEqual(tracker.remove_file(Path("missing.py")), [])
+        self._assert_same(tracker, self._build(self.SPEC))
+
+    def test_replace_file(self):
+        """测试替换文件内容后与重新构建的结果一致"""
+        tracker = self._build(self.SPEC)
+        new_spec = dict(self.SPEC, **{"b.py": ["flask", "requests", "os"]})
+        old = tracker.replace_file(Path("b.py"), self._imports("b.py", new_spec["b.py"]))
+        self.assertEqual([imp.package_name for imp in old], ["requests", "yaml"])
+        self._assert_same(tracker, self._build(new_spec))
+
+
+class TestImportInfoCompact(unittest.TestCase):
+    """测试ImportInfo的紧凑存储保持原有字段行为"""
+
+    def _make(self, file_path="a.py", statement="import requests", line_number=3):
+        return ImportInfo(package_name="requests", import_type="import", import_statement=statement,
+                          line_number=line_number, file_path=Path(file_path), pip_package="requests")
+
+    def test_fields_unchanged(self):
+        """测试公开字段与构造参数一致"""
+        info = self._make()
+        self.assertEqual((info.package_name, info.import_type, info.import_statement,
+                          info.line_number, info.file_path, info.pip_package),
+                         ("requests", "import", "import requests", 3, Path("a.py"), "requests"))
+
+    def test_no_instance_dict(self):
+        """测试使用__slots__，没有逐实例的__dict__"""
+        self.assertFalse(hasattr(self._make(), '__dict__'))
+
+    def test_paths_and_statements_shared(self):
+        """测试相同路径和语句文本只保存一份"""
+        first = self._make(statement="".join(["import ", "requests"]))
+        second = self._make(statement="".join(["import ", "requests"]), line_number=9)
+        self.assertIs(first.file_path, second.file_path)
+        self.assertIs(first.import_statement, second.import_statement)
+
+    def test_equality_and_repr(self):
+        """测试按字段比较，repr与dataclass格式一致"""
+        self.assertEqual(self._make(), self._make())
+        self.assertNotEqual(self._make(), self._make(line_number=4))
+        self.assertTrue(repr(self._make()).startswith("ImportInfo(package_name='requests', "))
+
+    def test_file_path_assignment(self):
+        """测试可以重新赋值文件路径"""
+        info = self._make()
+        info.file_path = Path("b.py")
+        self.assertEqual(info.file_path, Path("b.py"))
+
+    def test_pickle_round_trip(self):
+        """测试可以pickle（进程池传递结果）"""
+        info = self._make()
+        self.assertEqual(pickle.loads(pickle.dumps(info)), info)
+
+    def test_clear_tables_keeps_records(self):
+        """测试清空去重表后已有记录的字段不变"""
+        info = self._make(file_path="c.py")
+        clear_intern_tables()
+        self.assertEqual(len(installer._path_table), 0)
+        self.assertEqual(len(installer._statement_table), 0)
+        self.assertEqual(info.file_path, Path("c.py"))
+        self.assertEqual(info.import_statement, "import requests")
+        self.assertEqual(info, self._make(file_path="c.py"))
+
+    def test_tables_cleared_after_scan(self):
+        """测试每次扫描结束后去重表被清空，多次扫描不会累积"""
+        test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, test_dir)
+        files = []
+        for index in range(5):
+            files.append(test_dir / f"m{index}.py")
+            files[-1].write_text(f"import requests\nimport pkg{index}\n", encoding='utf-8')
+        for _ in range(2):
+            tracker = build_package_tracker(files, workers=1)
+            self.assertEqual(len(installer._path_table), 0)
+            self.assertEqual(len(installer._statement_table), 0)
+        self.assertEqual(tracker.get_package_stat("requests")['files_count'], 5)
+        # 同一次扫描中相同的语句文本仍然只保存一份
+        first, second = tracker.package_imports["requests"][:2]
+        self.assertIs(first.import_statement, second.import_statement)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,172 @@
+"""
+测试并行与流式导入提取功能
+覆盖: iter_extracted_imports, build_package_tracker, iter_python_files
+"""
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from package_installer_yulibupt import (
+    scan_python_files,
+    iter_python_files,
+    ScanCache,
+    read_file_safely,
+    extract_imports_with_details,
+    iter_extracted_imports,
+    build_package_tracker,
+    PackageTracker,
+)
+
+
+def _tracker_snapshot(tracker):
+    """将追踪器内容转换为可比较的结构"""
+    return {
+        file_path: [(imp.package_name, imp.import_type, imp.import_statement,
+                     imp.line_number, imp.pip_package) for imp in imports]
+        for file_path, imports in tracker.file_imports.items()
+    }
+
+
+class TestParallelExtraction(unittest.TestCase):
+    """测试多进程提取与串行提取结果一致"""
+
+    def setUp(self):
+        """创建包含多个文件的测试项目"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        for i in range(30):
+            subdir = self.test_dir / f"pkg{i % 4}"
+            subdir.mkdir(exist_ok=True)
+            (subdir / f"mod{i}.py").write_text(
+                f"import os\nimport requests\nfrom PIL import Image\n"
+                f"from numpy import (\n    array,\n    zeros,\n)\nimport mod{i}_local as m\n",
+                encoding='utf-8'
+            )
+        self.files = scan_python_files(str(self.test_dir))
+
+    def _serial_tracker(self):
+        """参考实现：逐个文件串行提取"""
+        tracker = PackageTracker()
+        for py_file in self.files:
+            for import_info in extract_imports_with_details(read_file_safely(py_file), py_file):
+                tracker.add_import(import_info)
+        return tracker
+
+    def test_parallel_matches_serial(self):
+        """测试并行结果与串行结果完全一致（包括顺序）"""
+        expected = _tracker_snapshot(self._serial_tracker())
+        with patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0):
+            tracker = build_package_tracker(self.files, workers=2, chunk_size=4)
+        self.assertEqual(_tracker_snapshot(tracker), expected)
+        self.assertEqual(list(tracker.file_imports.keys()), self.files)
+
+    def test_serial_mode(self):
+        """测试workers=1时串行提取"""
+        expected = _tracker_snapshot(self._serial_tracker())
+        tracker = build_package_tracker(self.files, workers=1)
+        self.assertEqual(_tracker_snapshot(tracker), expected)
+
+    def test_results_preserve_order(self):
+        """测试逐文件结果按输入顺序产出"""
+        results = list(iter_extracted_imports(self.files, workers=1, chunk_size=7))
+        self.assertEqual([file_path for file_path, _ in results], self.files)
+        for file_path, imports in results:
+            self.assertTrue(all(imp.file_path == file_path for imp in imports))
+
+    def test_files_without_imports_are_reported(self):
+        """测试没有导入的文件也会产出空结果"""
+        empty_file = self.test_dir / "empty.py"
+        empty_file.write_text("x = 1\n", encoding='utf-8')
+        results = list(iter_extracted_imports([empty_file], workers=1))
+        self.assertEqual(results, [(empty_file, [])])
+
+    def test_ast_backend_parallel(self):
+        """测试ast后端在并行模式下同样可用且结果一致"""
+        expected = _tracker_snapshot(build_package_tracker(self.files, workers=1, backend='ast'))
+        with patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0):
+            tracker = build_package_tracker(self.files, workers=2, chunk_size=4, backend='ast')
+        self.assertEqual(_tracker_snapshot(tracker), expected)
+
+    def test_small_project_runs_serially(self):
+        """测试小项目不启动进程池"""
+        with patch('package_installer_yulibupt.ProcessPoolExecutor') as mock_pool:
+            build_package_tracker(self.files[:3], workers=4)
+            mock_pool.assert_not_called()
+
+    def test_pool_failure_falls_back_to_serial(self):
+        """测试进程池无法创建时回退到串行"""
+        expected = _tracker_snapshot(self._serial_tracker())
+        with patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0), \
+             patch('package_installer_yulibupt.ProcessPoolExecutor', side_effect=OSError("no semaphores")):
+            tracker = build_package_tracker(self.files, workers=4)
+        self.assertEqual(_tracker_snapshot(tracker), expected)
+
+    def test_accepts_generator_input(self):
+        """测试接受惰性文件序列"""
+        tracker = build_package_tracker(iter(self.files), workers=1)
+        self.assertIn("requests", tracker.all_packages)
+        self.assertEqual(len(tracker.file_imports), 30)
+
+    def test_empty_input(self):
+        """测试空文件列表"""
+        tracker = build_package_tracker([], workers=4)
+        self.assertEqual(len(tracker.all_packages), 0)
+
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    """测试流式模式：文件边发现边解析"""
+
+    def setUp(self):
+        """创建测试项目"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        for i in range(12):
+            (self.test_dir / f"mod{i}.py").write_text(
+                f"import requests\nimport os\nfrom lib{i} import x\n", encoding='utf-8'
+            )
+
+    def test_streaming_matches_list_mode(self):
+        """测试流式构建的追踪器内容与列表模式一致"""
+        expected = build_package_tracker(scan_python_files(str(self.test_dir)), workers=1)
+        tracker = build_package_tracker(iter_python_files(str(self.test_dir)), workers=1)
+        self.assertEqual(tracker.all_packages, expected.all_packages)
+        self.assertEqual(_tracker_snapshot(tracker), _tracker_snapshot(expected))
+
+    def test_files_parsed_as_discovered(self):
+        """测试文件在发现后立即解析，而不是等待全部发现完成"""
+        events = []
+
+        def discovering():
+            for py_file in iter_python_files(str(self.test_dir)):
+                events.append(('found', py_file))
+                yield py_file
+
+        with patch('package_installer_yulibupt.read_file_safely',
+                   side_effect=lambda p, **kwargs: events.append(('read', p)) or p.read_text()):
+            build_package_tracker(discovering(), workers=1, chunk_size=1)
+        # 第二个文件被发现之前，第一个文件已经被读取
+        self.assertEqual([kind for kind, _ in events[:3]], ['found', 'read', 'found'])
+
+    def test_streaming_with_cache(self):
+        """测试流式模式下缓存命中与写回"""
+        cache_file = self.test_dir / "cache.jsonl"
+        build_package_tracker(iter_python_files(str(self.test_dir)), workers=1,
+                              cache=ScanCache(cache_file).load())
+        cache = ScanCache(cache_file).load()
+        tracker = build_package_tracker(iter_python_files(str(self.test_dir)), workers=1, cache=cache)
+        self.assertEqual(cache.hits, 12)
+        self.assertEqual(len(tracker.file_imports), 12)
+        self.assertIn("lib11", tracker.all_packages)
+
+    def test_streaming_small_input_runs_serially(self):
+        """测试流式输入不足PARALLEL_MIN_FILES时不启动进程池"""
+        with patch('package_installer_yulibupt.ProcessPoolExecutor') as mock_pool:
+            tracker = build_package_tracker(iter_python_files(str(self.test_dir)), workers=4)
+            mock_pool.assert_not_called()
+        self.assertEqual(len(tracker.file_imports), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
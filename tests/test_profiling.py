@@ -0,0 +1,109 @@
+"""
+测试阶段计时与性能分析
+覆盖: StageProfiler, scan_and_install(report_file=..., profile_file=...)
+"""
+import io
+import os
+import json
+import pstats
+import shutil
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+from package_installer_yulibupt import (
+    StageProfiler,
+    reset_profiler,
+    build_package_tracker,
+    scan_python_files,
+    scan_and_install,
+)
+
+
+class TestStageProfiler(unittest.TestCase):
+    """测试阶段计时器"""
+
+    def test_stage_accumulates(self):
+        """测试同一阶段多次计时累加"""
+        profiler = StageProfiler()
+        with profiler.stage('read', 2):
+            pass
+        with profiler.stage('read', 3):
+            pass
+        profiler.count('read', 1)
+        record = profiler.stages['read']
+        self.assertEqual(record['items'], 6)
+        self.assertEqual(record['calls'], 2)
+        self.assertGreaterEqual(record['wall_seconds'], 0)
+
+    def test_stage_recorded_on_exception(self):
+        """测试阶段内抛出异常时仍然计时"""
+        profiler = StageProfiler()
+        with self.assertRaises(RuntimeError):
+            with profiler.stage('install', 1):
+                raise RuntimeError("pip failed")
+        self.assertEqual(profiler.stages['install']['calls'], 1)
+
+    def test_report_in_pipeline_order(self):
+        """测试报告按流水线顺序排列阶段并可序列化"""
+        profiler = StageProfiler()
+        for name in ['write', 'custom', 'discover', 'verify']:
+            profiler.add(name, 0.1, 0.05, 1)
+        report = json.loads(json.dumps(profiler.report()))
+        self.assertEqual(list(report['stages']), ['discover', 'verify', 'write', 'custom'])
+        self.assertIn('wall_seconds', report['total'])
+
+    def test_merge(self):
+        """测试合并工作进程的阶段数据"""
+        profiler = StageProfiler()
+        profiler.add('extract', 1.0, 0.5, 10)
+        profiler.merge({'extract': {'wall_seconds': 2.0, 'cpu_seconds': 1.0, 'items': 5, 'calls': 1}})
+        self.assertEqual(profiler.stages['extract'],
+                         {'wall_seconds': 3.0, 'cpu_seconds': 1.5, 'items': 15, 'calls': 2})
+
+
+class TestPipelineInstrumentation(unittest.TestCase):
+    """测试扫描流程记录各阶段"""
+
+    def setUp(self):
+        """创建只使用标准库的测试项目，并切换到临时目录（requirements.txt生成在当前目录）"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        for i in range(6):
+            (self.test_dir / f"mod{i}.py").write_text("import os\nimport json\n", encoding='utf-8')
+        cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.addCleanup(os.chdir, cwd)
+
+    def test_parallel_extraction_stages_merged(self):
+        """测试并行提取时工作进程的read/extract计时合并到主进程"""
+        files = scan_python_files(str(self.test_dir))
+        profiler = reset_profiler()
+        with patch('package_installer_yulibupt.PARALLEL_MIN_FILES', 0):
+            build_package_tracker(files, workers=2, chunk_size=2)
+        self.assertEqual(profiler.stages['read']['items'], 6)
+        self.assertEqual(profiler.stages['extract']['items'], 6)
+        self.assertEqual(profiler.encodings, {'utf-8': 6})
+        # 每个文件2个import：工作进程的缓存计数合并到主进程
+        counts = profiler.report()['package_name_cache']
+        self.assertEqual(counts['hits'] + counts['misses'], 12)
+
+    def test_report_and_profile_written(self):
+        """测试生成JSON阶段报告和cProfile结果"""
+        report_file = self.test_dir / "report.json"
+        profile_file = self.test_dir / "run.prof"
+        with contextlib.redirect_stdout(io.StringIO()):
+            scan_and_install(str(self.test_dir), use_cache=False,
+                             report_file=str(report_file), profile_file=str(profile_file))
+        report = json.loads(report_file.read_text(encoding='utf-8'))
+        stages = report['stages']
+        for name in ['discover', 'read', 'extract', 'stdlib_filter', 'write']:
+            self.assertIn(name, stages)
+        self.assertEqual(stages['discover']['items'], 6)
+        self.assertEqual(stages['read']['items'], 6)
+        self.assertGreater(pstats.Stats(str(profile_file)).total_calls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+"""
+测试PyPI并发查询功能
+覆盖: resolve_pypi_names, search_pypi_package, PyPIConnectionPool, PyPICache
+"""
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from package_installer_yulibupt import (
+    resolve_pypi_names,
+    search_pypi_package,
+    PyPIConnectionPool,
+    PyPICache,
+    try_install_with_variants,
+    PYPI_JSON_URL,
+    _UNREACHABLE,
+)
+
+# 本地测试索引中存在的项目（规范化名称 -> 项目名）
+FAKE_PROJECTS = {
+    'requests': 'requests',
+    'python-dateutil': 'python-dateutil',
+    'py-foo': 'py-foo',
+    'foo-python': 'foo-python',
+}
+SLOW_RESPONSE_SECONDS = 1.0
+
+
+class _FakeIndexHandler(BaseHTTPRequestHandler):
+    """模拟PyPI JSON API: /pypi/<name>/json"""
+    protocol_version = 'HTTP/1.1'  # 支持keep-alive
+
+    def do_GET(self):
+        self.server.requests.append((self.client_address, self.path))
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'pypi' and parts[2] == 'json':
+            name = parts[1]
+            if name == 'slow':
+                # 超过客户端超时时间才响应
+                time.sleep(SLOW_RESPONSE_SECONDS)
+                return
+            if name == 'mirrored':
+                self._send(302, b'', {'Location': 'https://mirror.invalid/pypi/mirrored/json'})
+                return
+            if name != name.lower():
+                # PyPI会把非规范化名称重定向到规范化名称
+                self._send(301, b'', {'Location': f'/pypi/{name.lower()}/json'})
+                return
+            if name in FAKE_PROJECTS:
+                body = json.dumps({'info': {'name': FAKE_PROJECTS[name]}}).encode()
+                self._send(200, body, {'Content-Type': 'application/json'})
+                return
+        self._send(404, b'{"message": "Not Found"}', {})
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResolvePyPINames(unittest.TestCase):
+    """使用本地测试索引验证并发查询"""
+
+    def setUp(self):
+        """启动本地索引服务，并使用空的内存缓存"""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeIndexHandler)
+        self.server.requests = []
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/pypi"
+        self.cache = PyPICache(None)
+        patcher = patch('package_installer_yulibupt._pypi_cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolves_multiple_modules(self):
+        """测试一次调用解析多个模块"""
+        results = resolve_pypi_names(['requests', 'dateutil', 'nothing_here'], base_url=self.base_url)
+        self.assertEqual(results, {
+            'requests': 'requests',
+            'dateutil': 'python-dateutil',
+            'nothing_here': None,
+        })
+
+    def test_first_valid_variant_by_priority(self):
+        """测试按变体优先级返回，而非按响应先后"""
+        # foo 的变体顺序: foo, py-foo, python-foo, foo-python, ...
+        results = resolve_pypi_names(['foo'], base_url=self.base_url)
+        self.assertEqual(results['foo'], 'py-foo')
+
+    def test_follows_normalization_redirect(self):
+        """测试跟随名称规范化重定向"""
+        self.assertEqual(search_pypi_package('Requests', base_url=self.base_url), 'requests')
+
+    def test_connections_are_reused(self):
+        """测试查询复用长连接"""
+        resolve_pypi_names(['alpha', 'beta', 'gamma', 'delta'], base_url=self.base_url, max_workers=2)
+        clients = {client for client, _ in self.server.requests}
+        self.assertGreater(len(self.server.requests), 4)
+        self.assertLessEqual(len(clients), 2)
+
+    def test_results_memoised_in_process(self):
+        """测试同一模块在进程内只查询一次"""
+        resolve_pypi_names(['requests'], base_url=self.base_url)
+        count = len(self.server.requests)
+        self.assertEqual(search_pypi_package('requests', base_url=self.base_url), 'requests')
+        self.assertEqual(len(self.server.requests), count)
+
+    def test_invalid_names_not_queried(self):
+        """测试无效名称不发起请求"""
+        results = resolve_pypi_names(['', 'bad name', 'a/b'], base_url=self.base_url)
+        self.assertEqual(results, {'': None, 'bad name': None, 'a/b': None})
+        self.assertEqual(self.server.requests, [])
+
+    def test_unreachable_index_returns_none(self):
+        """测试索引不可达时返回None"""
+        pool = PyPIConnectionPool("http://127.0.0.1:9/pypi", timeout=1)
+        self.assertIs(pool.get_json("/requests/json"), _UNREACHABLE)
+        results = resolve_pypi_names(['requests'], base_url="http://127.0.0.1:9/pypi")
+        self.assertEqual(results, {'requests': None})
+        # 网络故障不是确定的"不存在"，不能写入否定缓存
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_timeout_not_retried(self):
+        """测试超时不重试，每次查询最多等待一个超时时间"""
+        pool = PyPIConnectionPool(self.base_url, timeout=0.2)
+        self.addCleanup(pool.close)
+        start = time.perf_counter()
+        self.assertIs(pool.get_json("/slow/json"), _UNREACHABLE)
+        self.assertLess(time.perf_counter() - start, SLOW_RESPONSE_SECONDS)
+        self.assertEqual([path for _, path in self.server.requests], ["/pypi/slow/json"])
+
+    def test_cross_host_redirect_not_cached(self):
+        """测试跨主机重定向按不可达处理，不写入否定缓存"""
+        pool = PyPIConnectionPool(self.base_url)
+        self.addCleanup(pool.close)
+        self.assertIs(pool.get_json("/mirrored/json"), _UNREACHABLE)
+        with patch('package_installer_yulibupt.generate_package_name_variants', return_value=['mirrored']):
+            self.assertEqual(resolve_pypi_names(['mirrored'], base_url=self.base_url), {'mirrored': None})
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_negative_result_cached(self):
+        """测试确认不存在的模块被缓存，不再重复查询"""
+        resolve_pypi_names(['nothing_here'], base_url=self.base_url)
+        count = len(self.server.requests)
+        self.assertEqual(resolve_pypi_names(['nothing_here'], base_url=self.base_url), {'nothing_here': None})
+        self.assertEqual(len(self.server.requests), count)
+        self.assertEqual(self.cache.hits, 1)
+
+
+class TestPyPICache(unittest.TestCase):
+    """测试PyPI查询缓存的有效期、淘汰与持久化"""
+
+    def setUp(self):
+        """创建临时缓存目录"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.cache_file = self.test_dir / "sub" / "pypi_cache.json"
+
+    def test_persistence_round_trip(self):
+        """测试写回磁盘后重新加载"""
+        cache = PyPICache(self.cache_file)
+        cache.set(PyPICache.make_key('pypi', 'yaml'), 'PyYAML')
+        cache.set(PyPICache.make_key('pypi', 'missing'), None)
+        cache.save()
+        reloaded = PyPICache(self.cache_file)
+        self.assertEqual(reloaded.get(PyPICache.make_key('pypi', 'yaml')), (True, 'PyYAML'))
+        self.assertEqual(reloaded.get(PyPICache.make_key('pypi', 'missing')), (True, None))
+        self.assertEqual(reloaded.get(PyPICache.make_key('pypi', 'other')), (False, None))
+
+    def test_positive_and_negative_ttl(self):
+        """测试找到与未找到的结果分别按各自的有效期过期"""
+        cache = PyPICache(None, ttl=100, negative_ttl=10)
+        with patch('package_installer_yulibupt.time.time', return_value=1000.0):
+            cache.set('found', 'pkg')
+            cache.set('missing', None)
+        with patch('package_installer_yulibupt.time.time', return_value=1050.0):
+            self.assertEqual(cache.get('found'), (True, 'pkg'))
+            self.assertEqual(cache.get('missing'), (False, None))
+        with patch('package_installer_yulibupt.time.time', return_value=1200.0):
+            self.assertEqual(cache.get('found'), (False, None))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_lru_eviction(self):
+        """测试超过上限时淘汰最久未使用的条目"""
+        cache = PyPICache(None, max_entries=2)
+        cache.set('a', 'A')
+        cache.set('b', 'B')
+        cache.get('a')
+        cache.set('c', 'C')
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    def test_corrupt_file_ignored(self):
+        """测试损坏的缓存文件被忽略"""
+        self.cache_file.parent.mkdir(parents=True)
+        self.cache_file.write_text("{not json", encoding='utf-8')
+        self.assertEqual(len(PyPICache(self.cache_file).entries), 0)
+
+    def test_install_outcome_reused(self):
+        """测试变体安装成功的包名在下次直接使用"""
+        cache = PyPICache(None)
+        cache.set(PyPICache.make_key('install', 'foo'), 'py-foo')
+        with patch('package_installer_yulibupt._pypi_cache', cache), \
+             patch('package_installer_yulibupt.install_package',
+                   return_value=(True, "安装并验证成功", 'py-foo')) as mock_install:
+            success, _, actual = try_install_with_variants('foo', 'foo')
+        self.assertTrue(success)
+        self.assertEqual(actual, 'py-foo')
+        mock_install.assert_called_once_with('foo', 'py-foo', auto_retry=False)
+
+    def test_install_negative_skips_attempts(self):
+        """测试确认找不到的模块直接返回失败，不再尝试安装"""
+        cache = PyPICache(None)
+        cache.set(PyPICache.make_key('install', 'foo'), None)
+        with patch('package_installer_yulibupt._pypi_cache', cache), \
+             patch('package_installer_yulibupt.install_package') as mock_install:
+            success, _, actual = try_install_with_variants('foo', 'foo')
+        self.assertFalse(success)
+        self.assertIsNone(actual)
+        mock_install.assert_not_called()
+
+    def test_install_cached_original_name_not_reprobed(self):
+        """测试缓存的包名就是已失败的原始包名时直接返回，不再探测其他变体"""
+        cache = PyPICache(None)
+        cache.set(PyPICache.make_key('install', 'foo'), 'foo')
+        with patch('package_installer_yulibupt._pypi_cache', cache), \
+             patch('package_installer_yulibupt.install_package') as mock_install, \
+             patch('package_installer_yulibupt.search_pypi_package') as mock_search:
+            success, _, actual = try_install_with_variants('foo', 'foo')
+        self.assertFalse(success)
+        self.assertIsNone(actual)
+        mock_install.assert_not_called()
+        mock_search.assert_not_called()
+
+    def test_install_negative_requires_live_pypi_entry(self):
+        """测试只有有效期内的PyPI否定结果才记录为找不到（通过加锁的get查询）"""
+        cache = PyPICache(None, negative_ttl=10)
+        pypi_key = PyPICache.make_key('pypi', 'foo', PYPI_JSON_URL)
+        install_key = PyPICache.make_key('install', 'foo')
+        with patch('package_installer_yulibupt.time.time', return_value=1000.0):
+            cache.set(pypi_key, None)
+        with patch('package_installer_yulibupt._pypi_cache', cache), \
+             patch('package_installer_yulibupt.get_pip_package_name', return_value='foo'), \
+             patch('package_installer_yulibupt.generate_package_name_variants', return_value=[]), \
+             patch('package_installer_yulibupt.search_pypi_package', return_value=None), \
+             patch('package_installer_yulibupt.install_package', return_value=(False, "安装失败", None)), \
+             patch.object(cache, 'save'):
+            for now, recorded in ((1005.0, (True, None)), (1100.0, (False, None))):
+                with self.subTest(now=now), patch('package_installer_yulibupt.time.time', return_value=now):
+                    cache.entries.pop(install_key, None)
+                    self.assertFalse(try_install_with_variants('foo', 'foo')[0])
+                    self.assertEqual(cache.get(install_key), recorded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+测试扫描缓存功能
+覆盖: ScanCache, build_package_tracker(cache=...)
+"""
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+from package_installer_yulibupt import (
+    ScanCache,
+    build_package_tracker,
+    scan_python_files,
+)
+
+
+class TestScanCache(unittest.TestCase):
+    """测试扫描缓存的命中与失效"""
+
+    def setUp(self):
+        """创建测试项目"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self.cache_file = self.test_dir / ".cache.jsonl"
+        (self.test_dir / "a.py").write_text("import requests\nimport os\n", encoding='utf-8')
+        (self.test_dir / "b.py").write_text("from PIL import Image\n", encoding='utf-8')
+        (self.test_dir / "c.py").write_text("x = 1\n", encoding='utf-8')
+        self.files = scan_python_files(str(self.test_dir))
+
+    def _build(self):
+        """使用新加载的缓存构建追踪器"""
+        cache = ScanCache(self.cache_file).load()
+        tracker = build_package_tracker(self.files, workers=1, cache=cache)
+        return tracker, cache
+
+    def test_first_run_populates_cache(self):
+        """测试首次运行写入缓存文件"""
+        tracker, cache = self._build()
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 3)
+        self.assertTrue(self.cache_file.exists())
+        self.assertEqual(len(ScanCache(self.cache_file).load().entries), 3)
+
+    def test_first_run_reads_each_file_once(self):
+        """测试冷启动时内容哈希来自提取时读取的字节，不再单独读取文件"""
+        read_bytes = Path.read_bytes
+        with patch.object(Path, 'read_bytes', autospec=True, side_effect=read_bytes) as mock_read, \
+             patch.object(ScanCache, '_file_digest', side_effect=AssertionError("不应再次读取文件")):
+            self._build()
+        self.assertEqual(mock_read.call_count, 3)
+        entries = ScanCache(self.cache_file).load().entries
+        self.assertTrue(all(entry['sha1'] for entry in entries.values()))
+
+    def test_second_run_hits_cache(self):
+        """测试未变化的文件直接复用缓存，不再解析"""
+        first, _ = self._build()
+        with patch('package_installer_yulibupt.read_file_safely') as mock_read:
+            second, cache = self._build()
+            mock_read.assert_not_called()
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(first.all_packages, second.all_packages)
+        self.assertEqual(
+            [(i.package_name, i.line_number, i.import_statement, i.pip_package)
+             for i in first.file_imports[self.files[1]]],
+            [(i.package_name, i.line_number, i.import_statement, i.pip_package)
+             for i in second.file_imports[self.files[1]]]
+        )
+
+    def test_changed_file_is_reextracted(self):
+        """测试内容变化的文件重新提取"""
+        self._build()
+        (self.test_dir / "a.py").write_text("import requests\nimport numpy\n", encoding='utf-8')
+        tracker, cache = self._build()
+        self.assertEqual(cache.misses, 1)
+        self.assertIn("numpy", tracker.all_packages)
+        self.assertNotIn("os", tracker.all_packages)
+
+    def test_touched_but_unchanged_file_hits_by_hash(self):
+        """测试仅mtime变化而内容不变时通过哈希命中"""
+        self._build()
+        a_file = self.test_dir / "a.py"
+        st = a_file.stat()
+        os.utime(a_file, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        _, cache = self._build()
+        self.assertEqual(cache.hits, 3)
+
+    def test_deleted_files_are_pruned(self):
+        """测试已删除文件的记录被清理"""
+        self._build()
+        (self.test_dir / "c.py").unlink()
+        self.files = scan_python_files(str(self.test_dir))
+        self._build()
+        entries = ScanCache(self.cache_file).load().entries
+        self.assertEqual(len(entries), 2)
+
+    def test_corrupt_cache_is_ignored(self):
+        """测试损坏的缓存文件不影响扫描"""
+        self.cache_file.write_text("not json\n{broken", encoding='utf-8')
+        tracker, cache = self._build()
+        self.assertEqual(cache.hits, 0)
+        self.assertIn("requests", tracker.all_packages)
+
+    def test_version_mismatch_discards_cache(self):
+        """测试缓存版本不匹配时全部重新提取"""
+        self._build()
+        with patch.object(ScanCache, 'VERSION', ScanCache.VERSION + 1):
+            _, cache = self._build()
+        self.assertEqual(cache.hits, 0)
+
+    def test_extractor_mismatch_discards_cache(self):
+        """测试切换提取后端时缓存失效"""
+        self._build()
+        cache = ScanCache(self.cache_file, extractor='ast').load()
+        self.assertEqual(cache.entries, {})
+        with self.assertRaises(ValueError):
+            build_package_tracker(self.files, workers=1, cache=cache, backend='regex')
+
+    def test_pip_package_uses_current_mapping(self):
+        """测试从缓存重建时按当前映射计算pip包名"""
+        self._build()
+        with patch.dict('package_installer_yulibupt.PACKAGE_MAPPING', {'requests': 'requests-custom'}):
+            tracker, cache = self._build()
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(tracker.package_imports['requests'][0].pip_package, 'requests-custom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,8 @@ from package_installer_yulibupt import (
     run_package_post_install,
     check_local_module_exists,
     diagnose_import_failure,
-    get_installed_package_info
+    get_installed_package_info,
+    ImportCheckResult
 )
 
 
@@ -291,31 +292,36 @@ class TestDiagnoseImportFailure(unittest.TestCase):
         self.assertIsInstance(msg, str)
         self.assertIn("FakePackage12345", msg)
 
-    @patch('package_installer_yulibupt.check_package_installed')
-    def test_detect_case_mismatch(self, mock_check):
-        """测试检测大小写不匹配"""
+    @patch('package_installer_yulibupt.importlib.import_module', side_effect=AssertionError("不应在本进程中导入"))
+    @patch('package_installer_yulibupt.find_top_level_spec', return_value=True)
+    @patch('package_installer_yulibupt.verify_imports')
+    def test_detect_case_mismatch(self, mock_verify, mock_spec, mock_import):
+        """测试检测大小写不匹配（小写模块名在子进程中验证）"""
         # 模拟：小写模块可以导入
-        def side_effect(name):
-            return name == "mymodule"
-        mock_check.side_effect = side_effect
+        mock_verify.side_effect = lambda modules: {
+            name: ImportCheckResult(name, name == "mymodule") for name in modules}
         
         msg, actual = diagnose_import_failure("MyModule", "mymodule")
         
         # 应该检测到大小写问题
         self.assertIn("mymodule", msg.lower())
         self.assertEqual(actual, "mymodule")
+        mock_spec.assert_called_once_with("mymodule")
+        mock_verify.assert_called_once_with(["mymodule"])
+        mock_import.assert_not_called()
 
-    @patch('package_installer_yulibupt.check_package_installed')
+    @patch('package_installer_yulibupt.verify_imports')
+    @patch('package_installer_yulibupt.find_top_level_spec', return_value=False)
     @patch('package_installer_yulibupt.get_installed_package_info')
-    def test_diagnose_installed_but_different_module(self, mock_info, mock_check):
-        """测试诊断已安装但模块名不同"""
-        mock_check.return_value = False
+    def test_diagnose_installed_but_different_module(self, mock_info, mock_spec, mock_verify):
+        """测试诊断已安装但模块名不同（小写模块不存在时不启动验证子进程）"""
         mock_info.return_value = {'Name': 'some-package', 'Version': '1.0.0'}
         
         msg, actual = diagnose_import_failure("DifferentName", "some-package")
         
         self.assertIn("some-package", msg)
         self.assertIsNone(actual)
+        mock_verify.assert_not_called()
 
 
 class TestGetInstalledPackageInfo(unittest.TestCase):
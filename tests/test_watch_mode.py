@@ -0,0 +1,144 @@
+"""
+测试监视模式
+覆盖: snapshot_python_files, ProjectWatcher, watch_and_install
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import contextlib
+from pathlib import Path
+from unittest.mock import patch
+import package_installer_yulibupt as installer
+from package_installer_yulibupt import (
+    snapshot_python_files,
+    ProjectWatcher,
+    watch_and_install,
+    build_package_tracker,
+    scan_python_files,
+)
+
+
+class TestProjectWatcher(unittest.TestCase):
+    """测试轮询检测变化并增量更新追踪器"""
+
+    def setUp(self):
+        """创建测试项目并完成首次扫描"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        self._write("app.py", "import requests\nimport os\n")
+        self._write("lib/util.py", "import yaml\n")
+        self.watcher = ProjectWatcher(str(self.test_dir))
+        self.watcher.initial_scan()
+
+    def _write(self, name, content):
+        path = self.test_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+        # 确保mtime变化（某些文件系统的时间精度较低）
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        return path
+
+    def _assert_matches_rebuild(self):
+        expected = build_package_tracker(scan_python_files(str(self.test_dir)), workers=1)
+        self.assertEqual(self.watcher.tracker.all_packages, expected.all_packages)
+        self.assertEqual(self.watcher.tracker.get_package_stats(), expected.get_package_stats())
+
+    def test_no_changes(self):
+        """测试没有变化时poll返回空"""
+        self.assertEqual(self.watcher.poll(), ([], []))
+
+    def test_modified_file(self):
+        """测试只重新解析修改的文件"""
+        path = self._write("app.py", "import requests\nimport flask\n")
+        changed, removed = self.watcher.poll()
+        self.assertEqual((changed, removed), ([path], []))
+        with patch('package_installer_yulibupt.read_file_safely', wraps=lambda p, **kwargs: p.read_text()) as mock_read:
+            added, dropped = self.watcher.apply_changes(changed, removed)
+            # 只重新读取修改过的文件
+            mock_read.assert_called_once()
+            self.assertEqual(mock_read.call_args.args, (path,))
+        self.assertEqual((added, dropped), ({'flask'}, set()))
+        self._assert_matches_rebuild()
+
+    def test_new_and_deleted_files(self):
+        """测试新增和删除的文件"""
+        new_file = self._write("lib/extra.py", "import numpy\n")
+        (self.test_dir / "lib" / "util.py").unlink()
+        changed, removed = self.watcher.poll()
+        self.assertEqual(changed, [new_file])
+        self.assertEqual(removed, [self.test_dir / "lib" / "util.py"])
+        added, dropped = self.watcher.apply_changes(changed, removed)
+        self.assertEqual((added, dropped), ({'numpy'}, {'yaml'}))
+        self._assert_matches_rebuild()
+
+    def test_change_without_new_packages(self):
+        """测试第三方包集合未变化时报告为空"""
+        self._write("app.py", "import requests\nimport sys\n")
+        self.assertEqual(self.watcher.apply_changes(*self.watcher.poll()), (set(), set()))
+
+    def test_intern_tables_do_not_grow(self):
+        """测试反复修改文件时路径和语句去重表不会累积"""
+        for index in range(3):
+            self._write("app.py", f"import requests\nimport pkg{index}\n")
+            self.watcher.apply_changes(*self.watcher.poll())
+            self.assertEqual(len(installer._path_table), 0)
+            self.assertEqual(len(installer._statement_table), 0)
+        self.assertEqual(self.watcher.tracker.package_imports['pkg2'][0].file_path, self.test_dir / "app.py")
+
+    def test_initial_scan_without_process_pool(self):
+        """测试仅分析和演练模式下首次扫描不启动提取进程"""
+        for option in ('ANALYZE_ONLY', 'DRY_RUN'):
+            with self.subTest(option=option), \
+                 patch.object(installer, option, True), \
+                 patch.object(installer, 'EXTRACT_WORKERS', 2), \
+                 patch.object(installer, 'PARALLEL_MIN_FILES', 0), \
+                 patch.object(installer, 'ProcessPoolExecutor', side_effect=AssertionError("不应启动进程池")):
+                watcher = ProjectWatcher(str(self.test_dir))
+                watcher.initial_scan()
+                self.assertEqual(watcher.tracker.third_party_packages, {'requests', 'yaml'})
+
+    def test_snapshot(self):
+        """测试快照记录mtime和大小"""
+        snapshot = snapshot_python_files(str(self.test_dir))
+        self.assertEqual(set(snapshot), {self.test_dir / "app.py", self.test_dir / "lib" / "util.py"})
+        self.assertEqual(snapshot[self.test_dir / "app.py"][1], len("import requests\nimport os\n"))
+
+
+class TestWatchAndInstall(unittest.TestCase):
+    """测试监视循环只在第三方包变化时重新安装"""
+
+    def setUp(self):
+        """创建测试项目"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.test_dir)
+        (self.test_dir / "app.py").write_text("import requests\n", encoding='utf-8')
+
+    def test_reinstall_only_on_third_party_change(self):
+        """测试首次安装一次，之后只在第三方包集合变化时再次安装"""
+        app = self.test_dir / "app.py"
+        edits = iter([
+            "import requests\nimport os\n",      # 只新增标准库：不重新安装
+            "import requests\nimport flask\n",   # 新增第三方包：重新安装
+        ])
+
+        def sleep(_):
+            content = next(edits, None)
+            if content is not None:
+                app.write_text(content, encoding='utf-8')
+                st = app.stat()
+                os.utime(app, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        with patch('package_installer_yulibupt.enhanced_process_installation') as mock_install, \
+             patch('package_installer_yulibupt.time.sleep', side_effect=sleep), \
+             contextlib.redirect_stdout(io.StringIO()):
+            watch_and_install(str(self.test_dir), max_cycles=3)
+        self.assertEqual(mock_install.call_count, 2)
+        tracker = mock_install.call_args[0][0]
+        self.assertIn('flask', tracker.third_party_packages)
+
+
+if __name__ == '__main__':
+    unittest.main()